@@ -0,0 +1,321 @@
+"""Headless benchmarks for the clock bar hot paths.
+
+Drives AnimatedToggleClockBar on Qt's offscreen platform with generated
+task sets and reports latency percentiles per operation, plus memory.
+Results can be saved as JSON and compared against an earlier run:
+
+    python benchmarks/bench_clock_bar.py --output before.json
+    python benchmarks/bench_clock_bar.py --compare before.json
+
+Tasks are written to a temporary database, never to the real one. On
+Linux the settings file is redirected to the same temporary directory.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PySide6
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from main import AnimatedToggleClockBar
+from perf_stats import STATS
+from task_storage import TaskStorage
+from task_store import TaskStore
+from time_range import seconds_to_time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+POSITIONS = ("top", "bottom", "left", "right")
+RANGES = {
+    "normal": (datetime.time(8, 0), datetime.time(18, 0)),
+    "wrapping": (datetime.time(22, 0), datetime.time(6, 0)),
+}
+DEFAULT_COUNTS = (10, 1000, 100000)
+
+
+class BenchClockBar(AnimatedToggleClockBar):
+    """Clock bar with its storage in a temporary directory and no tray popups"""
+
+    data_dir = None
+
+    def open_task_storage(self):
+        return TaskStorage(os.path.join(self.data_dir, "tasks.sqlite3"))
+
+    def show_task_notification(self, task_name, task_time):
+        # Measure the index walk, not the desktop notification service
+        pass
+
+    def handle_import_finished(self, title, source_label, skipped_count, cancelled, error_kind, error_message):
+        # Record the result instead of showing a message box
+        self.import_worker = None
+        self.import_merge_index = None
+        self.import_result = (self.import_imported_count, skipped_count, error_kind, error_message)
+        self.import_loop.quit()
+
+
+def percentiles(samples_ns):
+    """Summarize latencies (nanoseconds) in microseconds"""
+    samples = sorted(samples_ns)
+
+    def at(fraction):
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))] / 1000
+
+    return {
+        "n": len(samples),
+        "mean_us": statistics.fmean(samples) / 1000,
+        "p50_us": at(0.50),
+        "p90_us": at(0.90),
+        "p99_us": at(0.99),
+        "max_us": samples[-1] / 1000,
+    }
+
+
+def timed(function, repeat):
+    """Call function repeat times and return the latencies in nanoseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        function()
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+def generate_tasks(count, seed):
+    """Deterministic (id, seconds, name) rows spread over the whole day"""
+    rng = random.Random(seed)
+    return [(f"bench-{i}", rng.randrange(24 * 3600), f"Task {i}") for i in range(count)]
+
+
+def populate(widget, tasks):
+    """Replace the widget's tasks and return the memory they and the index take"""
+    widget.tasks = TaskStore()
+    widget.notified_tasks = set()
+    widget.rebuild_task_index()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    widget.tasks.add_many(tasks)
+    widget.rebuild_task_index()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used
+
+
+def bench_scenario(widget, tasks, range_name, position, repeat):
+    """Time the per-frame and per-event operations for one configuration"""
+    widget.start_time, widget.end_time = RANGES[range_name]
+    widget.update_time_range()
+    widget.move_to_screen(widget.screen_index, position)
+    task_memory = populate(widget, tasks)
+
+    rect = widget.rect()
+    image = QtGui.QImage(rect.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+    results = {"memory": {"task_bytes": task_memory}}
+
+    def paint():
+        painter = QtGui.QPainter(image)
+        # The target offset is required by newer PySide6 releases
+        widget.render(painter, QtCore.QPoint())
+        painter.end()
+
+    def paint_cold():
+        # Drop the cached layers and marker positions first
+        widget.layer_cache.clear()
+        widget.marker_cache_key = None
+        paint()
+
+    def draw_markers():
+        widget.marker_cache_key = None
+        painter = QtGui.QPainter(image)
+        widget.draw_task_markers(painter, rect)
+        painter.end()
+
+    paint()
+    results["paint"] = percentiles(timed(paint, repeat))
+    results["paint_cold"] = percentiles(timed(paint_cold, repeat))
+    results["draw_task_markers"] = percentiles(timed(draw_markers, repeat))
+
+    # Hit tests along the whole bar
+    length = rect.width() if position in ("top", "bottom") else rect.height()
+    rng = random.Random(1)
+    points = []
+    for _ in range(repeat * 10):
+        along = rng.uniform(0, length)
+        points.append(QtCore.QPointF(along, 2) if position in ("top", "bottom") else QtCore.QPointF(2, along))
+    widget.get_marker_positions()
+    samples = []
+    for point in points:
+        start = time.perf_counter_ns()
+        widget.get_task_at_position(point)
+        samples.append(time.perf_counter_ns() - start)
+    results["get_task_at_position"] = percentiles(samples)
+
+    # One sweep through the range, like the notification timer over a day
+    time_range = widget.time_range
+    steps = repeat * 10
+    times = [time_range.time_at(step / steps) for step in range(steps + 1)]
+    widget.task_index.seek(-1)
+    widget.notified_tasks.clear()
+    samples = []
+    for current_time in times:
+        start = time.perf_counter_ns()
+        widget.check_task_notifications(current_time)
+        samples.append(time.perf_counter_ns() - start)
+    results["check_task_notifications"] = percentiles(samples)
+
+    return results
+
+
+def bench_import(widget, tasks, directory, repeat):
+    """Time import_tasks_from_file end to end, until the last batch is added"""
+    path = os.path.join(directory, f"import_{len(tasks)}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"tasks": [{"name": name, "time": seconds_to_time(seconds).isoformat()}
+                             for _, seconds, name in tasks]}, file)
+
+    samples = []
+    for _ in range(repeat):
+        populate(widget, [])
+        widget.import_loop = QtCore.QEventLoop()
+        start = time.perf_counter_ns()
+        widget.import_tasks_from_file(path)
+        widget.import_loop.exec()
+        samples.append(time.perf_counter_ns() - start)
+        if widget.import_result[2]:
+            raise RuntimeError(f"Import failed: {widget.import_result[3]}")
+
+    # Let the persistence thread catch up before the next scenario
+    widget.persistence.flush()
+    return percentiles(samples)
+
+
+def run(counts, repeat, import_repeat):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    app.setOrganizationName("LinearClockBenchmark")
+    app.setApplicationName("LinearClockBenchmark")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        QtCore.QSettings.setPath(QtCore.QSettings.NativeFormat, QtCore.QSettings.UserScope, directory)
+        BenchClockBar.data_dir = directory
+        widget = BenchClockBar()
+
+        # Storage and tasks are set up right after the first frame
+        while not widget.startup_done:
+            app.processEvents(QtCore.QEventLoop.WaitForMoreEvents, 100)
+        for name in ("startup_first_paint", "startup_ready"):
+            results[name] = STATS.snapshot()[name]
+
+        for count in counts:
+            tasks = generate_tasks(count, seed=count)
+            for range_name in RANGES:
+                for position in POSITIONS:
+                    name = f"{count}/{range_name}/{position}"
+                    print(f"  {name}", file=sys.stderr)
+                    for operation, summary in bench_scenario(widget, tasks, range_name, position, repeat).items():
+                        results[f"{name}/{operation}"] = summary
+
+            widget.start_time, widget.end_time = RANGES["normal"]
+            widget.update_time_range()
+            print(f"  {count}/import", file=sys.stderr)
+            results[f"{count}/import_tasks_from_file"] = bench_import(widget, tasks, directory, import_repeat)
+
+        widget.persistence.close()
+        widget.close()
+
+    memory = {}
+    if resource is not None:
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        memory["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pyside": PySide6.__version__,
+            "platform": platform.platform(),
+            "counts": list(counts),
+            "repeat": repeat,
+        },
+        "memory": memory,
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print p50 changes against a baseline and return the regressed keys"""
+    regressions = []
+    print(f"{'benchmark':60} {'base p50':>12} {'now p50':>12} {'ratio':>7}")
+    for key, summary in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None or "p50_us" not in summary:
+            continue
+        ratio = summary["p50_us"] / base["p50_us"] if base["p50_us"] else 1.0
+        marker = "  REGRESSION" if ratio > threshold else ""
+        print(f"{key:60} {base['p50_us']:12.1f} {summary['p50_us']:12.1f} {ratio:7.2f}{marker}")
+        if ratio > threshold:
+            regressions.append(key)
+    return regressions
+
+
+def print_results(report):
+    print(f"{'benchmark':60} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10} {'max us':>10}")
+    for key, summary in report["results"].items():
+        if "max_ms" in summary:
+            print(f"{key:60} {summary['max_ms'] * 1000:10.1f} us")
+        elif "p50_us" in summary:
+            print(f"{key:60} {summary['p50_us']:10.1f} {summary['p90_us']:10.1f} "
+                  f"{summary['p99_us']:10.1f} {summary['max_us']:10.1f}")
+        else:
+            print(f"{key:60} {summary['task_bytes'] / 1024:10.0f} KiB tasks")
+    if report["memory"]:
+        print(f"peak RSS: {report['memory']['peak_rss_bytes'] / (1024 * 1024):.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--counts", default=",".join(map(str, DEFAULT_COUNTS)),
+                        help="comma-separated task counts (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=50, help="samples per operation (default: %(default)s)")
+    parser.add_argument("--import-repeat", type=int, default=3, help="imports per task count (default: %(default)s)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="p50 ratio above which --compare reports a regression (default: %(default)s)")
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.counts.split(",")]
+    report = run(counts, args.repeat, args.import_repeat)
+    print_results(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        print()
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold}x", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
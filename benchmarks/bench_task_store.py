@@ -0,0 +1,99 @@
+"""Benchmarks for the Qt-free task stores.
+
+Compares the memory of a day of tasks kept as per-task dicts (the old
+model) with TaskStore and ColumnarTaskStore, and times the stores'
+operations:
+
+    python benchmarks/bench_task_store.py --count 1000000
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_store import ColumnarTaskStore, TaskStore
+
+
+def generate_rows(count, seed=1):
+    """(id, seconds, name) rows with uuid ids and a realistic share of repeated names"""
+    rng = random.Random(seed)
+    names = [f"Task {i}" for i in range(max(1, count // 20))]
+    return [(str(uuid.UUID(int=rng.getrandbits(128))), rng.randrange(24 * 3600), rng.choice(names))
+            for _ in range(count)]
+
+
+def measure(build):
+    """Bytes allocated by build() that are still alive afterwards"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def timed(label, function, count):
+    """Run function once and report the time per operation"""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{label:28} {elapsed * 1000:10.2f} ms  {elapsed / count * 1e9:10.0f} ns/op")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=100000, help="tasks per day (default: %(default)s)")
+    args = parser.parse_args()
+    count = args.count
+
+    rows = generate_rows(count)
+    # Fresh name strings per row, like tasks decoded from storage or an import
+    rows = [(task_id, seconds, "".join(name)) for task_id, seconds, name in rows]
+
+    def build_dicts():
+        return {task_id: {'time': datetime.time(seconds // 3600, seconds % 3600 // 60, seconds % 60),
+                          'name': "".join(name)}
+                for task_id, seconds, name in rows}
+
+    def build_store(store_class):
+        store = store_class()
+        store.load((task_id, seconds, "".join(name)) for task_id, seconds, name in rows)
+        return store
+
+    # Ids are shared by the dict model and TaskStore, so they are not counted;
+    # ColumnarTaskStore is charged for its packed copy of them
+    dicts, dict_bytes = measure(build_dicts)
+    del dicts
+    print(f"dict model:        {dict_bytes / count:8.1f} bytes/task")
+    for store_class in (TaskStore, ColumnarTaskStore):
+        store, store_bytes = measure(lambda: build_store(store_class))
+        del store
+        print(f"{store_class.__name__ + ':':18} {store_bytes / count:8.1f} bytes/task "
+              f"({dict_bytes / store_bytes:.1f}x smaller, {store_bytes / (1024 * 1024):.1f} MiB)")
+
+    for store_class in (TaskStore, ColumnarTaskStore):
+        print()
+        print(store_class.__name__)
+        rng = random.Random(2)
+        timed("load", lambda: build_store(store_class), count)
+        store = build_store(store_class)
+        ids = list(store)
+        # Changes are merged into the sorted columns by the next query, so columns includes that pass
+        changes = ids[:min(count, 10000)]
+        timed("add (one by one)", lambda: [store.add(task_id, store[task_id].seconds, "renamed")
+                                           for task_id in changes], len(changes))
+        timed("move", lambda: [store.move(task_id, rng.randrange(24 * 3600)) for task_id in changes], len(changes))
+        timed("columns", store.columns, count)
+        timed("between", lambda: [store.between(rng.randrange(86400), rng.randrange(86400))
+                                  for _ in range(10)], 10)
+        timed("remove", lambda: [store.remove(task_id) for task_id in changes], len(changes))
+
+
+if __name__ == "__main__":
+    main()
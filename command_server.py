@@ -0,0 +1,104 @@
+import getpass
+import json
+
+from PySide6 import QtCore, QtNetwork
+
+
+def server_name():
+    """Per-user name of the local socket (or named pipe) of the running instance"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "user"
+    return f"LinearClock-{user}"
+
+
+class CommandServer(QtCore.QObject):
+    """Local socket endpoint for command-line clients.
+
+    The protocol is line-delimited JSON in both directions: every request
+    is one JSON object on one line, and every request gets exactly one
+    response line, in order. A client may write many requests before it
+    reads any responses, and one "add" request can carry any number of
+    tasks, so large batches need a single round trip.
+    """
+
+    def __init__(self, handle_request, parent=None):
+        super().__init__(parent)
+        # Called on the GUI thread with the decoded request; returns the response dict
+        self.handle_request = handle_request
+        self.server = QtNetwork.QLocalServer(self)
+        self.server.setSocketOptions(QtNetwork.QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self.accept_connections)
+
+    def listen(self):
+        """Start listening; returns False if another instance already serves the name"""
+        name = server_name()
+        if self.server.listen(name):
+            return True
+
+        # A socket left behind by a crashed instance cannot be connected to
+        probe = QtNetwork.QLocalSocket()
+        probe.connectToServer(name)
+        if probe.waitForConnected(500):
+            probe.disconnectFromServer()
+            return False
+        QtNetwork.QLocalServer.removeServer(name)
+        return self.server.listen(name)
+
+    def close(self):
+        self.server.close()
+
+    def accept_connections(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self.read_requests(socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def read_requests(self, socket):
+        """Answer every complete request line received so far"""
+        while socket.canReadLine():
+            line = bytes(socket.readLine()).strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object")
+            except ValueError as e:
+                response = {"ok": False, "error": f"Invalid request: {e}"}
+            else:
+                try:
+                    response = self.handle_request(request)
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+            socket.write(json.dumps(response).encode('utf-8') + b"\n")
+        socket.flush()
+
+
+def send_requests(requests, timeout_ms=30000):
+    """Send requests to the running instance and return their responses.
+
+    All requests are written before any response is read. Raises OSError
+    if no instance is running or it does not answer within timeout_ms.
+    """
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(server_name())
+    if not socket.waitForConnected(timeout_ms):
+        raise OSError(f"Linear Clock is not running ({socket.errorString()})")
+
+    payload = b"".join(json.dumps(request).encode('utf-8') + b"\n" for request in requests)
+    socket.write(payload)
+    while socket.bytesToWrite() > 0:
+        if not socket.waitForBytesWritten(timeout_ms):
+            raise OSError(f"Could not send the request ({socket.errorString()})")
+
+    responses = []
+    while len(responses) < len(requests):
+        if not socket.canReadLine() and not socket.waitForReadyRead(timeout_ms):
+            raise OSError(f"No response from Linear Clock ({socket.errorString()})")
+        while socket.canReadLine() and len(responses) < len(requests):
+            responses.append(json.loads(bytes(socket.readLine())))
+
+    socket.disconnectFromServer()
+    return responses
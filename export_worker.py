@@ -0,0 +1,33 @@
+from PySide6 import QtCore
+
+from task_export import export_tasks
+
+
+class ExportSignals(QtCore.QObject):
+    # Exported count, error message ('' on success)
+    finished = QtCore.Signal(int, str)
+
+
+class ExportWorker(QtCore.QRunnable):
+    """Writes an export on a QThreadPool thread.
+
+    rows is a snapshot of (id, time, name) tuples taken on the GUI thread,
+    so the tasks can keep changing while the file is written.
+    """
+
+    def __init__(self, file_path, rows, export_format, metadata):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.file_path = file_path
+        self.rows = rows
+        self.export_format = export_format
+        self.metadata = metadata
+        self.signals = ExportSignals()
+
+    def run(self):
+        try:
+            count = export_tasks(self.file_path, self.rows, self.export_format, self.metadata)
+        except Exception as e:
+            self.signals.finished.emit(0, str(e))
+            return
+        self.signals.finished.emit(count, '')
@@ -0,0 +1,518 @@
+import datetime
+import functools
+import hashlib
+import io
+import threading
+import zoneinfo
+from collections import OrderedDict
+
+from recurrence import window_segments
+from time_range import SECONDS_PER_DAY, TimeRange, seconds_to_time, time_to_seconds
+
+WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+
+# Seconds per step of the sub-daily frequencies
+SUB_DAILY_STEPS = {'SECONDLY': 1, 'MINUTELY': 60, 'HOURLY': 3600}
+DAY_FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+
+# RRULE parts that are understood; events using any other part are skipped
+SUPPORTED_RULE_PARTS = {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'BYDAY', 'BYMONTHDAY', 'BYMONTH', 'WKST'}
+
+
+@functools.lru_cache(maxsize=64)
+def event_timezone(tzid):
+    """tzinfo for a TZID, or None (floating time) if it is not an IANA zone name"""
+    try:
+        return zoneinfo.ZoneInfo(tzid.strip('/'))
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def convert(naive, from_tz, to_tz):
+    """Convert a naive wall-clock time between zones; None means floating (or local for to_tz)"""
+    if from_tz is None:
+        return naive
+    aware = naive.replace(tzinfo=from_tz)
+    return (aware.astimezone(to_tz) if to_tz is not None else aware.astimezone()).replace(tzinfo=None)
+
+
+def to_local(naive, tz):
+    """Local wall-clock time of an event-local time"""
+    return convert(naive, tz, None)
+
+
+def from_local(naive, tz):
+    """Event-local wall-clock time of a local time"""
+    if tz is None:
+        return naive
+    return naive.astimezone(tz).replace(tzinfo=None)
+
+
+def unfold_lines(text):
+    """Yield content lines, joining folded continuation lines (RFC 5545 3.1)"""
+    pending = None
+    for line in text:
+        line = line.rstrip('\r\n')
+        if pending is not None and line[:1] in (' ', '\t'):
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+
+def parse_content_line(line):
+    """Split 'NAME;PARAM=VALUE:value' into (NAME, {PARAM: VALUE}, value), or None"""
+    colon = line.find(':')
+    if colon < 0:
+        return None
+    quote = line.find('"')
+    if 0 <= quote < colon:
+        # A quoted parameter value may contain ':'
+        in_quotes = False
+        for colon, char in enumerate(line):
+            if char == '"':
+                in_quotes = not in_quotes
+            elif char == ':' and not in_quotes:
+                break
+        else:
+            return None
+
+    name, *params = line[:colon].split(';')
+    parameters = {}
+    for param in params:
+        key, _, param_value = param.partition('=')
+        parameters[key.upper()] = param_value.strip('"')
+    return name.upper(), parameters, line[colon + 1:]
+
+
+def unescape_text(value):
+    """Undo TEXT escaping (\\n, \\, \\; \\\\)"""
+    if '\\' not in value:
+        return value
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            char = next(chars, '')
+            result.append('\n' if char in 'nN' else char)
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def parse_date_time(value, params):
+    """(naive datetime, tzinfo) of a DATE-TIME value; (None, None) for all-day DATE values"""
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return None, None
+    if len(value) not in (15, 16) or value[8] != 'T':
+        raise ValueError(f"Invalid date-time: {value}")
+    naive = datetime.datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                              int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    if value.endswith('Z'):
+        return naive, datetime.timezone.utc
+    tzid = params.get('TZID')
+    return naive, event_timezone(tzid) if tzid else None
+
+
+def parse_weekday(value):
+    """(ordinal or None, weekday) of a BYDAY entry such as 'MO', '2TU' or '-1FR'"""
+    ordinal = value[:-2]
+    return (int(ordinal) if ordinal else None), WEEKDAYS[value[-2:]]
+
+
+def last_day_of_month(date):
+    next_month = date.replace(day=28) + datetime.timedelta(days=4)
+    return (next_month - datetime.timedelta(days=next_month.day)).day
+
+
+def day_of_month_matches(date, month_day):
+    """Check a BYMONTHDAY entry; negative entries count from the end of the month"""
+    if month_day > 0:
+        return date.day == month_day
+    return date.day == last_day_of_month(date) + 1 + month_day
+
+
+def weekday_matches(date, ordinal, weekday):
+    """Check a BYDAY entry within the month of date ('2TU' = second Tuesday, '-1FR' = last Friday)"""
+    if date.weekday() != weekday:
+        return False
+    if ordinal is None:
+        return True
+    if ordinal > 0:
+        return (date.day - 1) // 7 + 1 == ordinal
+    return (last_day_of_month(date) - date.day) // 7 + 1 == -ordinal
+
+
+class IcsRule:
+    """The supported subset of an RRULE"""
+
+    __slots__ = ('freq', 'interval', 'count', 'until', 'by_day', 'by_month_day', 'by_month', 'week_start')
+
+    def __init__(self, value, tz):
+        parts = {}
+        for part in value.upper().split(';'):
+            if part:
+                key, _, part_value = part.partition('=')
+                parts[key] = part_value
+        unsupported = set(parts) - SUPPORTED_RULE_PARTS
+        if unsupported:
+            raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(unsupported))}")
+
+        self.freq = parts.get('FREQ')
+        if self.freq not in SUB_DAILY_STEPS and self.freq not in DAY_FREQUENCIES:
+            raise ValueError(f"Unsupported RRULE frequency: {self.freq}")
+        self.interval = int(parts.get('INTERVAL', 1))
+        if self.interval < 1:
+            raise ValueError("RRULE interval must be positive")
+        self.count = int(parts['COUNT']) if 'COUNT' in parts else None
+
+        # UNTIL is compared in the event's own zone; a date means the end of that day
+        self.until = None
+        if 'UNTIL' in parts:
+            until, until_tz = parse_date_time(parts['UNTIL'], {})
+            if until is None:
+                date_value = parts['UNTIL']
+                until = datetime.datetime(int(date_value[0:4]), int(date_value[4:6]), int(date_value[6:8]), 23, 59, 59)
+            else:
+                until = convert(until, until_tz, tz) if tz is not None else until
+            self.until = until
+
+        self.by_day = [parse_weekday(day) for day in parts['BYDAY'].split(',')] if 'BYDAY' in parts else None
+        self.by_month_day = [int(day) for day in parts['BYMONTHDAY'].split(',')] if 'BYMONTHDAY' in parts else None
+        self.by_month = {int(month) for month in parts['BYMONTH'].split(',')} if 'BYMONTH' in parts else None
+        self.week_start = WEEKDAYS[parts.get('WKST', 'MO')]
+        if self.count is not None and self.freq in SUB_DAILY_STEPS and (self.by_day or self.by_month_day or self.by_month):
+            raise ValueError("COUNT with BY parts is not supported for sub-daily rules")
+
+    def date_filters_match(self, date):
+        """BYMONTH / BYMONTHDAY / BYDAY used as plain filters (sub-daily and daily rules)"""
+        if self.by_month is not None and date.month not in self.by_month:
+            return False
+        if self.by_month_day is not None and not any(day_of_month_matches(date, day) for day in self.by_month_day):
+            return False
+        if self.by_day is not None and date.weekday() not in {weekday for _, weekday in self.by_day}:
+            return False
+        return True
+
+    def day_in_period(self, date, start):
+        """Whether the rule selects date within its period (day, week, month or year)"""
+        if self.freq == 'DAILY':
+            return self.date_filters_match(date)
+
+        if self.by_month is not None and date.month not in self.by_month:
+            return False
+        if self.freq == 'WEEKLY':
+            weekdays = {weekday for _, weekday in self.by_day} if self.by_day else {start.weekday()}
+            return date.weekday() in weekdays
+
+        if self.freq == 'YEARLY' and self.by_month is None and date.month != start.month:
+            return False
+        if self.by_month_day is not None and not any(day_of_month_matches(date, day) for day in self.by_month_day):
+            return False
+        if self.by_day is not None:
+            # Ordinals are taken within the month, also for YEARLY rules
+            return any(weekday_matches(date, ordinal, weekday) for ordinal, weekday in self.by_day)
+        return self.by_month_day is not None or date.day == start.day
+
+    def period_matches(self, date, start):
+        """Whether date falls into a period selected by INTERVAL"""
+        if self.freq == 'DAILY':
+            periods = (date - start).days
+        elif self.freq == 'WEEKLY':
+            periods = ((date - datetime.timedelta(days=(date.weekday() - self.week_start) % 7))
+                       - (start - datetime.timedelta(days=(start.weekday() - self.week_start) % 7))).days // 7
+        elif self.freq == 'MONTHLY':
+            periods = (date.year - start.year) * 12 + date.month - start.month
+        else:
+            periods = date.year - start.year
+        return periods % self.interval == 0
+
+    def occurs_on(self, date, start):
+        """Whether a day-level rule has an occurrence on date (DTSTART always counts)"""
+        start_date = start.date()
+        if date < start_date:
+            return False
+        if date == start_date:
+            return True
+        return self.period_matches(date, start_date) and self.day_in_period(date, start_date)
+
+    def count_before(self, date, start):
+        """Occurrences of a day-level rule before date, stopping at COUNT (EXDATEs still count)"""
+        seen = 0
+        day = start.date()
+        while day < date and seen < self.count:
+            if self.occurs_on(day, start):
+                seen += 1
+            day += datetime.timedelta(days=1)
+        return seen
+
+
+class IcsEvent:
+    """A VEVENT reduced to what the clock needs"""
+
+    __slots__ = ('uid', 'summary', 'start', 'tz', 'rule', 'exdates')
+
+    def __init__(self, uid, summary, start, tz, rule=None, exdates=()):
+        self.uid = uid
+        self.summary = summary
+        self.start = start  # Naive wall-clock time in tz (None for floating times)
+        self.tz = tz
+        self.rule = rule
+        self.exdates = set(exdates)
+
+    def allowed(self, occurrence, index=None):
+        """Check EXDATE, UNTIL and COUNT for an occurrence (index counts from DTSTART)"""
+        if occurrence in self.exdates:
+            return False
+        rule = self.rule
+        if rule is not None:
+            if rule.until is not None and occurrence > rule.until:
+                return False
+            if rule.count is not None and index is not None and index >= rule.count:
+                return False
+        return True
+
+    def occurrences(self, date, time_range):
+        """Yield local seconds since midnight of every occurrence on date within time_range.
+
+        Only the window is expanded: day-level rules are checked for the few
+        event-local days that can map onto date, and sub-daily rules jump
+        straight to their first step inside each window segment.
+        """
+        rule = self.rule
+        if rule is not None and rule.freq in SUB_DAILY_STEPS:
+            yield from self.sub_daily_occurrences(date, time_range)
+            return
+
+        # With a time zone, an event-local day next to date can land on it
+        candidates = (date,) if self.tz is None else (date - datetime.timedelta(days=1), date,
+                                                      date + datetime.timedelta(days=1))
+        for candidate in candidates:
+            if rule is None:
+                if self.start.date() != candidate:
+                    continue
+                index = 0
+            else:
+                if not rule.occurs_on(candidate, self.start):
+                    continue
+                index = rule.count_before(candidate, self.start) if rule.count is not None else None
+            occurrence = datetime.datetime.combine(candidate, self.start.time())
+            if not self.allowed(occurrence, index):
+                continue
+            local = to_local(occurrence, self.tz)
+            seconds = time_to_seconds(local)
+            if local.date() == date and time_range.contains(seconds):
+                yield seconds
+
+    def sub_daily_occurrences(self, date, time_range):
+        rule = self.rule
+        step = SUB_DAILY_STEPS[rule.freq] * rule.interval
+        midnight = datetime.datetime.combine(date, datetime.time())
+        for segment_start, segment_end in window_segments(time_range):
+            # Window bounds in the event's zone, then the steps that fall inside
+            first = from_local(midnight + datetime.timedelta(seconds=segment_start), self.tz)
+            last = from_local(midnight + datetime.timedelta(seconds=segment_end), self.tz)
+            first_index = max(0, -(-int((first - self.start).total_seconds()) // step))
+            last_index = int((last - self.start).total_seconds()) // step
+            for index in range(first_index, last_index + 1):
+                occurrence = self.start + datetime.timedelta(seconds=index * step)
+                if not rule.date_filters_match(occurrence.date()) or not self.allowed(occurrence, index):
+                    continue
+                local = to_local(occurrence, self.tz)
+                if local.date() == date:
+                    yield time_to_seconds(local)
+
+
+def build_event(properties):
+    """Build an IcsEvent from a VEVENT's content lines.
+
+    Returns (event, recurrence_id), or None for events that are not tasks
+    (all-day or cancelled). Raises ValueError for malformed events.
+    """
+    values = {}
+    exdates = []
+    for line in properties:
+        parsed = parse_content_line(line)
+        if parsed is None:
+            continue
+        name, params, value = parsed
+        if name == 'EXDATE':
+            exdates.extend((item, params) for item in value.split(','))
+        elif name in ('UID', 'SUMMARY', 'DTSTART', 'RRULE', 'RECURRENCE-ID', 'STATUS'):
+            values[name] = (params, value)
+
+    if 'DTSTART' not in values:
+        raise ValueError("VEVENT without DTSTART")
+    if values.get('STATUS', ({}, ''))[1].strip().upper() == 'CANCELLED':
+        return None
+    start, tz = parse_date_time(values['DTSTART'][1], values['DTSTART'][0])
+    if start is None:
+        return None  # All-day events have no time on the bar
+
+    rule = IcsRule(values['RRULE'][1], tz) if 'RRULE' in values else None
+    event_exdates = []
+    for item, params in exdates:
+        exdate, exdate_tz = parse_date_time(item, params)
+        if exdate is not None:
+            event_exdates.append(convert(exdate, exdate_tz, tz) if tz is not None else exdate)
+
+    recurrence_id = None
+    if 'RECURRENCE-ID' in values:
+        recurrence_id, recurrence_tz = parse_date_time(values['RECURRENCE-ID'][1], values['RECURRENCE-ID'][0])
+        if recurrence_id is not None:
+            recurrence_id = (recurrence_id, recurrence_tz)
+
+    summary = unescape_text(values.get('SUMMARY', ({}, ''))[1]).strip()
+    uid = values.get('UID', ({}, ''))[1].strip()
+    return IcsEvent(uid, summary, start, tz, rule, event_exdates), recurrence_id
+
+
+def parse_calendar(lines):
+    """Parse the VEVENTs of a calendar one at a time; returns (events, invalid_count).
+
+    Modified instances (RECURRENCE-ID) are kept as single events and
+    excluded from their series. Nested components such as VALARM are skipped.
+    """
+    events = []
+    overrides = []
+    invalid_count = 0
+    properties = None
+    depth = 0
+    for line in lines:
+        upper = line[:16].upper()
+        if properties is None:
+            if upper.startswith('BEGIN:VEVENT'):
+                properties = []
+            continue
+        if upper.startswith('BEGIN:'):
+            depth += 1
+        elif upper.startswith('END:'):
+            if depth:
+                depth -= 1
+                continue
+            try:
+                built = build_event(properties)
+            except (ValueError, KeyError, IndexError, OverflowError):
+                invalid_count += 1
+                built = None
+            if built is not None:
+                event, recurrence_id = built
+                events.append(event)
+                if recurrence_id is not None:
+                    overrides.append((event.uid, recurrence_id))
+            properties = None
+        elif not depth:
+            properties.append(line)
+
+    series = {event.uid: event for event in events if event.rule is not None}
+    for uid, (recurrence_id, recurrence_tz) in overrides:
+        master = series.get(uid)
+        if master is not None:
+            master.exdates.add(convert(recurrence_id, recurrence_tz, master.tz)
+                               if master.tz is not None else recurrence_id)
+    return events, invalid_count
+
+
+def expand_events(events, date, time_range):
+    """(seconds, name) of every occurrence on date within time_range; None for events that fail"""
+    occurrences = []
+    for event in events:
+        try:
+            times = sorted(set(event.occurrences(date, time_range)))
+        except (ValueError, OverflowError):
+            occurrences.append(None)
+            continue
+        occurrences.extend((seconds, event.summary) for seconds in times)
+    return occurrences
+
+
+class CalendarCache:
+    """Parsed calendars keyed by a hash of the file contents (LRU, shared by import threads).
+
+    Each entry also keeps the expansions of its last few windows, so
+    importing the same calendar for the same range again does no work
+    beyond hashing the file.
+    """
+
+    max_expansions = 4
+
+    def __init__(self, max_entries=4):
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def get(self, digest):
+        with self.lock:
+            calendar = self.entries.get(digest)
+            if calendar is not None:
+                self.entries.move_to_end(digest)
+            return calendar
+
+    def put(self, digest, calendar):
+        with self.lock:
+            self.entries[digest] = calendar
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def expand(self, calendar, date, time_range):
+        """Cached expand_events() for a calendar returned by get() or passed to put()"""
+        events, _, expansions = calendar
+        key = (date, time_range)
+        with self.lock:
+            occurrences = expansions.get(key)
+        if occurrences is None:
+            occurrences = expand_events(events, date, time_range)
+            with self.lock:
+                expansions[key] = occurrences
+                while len(expansions) > self.max_expansions:
+                    del expansions[next(iter(expansions))]
+        return occurrences
+
+
+CALENDAR_CACHE = CalendarCache()
+
+
+def file_digest(file, chunk_size):
+    digest = hashlib.blake2b(digest_size=20)
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return digest.digest()
+        digest.update(chunk)
+
+
+def iter_ics_records(file, date=None, time_range=None, chunk_size=1024 * 1024):
+    """Yield task records for a calendar's occurrences on date within time_range.
+
+    file is a seekable binary file object; date defaults to today and
+    time_range to the whole day. Parsed calendars and their expansions are
+    cached by a hash of the file, so importing an unchanged calendar again
+    only hashes it. Malformed or unsupported events yield None.
+    """
+    if date is None:
+        date = datetime.date.today()
+    if time_range is None:
+        time_range = TimeRange(0, SECONDS_PER_DAY - 1, SECONDS_PER_DAY - 1, False)
+
+    digest = file_digest(file, chunk_size)
+    calendar = CALENDAR_CACHE.get(digest)
+    if calendar is None:
+        file.seek(0)
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', errors='replace', newline='')
+        events, invalid_count = parse_calendar(unfold_lines(text))
+        # Hand the file back to the caller instead of closing it with the wrapper
+        text.detach()
+        calendar = (events, invalid_count, {})
+        CALENDAR_CACHE.put(digest, calendar)
+
+    for _ in range(calendar[1]):
+        yield None
+    for occurrence in CALENDAR_CACHE.expand(calendar, date, time_range):
+        if occurrence is None:
+            yield None
+        else:
+            yield {'name': occurrence[1], 'time': seconds_to_time(occurrence[0]).isoformat()}
@@ -0,0 +1,97 @@
+import json
+import threading
+
+from PySide6 import QtCore
+
+from task_import import RECORD_READERS, TaskRecordParser
+
+
+class ImportSignals(QtCore.QObject):
+    # List of (name, time_obj, task_id or None) rows ready to be added as tasks
+    batch = QtCore.Signal(object)
+    # Bytes read so far, total size
+    progress = QtCore.Signal(object, object)
+    # Skipped count, cancelled, error kind ('' / 'json' / 'other'), error message
+    finished = QtCore.Signal(int, bool, str, str)
+
+
+class ImportWorker(QtCore.QRunnable):
+    """Parses an import source on a QThreadPool thread.
+
+    Parsed tasks are emitted in batches through queued signals, so the GUI
+    thread only has to add each batch to the model. At most max_in_flight
+    batches wait for the GUI at any time, which keeps memory bounded when
+    parsing is faster than insertion.
+    """
+
+    def __init__(self, open_source, size, import_format='json', batch_size=1000, max_in_flight=4, reader_options=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        # Called on the worker thread; returns a binary file object
+        self.open_source = open_source
+        self.size = max(1, size)
+        self.read_records = RECORD_READERS[import_format]
+        # Extra keyword arguments for the reader (the date and range a calendar is expanded for)
+        self.reader_options = reader_options or {}
+        self.batch_size = batch_size
+        self.signals = ImportSignals()
+        self.cancel_event = threading.Event()
+        self.in_flight = threading.Semaphore(max_in_flight)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def batch_done(self):
+        """Called by the GUI thread once it has added a batch"""
+        self.in_flight.release()
+
+    def emit_batch(self, batch):
+        """Hand a batch to the GUI thread, waiting while too many are still queued"""
+        while not self.in_flight.acquire(timeout=0.1):
+            if self.is_cancelled():
+                return False
+        self.signals.batch.emit(batch)
+        return True
+
+    def run(self):
+        parser = TaskRecordParser()
+        skipped_count = 0
+        batch = []
+        error_kind = ''
+        error_message = ''
+
+        try:
+            with self.open_source() as file:
+                # Malformed NDJSON/CSV lines arrive as None and are counted as skipped
+                for task_data in self.read_records(file, **self.reader_options):
+                    if self.is_cancelled():
+                        break
+
+                    parsed = parser.parse(task_data)
+                    if parsed is None:
+                        skipped_count += 1
+                        continue
+
+                    # The id carried by exported files lets merge imports recognise updated rows
+                    task_id = task_data.get('id')
+                    batch.append((parsed[0], parsed[1], str(task_id) if task_id is not None else None))
+                    if len(batch) >= self.batch_size:
+                        if not self.emit_batch(batch):
+                            break
+                        batch = []
+                        self.signals.progress.emit(min(file.tell(), self.size), self.size)
+        except json.JSONDecodeError as e:
+            error_kind = 'json'
+            error_message = str(e)
+        except Exception as e:
+            error_kind = 'other'
+            error_message = str(e)
+
+        # Tasks read before an error are kept; a cancel drops the unfinished batch
+        if batch and not self.is_cancelled():
+            self.emit_batch(batch)
+
+        self.signals.finished.emit(skipped_count, self.is_cancelled(), error_kind, error_message)
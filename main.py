@@ -1,19 +1,63 @@
+import time
+# Reference point for the time-to-first-paint measurement
+STARTUP_NS = time.perf_counter_ns()
+
+import io
+import os
 import sys
+import bisect
+import math
 import datetime
-import json
+from array import array
 from PySide6 import QtCore, QtGui, QtWidgets
-import uuid
 
-from screen_dialog import SettingsDialog
-from task_dialog import TaskDialog
+# Only what the first frame needs is imported here. Dialogs, storage
+# backends and the import/export code are imported on first use.
+from perf_stats import STATS, timed
+from persistence import PersistenceWorker
+from recurrence import RecurrenceSchedule, is_occurrence_id
+from task_index import TaskIndex
+from task_store import ColumnarTaskStore, TaskStore
+from time_range import SECONDS_PER_DAY, TimeRange, seconds_to_time, time_to_seconds
 
 class AnimatedToggleClockBar(QtWidgets.QWidget):
+    # Startup finishes after this long even if the first frame is never painted
+    startup_fallback_ms = 2000
+    # Longest single wait of the notification timer before it re-checks the wall clock
+    max_notification_delay_ms = 60 * 1000
+    # Longest single wait of the clock timer, even when nothing visible changes
+    max_clock_tick_ms = 60 * 1000
+    # Number of imported tasks added, indexed and saved together
+    import_batch_size = 1000
+    # Colors of the marker density strip, from a single task (red) to the fullest pixel (yellow)
+    marker_density_levels = 8
+    # Tasks listed in the hover tooltip before the rest are summarized
+    max_tooltip_tasks = 20
+    # File dialog filter for the import and sync dialogs
+    import_file_filter = ("Task Files (*.json *.ndjson *.jsonl *.csv *.ics *.ical);;JSON Files (*.json);;"
+                          "NDJSON Files (*.ndjson *.jsonl);;CSV Files (*.csv);;iCalendar Files (*.ics *.ical);;All Files (*)")
+
     def __init__(self):
         super().__init__()
 
         # Initialize QSettings
         self.settings = QtCore.QSettings("LinearClock", "LinearClock")
         
+        # Task storage, saving, the task load and the tray are set up right after
+        # the first frame (see finish_startup), so the bar appears immediately
+        self.task_storage = None
+        self.persistence = None
+        self.tray_icon = None
+        self.command_server = None
+        self.first_frame_painted = False
+        self.startup_done = False
+        
+        # Single-shot timer armed for the exact time of the next task notification
+        self.notification_timer = QtCore.QTimer(self)
+        self.notification_timer.setSingleShot(True)
+        self.notification_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.notification_timer.timeout.connect(self.handle_notification_timer)
+        
         # Load settings or use defaults
         self.load_settings()
         
@@ -51,34 +95,138 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         
         # Task management
         self.hover_task_id = None  # Track which task is being hovered over
+        self.hover_task_ids = []  # All tasks within click tolerance of the cursor, nearest first
+        
+        # Pixel positions of the task markers, rebuilt when the bar or the task index changes
+        self.marker_cache_key = None
+        self.marker_pixels = []
+        self.marker_ids = []
+        # Occupied pixel buckets: pixel and end index into marker_ids (each bucket starts where the previous ended)
+        self.marker_bucket_pixels = []
+        self.marker_bucket_ends = []
+        
         self.tooltip_timer = QtCore.QTimer()
         self.tooltip_timer.setSingleShot(True)
         self.tooltip_timer.timeout.connect(self.show_task_tooltip)
         
+        # Background import/export state
+        self.import_worker = None
+        self.export_worker = None
+        self.import_merge_index = None
+        self.import_imported_count = 0
+        self.import_updated_count = 0
+        self.import_unchanged_count = 0
+        self.import_progress = 0
+        
         # Click handling
         self.click_timer = QtCore.QTimer()
         self.click_timer.setSingleShot(True)
         self.click_timer.timeout.connect(self.handle_single_click)
         self.pending_click_pos = None
 
+        # Cached pixmaps of the static paint layers: name -> (inputs, pixmap)
+        self.layer_cache = {}
+        self.clock_font = QtGui.QFont("Arial", 12, QtGui.QFont.Bold)
+        self.drag_font = QtGui.QFont("Arial", 10, QtGui.QFont.Bold)
+        
+        # State of the last paint, used to repaint only the damaged region each tick
+        self.painted_state = None
+        self.painted_fill = 0
+
         # Animation setup
         self.animation = QtCore.QPropertyAnimation(self, b"geometry")
         self.animation.setDuration(250)  # 250 ms animation
         self.animation.setEasingCurve(QtCore.QEasingCurve.InOutQuad)
 
+        # Single-shot clock timer, re-armed for the next visible change of the bar
         self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.update_clock)
-        self.timer.start(1000)
-
-        self.create_tray_icon()
+        self.schedule_clock_tick()
 
+        # No input until the tasks are loaded
+        self.setEnabled(False)
         self.show()
+        # Finish starting up even if the bar is never exposed (locked or disconnected screen)
+        QtCore.QTimer.singleShot(self.startup_fallback_ms, self.finish_startup)
 
-    def update_clock(self):
-        """Update the clock and check for task notifications"""
-        now = datetime.datetime.now()
-        current_time = now.time()
+    def finish_startup(self):
+        """Second half of the startup, run right after the first frame is painted"""
+        if self.startup_done:
+            return
+        
+        # Tasks live in a SQLite database (or a journal), settings stay in QSettings
+        self.task_storage = self.open_task_storage()
         
+        # Saves run on a background thread; bursts within the debounce window are coalesced
+        self.persistence = PersistenceWorker(
+            self.task_storage,
+            lambda: QtCore.QSettings("LinearClock", "LinearClock"),
+            self.settings.value("save_debounce_ms", 500, type=int)
+        )
+        # Write everything still pending before the application exits
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.persistence.close)
+        # A running import would otherwise wait forever for the stopped event loop to take its batches
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.cancel_import)
+        
+        # Recurring tasks are stored once, as rules in the settings
+        self.recurrence.load(self.settings.value("recurrence_rules", "", type=str))
+        self.load_tasks()
+        self.create_tray_icon()
+        
+        # Scripts reach the running instance through a local socket (see run_client)
+        self.command_server = self.start_command_server()
+        
+        self.setEnabled(True)
+        self.startup_done = True
+        STATS.histogram("startup_ready").record(time.perf_counter_ns() - STARTUP_NS)
+        self.update()
+
+    def start_command_server(self):
+        """Listen for command-line clients; returns None if another instance already does"""
+        from command_server import CommandServer
+        
+        server = CommandServer(self.handle_command, self)
+        if not server.listen():
+            return None
+        QtWidgets.QApplication.instance().aboutToQuit.connect(server.close)
+        return server
+
+    def handle_command(self, request):
+        """Run one request from a command-line client and return its response"""
+        from task_import import TaskRecordParser
+        
+        command = request.get("command")
+        if command == "add":
+            records = request.get("tasks")
+            if not isinstance(records, list):
+                return {"ok": False, "error": "'tasks' must be a list"}
+            
+            # Records are parsed like imported ones, and the whole batch is indexed and saved at once
+            parser = TaskRecordParser()
+            parsed_tasks = []
+            for record in records:
+                parsed = parser.parse(record)
+                if parsed is not None:
+                    parsed_tasks.append((parsed[0], parsed[1], None))
+            added_count = self.add_imported_tasks(parsed_tasks)
+            return {"ok": True, "added": added_count, "skipped": len(records) - added_count}
+        
+        if command == "window":
+            # Command-line imports expand calendars for the same window as the import dialog
+            return {"ok": True, "date": datetime.date.today().isoformat(),
+                    "time_range": list(self.calendar_time_range())}
+        
+        if command == "list":
+            tasks = sorted(self.tasks.values(), key=lambda task: task.seconds)
+            return {"ok": True, "tasks": [{"id": self.tasks.external_id(task.id), "time": task.time.isoformat(),
+                                           "name": task.name} for task in tasks]}
+        
+        return {"ok": False, "error": f"Unknown command: {command!r}"}
+
+    @timed("update_clock")
+    def update_clock(self):
+        """Update the clock (task notifications are driven by notification_timer)"""
         # Check if focused task time has been reached
         if self.is_focused and self.focused_task_time:
             time_info = self.get_time_range_info()
@@ -86,52 +234,181 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             if time_info['progress'] >= 0.99:  # Close to end of range
                 self.exit_focus_mode()
         
-        # Check for task notifications
-        self.check_task_notifications(current_time)
-        
         # Update tray icon tooltip
         self.update_tray_tooltip()
         
-        # Update the widget
-        self.update()
+        # Repaint only what changed since the last paint
+        self.update_clock_region()
+        
+        # Sleep until the next visible change
+        self.schedule_clock_tick()
+
+    def schedule_clock_tick(self):
+        """Arm the clock timer for the next moment something visible changes"""
+        now = datetime.datetime.now()
+        rect = self.rect()
+        
+        if self.is_expanded(rect) or self.underMouse():
+            # The HH:MM:SS label changes every second
+            delay_seconds = 1
+        else:
+            delay_seconds = self.get_seconds_until_next_change(time_to_seconds(now), rect)
+        
+        # Wake up right after the second boundary the change happens at, and cap
+        # long waits so the clock re-synchronizes after sleep or wall-clock changes
+        delay_ms = delay_seconds * 1000 - now.microsecond // 1000
+        self.timer.start(max(1, min(delay_ms, self.max_clock_tick_ms)))
+
+    def get_seconds_until_next_change(self, current_seconds, rect):
+        """Whole seconds until the fill edge moves a pixel, the bar color changes or focus mode ends"""
+        time_range = self.time_range
+        total = time_range.total_duration
+        
+        if not time_range.contains(current_seconds) or total <= 0:
+            # The bar is gray and static until the range starts again, except that a
+            # same-day range drops from full to empty at midnight
+            until_start = (time_range.start_seconds - current_seconds) % SECONDS_PER_DAY or SECONDS_PER_DAY
+            if not time_range.wraps and current_seconds > time_range.end_seconds:
+                return min(until_start, SECONDS_PER_DAY - current_seconds)
+            return until_start
+        
+        elapsed = time_range.elapsed(current_seconds)
+        
+        # The bar turns gray one second after the range ends
+        candidates = [total - elapsed + 1]
+        
+        # Smallest elapsed value that moves the fill edge by at least one pixel
+        length = rect.width() if self.bar_position in ["top", "bottom"] else rect.height()
+        fill = int(length * (elapsed / total))
+        if fill < length:
+            target = max(elapsed + 1, -(-(fill + 1) * total // length))
+            while int(length * (target / total)) <= fill:
+                target += 1
+            candidates.append(target - elapsed)
+        
+        # Focus mode ends close to the end of the focused range
+        if self.is_focused and self.focused_task_time:
+            focus_end = -(-99 * total // 100)
+            if focus_end > elapsed:
+                candidates.append(focus_end - elapsed)
+        
+        return min(candidates)
+
+    def update_clock_region(self):
+        """Schedule a repaint of the fill edge and clock text that changed since the last paint"""
+        rect = self.rect()
+        time_info = self.get_time_range_info()
+        
+        # Size, orientation or bar color changes affect the whole bar
+        state = (rect.width(), rect.height(), self.bar_position, time_info['is_in_range'])
+        if state != self.painted_state:
+            self.update()
+            return
+        
+        dirty = QtGui.QRegion()
+        
+        # Pixel columns (or rows) between the old and the new fill edge, plus
+        # one pixel on each side for the edge itself
+        fill = self.get_fill_length(rect, time_info['progress'])
+        if fill != self.painted_fill:
+            low, high = sorted((self.painted_fill, fill))
+            if self.bar_position in ["top", "bottom"]:
+                dirty += QtCore.QRect(low - 1, 0, high - low + 2, rect.height())
+            elif self.bar_position == "left":
+                dirty += QtCore.QRect(0, low - 1, rect.width(), high - low + 2)
+            else:  # right, filled from the bottom
+                dirty += QtCore.QRect(0, rect.height() - high - 1, rect.width(), high - low + 2)
+        
+        # The clock text changes every second while the bar is expanded
+        if self.is_expanded(rect):
+            dirty += self.get_clock_text_rect(rect)
+        
+        if not dirty.isEmpty():
+            self.update(dirty)
+
+    def get_fill_length(self, rect, progress):
+        """Length in pixels of the progress fill along the bar"""
+        if self.bar_position in ["top", "bottom"]:
+            return int(rect.width() * progress)
+        return int(rect.height() * progress)
+
+    def is_expanded(self, rect):
+        """Check if the bar is wide enough to show the clock text"""
+        if self.bar_position in ["top", "bottom"]:
+            return rect.height() >= self.full_height
+        return rect.width() >= self.full_height
+
+    def get_clock_text_rect(self, rect):
+        """Bounding box of the centered clock text, with a small margin"""
+        metrics = QtGui.QFontMetrics(self.clock_font)
+        text_width = metrics.horizontalAdvance("00:00:00") + 8
+        text_height = metrics.height() + 4
+        
+        # Vertical bars draw the text rotated by 90 degrees
+        if self.bar_position not in ["top", "bottom"]:
+            text_width, text_height = text_height, text_width
+        
+        text_rect = QtCore.QRect(0, 0, text_width, text_height)
+        text_rect.moveCenter(rect.center())
+        return text_rect
 
     def update_tray_tooltip(self):
         """Update the tray icon tooltip with current status"""
         if hasattr(self, 'tray_icon') and self.tray_icon:
             tooltip_text = "Linear Clock"
             if self.is_focused and self.focused_task_id in self.tasks:
-                task_name = self.tasks[self.focused_task_id]['name']
+                task_name = self.tasks[self.focused_task_id].name
                 task_time = self.focused_task_time.strftime("%H:%M:%S")
                 tooltip_text += f" (Focused: {task_name} at {task_time})"
+            if self.import_worker is not None:
+                processed_count = self.import_imported_count + self.import_updated_count + self.import_unchanged_count
+                tooltip_text += f" (Importing: {processed_count} tasks, {self.import_progress}%)"
             
             self.tray_icon.setToolTip(tooltip_text)
 
     def check_task_notifications(self, current_time):
         """Check if any tasks should trigger notifications"""
         # Only check for notifications if current time is within the configured range
-        if not self.is_time_in_range(current_time):
+        current_offset = self.get_task_offset(current_time)
+        if current_offset is None:
             return
-            
-        current_progress = self.get_time_range_info()['progress']
-            
-        for task_id, task_data in self.tasks.items():
+
+        # The index only holds tasks within the range, sorted by offset, so
+        # this only looks at the tasks between the last check and now
+        for task_id in self.task_index.advance(current_offset):
             if task_id not in self.notified_tasks:
-                task_time = task_data['time']
-                
-                # Only notify for tasks within the configured time range
-                if not self.is_time_in_range(task_time):
-                    continue
-                
-                task_progress = self.time_to_progress(task_time)
-                
-                # Check if current progress has reached or passed the task progress
-                # Use a small tolerance to handle timer resolution (equivalent to ~1 second)
-                time_info = self.get_time_range_info()
-                tolerance = 1.0 / time_info['total_duration'] if time_info['total_duration'] > 0 else 0.001
-                
-                if abs(current_progress - task_progress) <= tolerance:
-                    self.show_task_notification(task_data['name'], task_time)
-                    self.notified_tasks.add(task_id)
+                task = self.get_task(task_id)
+                self.show_task_notification(task.name, task.time)
+                self.notified_tasks.add(task_id)
+
+    def handle_notification_timer(self):
+        """Notify the tasks that are due now and arm the timer for the next one"""
+        self.check_task_notifications(datetime.datetime.now().time())
+        self.schedule_next_notification()
+
+    def schedule_next_notification(self):
+        """Arm notification_timer for the wall-clock time of the next pending task"""
+        self.notification_timer.stop()
+        
+        now = datetime.datetime.now()
+        current_offset = self.get_task_offset(now.time())
+        
+        delay_seconds = None
+        if current_offset is not None:
+            for offset, task_id in self.task_index.pending():
+                if task_id not in self.notified_tasks:
+                    delay_seconds = offset - current_offset
+                    break
+        
+        if delay_seconds is None:
+            # Nothing left in this cycle: wake up when the range starts again
+            delay_seconds = (self.time_range.start_seconds - time_to_seconds(now)) % SECONDS_PER_DAY or SECONDS_PER_DAY
+        
+        # Tasks are due at the start of their second, and long waits are capped
+        # so the timer re-synchronizes after sleep or wall-clock changes
+        delay_ms = delay_seconds * 1000 - now.microsecond // 1000
+        delay_ms = max(0, min(delay_ms, self.max_notification_delay_ms))
+        self.notification_timer.start(delay_ms)
 
     def show_task_notification(self, task_name, task_time):
         """Show a system tray notification for a task"""
@@ -160,6 +437,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             # Fallback to default times if parsing fails
             self.start_time = datetime.time(0, 0, 0)
             self.end_time = datetime.time(23, 59, 59)
+        self.update_time_range()
         
         # Focus feature variables
         self.is_focused = False
@@ -179,69 +457,185 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         self.drag_preview_time = None
         
         # Initialize tasks for today
-        self.tasks = {}  # Dictionary: task_id -> {'time': time_obj, 'name': str}
+        # "objects" (default) or "columnar" (parallel arrays and integer ids, for very large days)
+        self.task_model = self.settings.value("task_model", "objects", type=str)
+        if self.task_model == "columnar":
+            self.tasks = ColumnarTaskStore()
+            self.task_index = TaskIndex(compact=True)
+        else:
+            self.tasks = TaskStore()  # task_id -> Task (time in seconds since midnight, name)
+            self.task_index = TaskIndex()  # In-range tasks sorted by offset, for notifications
         self.notified_tasks = set()  # Track tasks that have already been notified
-        self.load_tasks()
+        self.recurrence = RecurrenceSchedule()  # Recurring tasks, expanded into the task index per day and range
+
+    def open_task_storage(self):
+        """Open the configured task storage, migrating tasks saved in QSettings on first run"""
+        from task_journal import JournalTaskStorage
+        from task_storage import TaskStorage
+        
+        data_dir = QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.AppLocalDataLocation)
+        os.makedirs(data_dir, exist_ok=True)
+        
+        # "sqlite" (default) or "journal" (append-only log with background compaction)
+        backend = self.settings.value("task_storage", "sqlite", type=str)
+        if backend == "journal":
+            storage = JournalTaskStorage(os.path.join(data_dir, "journal"))
+        else:
+            storage = TaskStorage(os.path.join(data_dir, "tasks.sqlite3"))
+        if not storage.get_meta("qsettings_migrated"):
+            self.migrate_settings_tasks(storage)
+        return storage
+
+    def migrate_settings_tasks(self, storage):
+        """Copy the tasks_<date> arrays written by older versions into the task storage"""
+        groups = [group for group in self.settings.childGroups() if group.startswith("tasks_")]
+        
+        for group in groups:
+            rows = []
+            size = self.settings.beginReadArray(group)
+            for i in range(size):
+                self.settings.setArrayIndex(i)
+                task_id = self.settings.value("id", type=str)
+                time_str = self.settings.value("time", type=str)
+                name = self.settings.value("name", type=str)
+                
+                if task_id and time_str and name:
+                    rows.append((task_id, time_str, name))
+            self.settings.endArray()
+            
+            storage.upsert_many(group[len("tasks_"):], rows)
+        
+        storage.set_meta("qsettings_migrated", "1")
+        
+        # Drop the migrated arrays only once everything is safely in the database
+        for group in groups:
+            self.settings.remove(group)
+        self.settings.sync()
 
     def load_tasks(self):
-        """Load tasks for today from QSettings"""
+        """Load tasks for today from the task storage"""
         today = datetime.date.today().isoformat()
         
         # Reset notified tasks when loading (e.g., new day or app restart)
         self.notified_tasks.clear()
         
-        size = self.settings.beginReadArray(f"tasks_{today}")
-        for i in range(size):
-            self.settings.setArrayIndex(i)
-            task_id = self.settings.value("id", type=str)
-            time_str = self.settings.value("time", type=str)
-            name = self.settings.value("name", type=str)
-            
+        # Make sure queued saves are in the storage before reading it back
+        self.persistence.flush()
+        
+        rows = []
+        for task_id, time_str, name in self.task_storage.load_day(today):
             if task_id and time_str and name:
                 try:
                     time_obj = datetime.time.fromisoformat(time_str)
-                    self.tasks[task_id] = {'time': time_obj, 'name': name}
-                    
-                    # Check if task time has already passed within the configured time range
-                    if self.is_time_in_range(time_obj):
-                        now = datetime.datetime.now().time()
-                        if self.is_time_in_range(now):
-                            # Both task and current time are in range, compare progress
-                            current_progress = self.get_time_range_info()['progress']
-                            task_progress = self.time_to_progress(time_obj)
-                            
-                            # If current progress has passed task progress, mark as notified
-                            if current_progress > task_progress:
-                                self.notified_tasks.add(task_id)
-                        
+                    rows.append((task_id, time_to_seconds(time_obj), name))
                 except ValueError:
                     pass  # Skip invalid time formats
+        self.tasks.clear()
+        self.tasks.load(rows)
+        
+        # Index tasks and mark the ones that have already passed as notified
+        self.rebuild_task_index()
+
+    def get_task_offset(self, time_obj):
+        """Seconds from the range start to time_obj, or None if it is outside the configured range"""
+        return self.time_range.offset(time_to_seconds(time_obj))
+
+    def rebuild_task_index(self):
+        """Rebuild the task index after the task set or the time range changed"""
+        task_ids, seconds = self.tasks.columns()
+        offsets = self.time_range.offsets_many(seconds)
+        entries = [(offset, task_id) for offset, task_id in zip(offsets, task_ids) if offset is not None]
+        
+        # Recurring tasks only exist as index entries, expanded for today's range
+        occurrences = self.recurrence.expand(datetime.date.today(), self.time_range)
+        offsets = self.time_range.offsets_many([seconds for seconds, _ in occurrences])
+        entries.extend((offset, occurrence_id) for offset, (_, occurrence_id) in zip(offsets, occurrences)
+                       if offset is not None)
+        
+        # Tasks before the current time are treated as already passed
+        current_offset = self.get_task_offset(datetime.datetime.now().time())
+        self.task_index.rebuild(entries, -1 if current_offset is None else current_offset - 1)
+        
+        if current_offset is not None:
+            self.notified_tasks.update(self.task_index.passed())
+        
+        self.schedule_next_notification()
+
+    def get_task(self, task_id):
+        """A task or a read-only recurring occurrence by id, or None"""
+        if is_occurrence_id(task_id):
+            return self.recurrence.occurrence(task_id)
+        return self.tasks.get(task_id)
+
+    def index_task(self, task_id):
+        """Add or move a single task in the task index"""
+        offset = self.time_range.offset(self.tasks[task_id].seconds)
+        if offset is None:
+            self.task_index.remove(task_id)
+        else:
+            self.task_index.insert(task_id, offset)
+            
+            # Mark as notified if the task time has already passed within the configured range
+            current_offset = self.get_task_offset(datetime.datetime.now().time())
+            if current_offset is not None and current_offset > offset:
+                self.notified_tasks.add(task_id)
+        
+        self.schedule_next_notification()
+
+    def index_tasks(self, task_ids):
+        """Add or move a batch of tasks in the task index (used by the importers)"""
+        entries = []
+        for task_id in task_ids:
+            offset = self.time_range.offset(self.tasks[task_id].seconds)
+            if offset is None:
+                self.task_index.remove(task_id)
+            else:
+                entries.append((offset, task_id))
         
-        self.settings.endArray()
-
-    def save_tasks(self):
-        """Save current tasks to QSettings"""
-        today = datetime.date.today().isoformat()
-        self.settings.beginWriteArray(f"tasks_{today}")
+        self.task_index.insert_many(entries)
         
-        for i, (task_id, task_data) in enumerate(self.tasks.items()):
-            self.settings.setArrayIndex(i)
-            self.settings.setValue("id", task_id)
-            self.settings.setValue("time", task_data['time'].isoformat())
-            self.settings.setValue("name", task_data['name'])
+        # Mark as notified if the task time has already passed within the configured range
+        current_offset = self.get_task_offset(datetime.datetime.now().time())
+        if current_offset is not None:
+            self.notified_tasks.update(task_id for offset, task_id in entries if current_offset > offset)
         
-        self.settings.endArray()
-        self.settings.sync()
+        self.schedule_next_notification()
+
+    def unindex_task(self, task_id):
+        """Remove a deleted task from the task index and the notified set"""
+        self.task_index.remove(task_id)
+        self.notified_tasks.discard(task_id)
+        self.schedule_next_notification()
+
+    def save_task(self, task_id):
+        """Queue a single added or changed task for saving"""
+        self.save_tasks([task_id])
+
+    def save_tasks(self, task_ids=None):
+        """Queue several tasks (all current tasks by default) to be saved in one batch"""
+        if task_ids is None:
+            task_ids = list(self.tasks)
+        
+        rows = []
+        for task_id in task_ids:
+            task = self.tasks[task_id]
+            rows.append((self.tasks.external_id(task_id), task.time.isoformat(), task.name))
+        self.persistence.put_tasks(datetime.date.today().isoformat(), rows)
+
+    def delete_saved_task(self, task_id):
+        """Queue a deleted task for removal from the task storage"""
+        self.persistence.delete_tasks([self.tasks.external_id(task_id)])
 
     def save_settings(self):
-        """Save current settings to QSettings"""
-        self.settings.setValue("screen_index", self.screen_index)
-        self.settings.setValue("bar_position", self.bar_position)
-        self.settings.setValue("start_time", self.start_time.isoformat())
-        self.settings.setValue("end_time", self.end_time.isoformat())
-        self.settings.setValue("task_dragging_enabled", self.task_dragging_enabled)
-        self.settings.setValue("drag_snap_seconds", self.drag_snap_seconds)
-        self.settings.sync()  # Ensure settings are written to disk
+        """Queue current settings to be written to QSettings"""
+        self.persistence.put_settings({
+            "screen_index": self.screen_index,
+            "bar_position": self.bar_position,
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat(),
+            "task_dragging_enabled": self.task_dragging_enabled,
+            "drag_snap_seconds": self.drag_snap_seconds,
+        })
 
     def create_tray_icon(self):
         self.tray_icon = QtWidgets.QSystemTrayIcon(self)
@@ -260,15 +654,28 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         settings_action.triggered.connect(self.open_settings)
         
         # Add import/export actions
-        import_action = menu.addAction("Import Tasks from JSON...")
+        import_action = menu.addAction("Import Tasks...")
         import_action.triggered.connect(self.import_json_file_dialog)
         
         paste_action = menu.addAction("Paste JSON from Clipboard")
         paste_action.triggered.connect(self.paste_json_from_clipboard)
         
-        export_action = menu.addAction("Export Tasks to JSON...")
+        sync_action = menu.addAction("Sync Tasks from File...")
+        sync_action.triggered.connect(self.sync_json_file_dialog)
+        
+        export_action = menu.addAction("Export Tasks...")
         export_action.triggered.connect(self.export_json_file_dialog)
         
+        self.cancel_import_action = menu.addAction("Cancel Import")
+        self.cancel_import_action.triggered.connect(self.cancel_import)
+        self.update_import_actions()
+        
+        recurring_action = menu.addAction("Recurring Tasks...")
+        recurring_action.triggered.connect(self.open_recurring_tasks)
+        
+        perf_action = menu.addAction("Performance stats...")
+        perf_action.triggered.connect(self.open_performance_stats)
+        
         menu.addSeparator()
         
         # Add focus mode actions to tray menu
@@ -290,6 +697,9 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         )
 
     def enterEvent(self, event):
+        # The expanded bar shows seconds, so switch to per-second ticks right away
+        self.schedule_clock_tick()
+        
         # Animate to full height based on current position
         target_rect = self.get_full_geometry()
         self.animation.stop()
@@ -313,6 +723,8 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
 
     def mouseDoubleClickEvent(self, event):
         """Handle double-click to create new task"""
+        from task_dialog import TaskDialog
+        
         if event.button() == QtCore.Qt.LeftButton:
             # Cancel any pending single click
             self.click_timer.stop()
@@ -326,22 +738,11 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             if dialog.exec() == QtWidgets.QDialog.Accepted:
                 time_obj, task_name, _ = dialog.get_task_data()
                 if task_name:  # Only add if name is not empty
-                    task_id = str(uuid.uuid4())
-                    self.tasks[task_id] = {'time': time_obj, 'name': task_name}
-                    
-                    # Check if task time has already passed within the configured time range
-                    if self.is_time_in_range(time_obj):
-                        now = datetime.datetime.now().time()
-                        if self.is_time_in_range(now):
-                            # Both task and current time are in range, compare progress
-                            current_progress = self.get_time_range_info()['progress']
-                            task_progress = self.time_to_progress(time_obj)
-                            
-                            # If current progress has passed task progress, mark as notified
-                            if current_progress > task_progress:
-                                self.notified_tasks.add(task_id)
+                    task_id = self.tasks.new_id()
+                    self.tasks.add(task_id, time_to_seconds(time_obj), task_name)
+                    self.index_task(task_id)
                     
-                    self.save_tasks()
+                    self.save_task(task_id)
                     self.update()
         
         super().mouseDoubleClickEvent(event)
@@ -355,7 +756,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             # Check if we're clicking on a task for potential dragging
             if self.task_dragging_enabled:
                 task_id = self.get_task_at_position(event.position())
-                if task_id:
+                if task_id in self.tasks:
                     self.drag_start_pos = event.position()
                     self.dragging_task_id = task_id
                     # Don't start click timer if we might be dragging
@@ -375,31 +776,28 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             # Handle task drop
             if self.dragging_task_id and self.drag_preview_time:
                 # Update task time to the new position
-                self.tasks[self.dragging_task_id]['time'] = self.drag_preview_time
+                self.tasks.move(self.dragging_task_id, time_to_seconds(self.drag_preview_time))
                 
                 # Reset notification state for the moved task
                 self.notified_tasks.discard(self.dragging_task_id)
                 
-                # Check if new task time has already passed
-                if self.is_time_in_range(self.drag_preview_time):
-                    now = datetime.datetime.now().time()
-                    if self.is_time_in_range(now):
-                        current_progress = self.get_time_range_info()['progress']
-                        task_progress = self.time_to_progress(self.drag_preview_time)
-                        
-                        if current_progress > task_progress:
-                            self.notified_tasks.add(self.dragging_task_id)
-                
                 # Update focused task time if this is the focused task
                 if self.is_focused and self.focused_task_id == self.dragging_task_id:
                     self.focused_task_time = self.drag_preview_time
                     self.end_time = self.drag_preview_time
+                    self.update_time_range()
+                    # The range itself changed, so every offset has to be recomputed
+                    self.rebuild_task_index()
+                    self.schedule_clock_tick()
+                else:
+                    # Move the task in the index and check if its new time has already passed
+                    self.index_task(self.dragging_task_id)
                 
                 # Save and update
-                self.save_tasks()
+                self.save_task(self.dragging_task_id)
                 
                 # Show notification about the move
-                task_name = self.tasks[self.dragging_task_id]['name']
+                task_name = self.tasks[self.dragging_task_id].name
                 time_str = self.drag_preview_time.strftime("%H:%M:%S")
                 QtWidgets.QToolTip.showText(
                     event.globalPosition().toPoint(),
@@ -421,54 +819,46 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
 
     def snap_time_to_interval(self, time_obj):
         """Snap a time to the configured interval"""
-        total_seconds = time_obj.hour * 3600 + time_obj.minute * 60 + time_obj.second
+        total_seconds = time_to_seconds(time_obj)
         
         # Round to nearest snap interval
         snapped_seconds = round(total_seconds / self.drag_snap_seconds) * self.drag_snap_seconds
         
         # Ensure we don't go over 24 hours
-        snapped_seconds = snapped_seconds % (24 * 3600)
-        
-        hours = snapped_seconds // 3600
-        minutes = (snapped_seconds % 3600) // 60
-        seconds = snapped_seconds % 60
-        
-        return datetime.time(hours, minutes, seconds)
+        return seconds_to_time(snapped_seconds % SECONDS_PER_DAY)
 
     def handle_single_click(self):
         """Handle delayed single click"""
+        from task_dialog import TaskDialog
+        
         if self.pending_click_pos is not None:
             task_id = self.get_task_at_position(self.pending_click_pos)
-            if task_id:
+            if is_occurrence_id(task_id):
+                # Occurrences are edited through their rule
+                self.open_recurring_tasks()
+            elif task_id:
                 # Edit existing task
-                task_data = self.tasks[task_id]
-                dialog = TaskDialog(self, task_data['time'], task_data['name'], task_id)
+                task = self.tasks[task_id]
+                dialog = TaskDialog(self, task.time, task.name, task_id)
                 if dialog.exec() == QtWidgets.QDialog.Accepted:
                     time_obj, task_name, deleted = dialog.get_task_data()
                     if deleted:
-                        del self.tasks[task_id]
-                        self.notified_tasks.discard(task_id)  # Remove from notified set
+                        self.tasks.remove(task_id)
+                        self.unindex_task(task_id)  # Remove from index and notified set
+                        self.delete_saved_task(task_id)
                     elif task_name:  # Only update if name is not empty
-                        self.tasks[task_id] = {'time': time_obj, 'name': task_name}
+                        self.tasks.add(task_id, time_to_seconds(time_obj), task_name)
                         
                         # Reset notification state when task is modified
                         self.notified_tasks.discard(task_id)
                         
-                        # Check if task time has already passed within the configured time range
-                        if self.is_time_in_range(time_obj):
-                            now = datetime.datetime.now().time()
-                            if self.is_time_in_range(now):
-                                # Both task and current time are in range, compare progress
-                                current_progress = self.get_time_range_info()['progress']
-                                task_progress = self.time_to_progress(time_obj)
-                                
-                                # If current progress has passed task progress, mark as notified
-                                if current_progress > task_progress:
-                                    self.notified_tasks.add(task_id)
+                        # Move the task in the index and check if its time has already passed
+                        self.index_task(task_id)
+                        self.save_task(task_id)
                     else:
-                        del self.tasks[task_id]  # Delete if name is empty
-                        self.notified_tasks.discard(task_id)  # Remove from notified set
-                    self.save_tasks()
+                        self.tasks.remove(task_id)  # Delete if name is empty
+                        self.unindex_task(task_id)  # Remove from index and notified set
+                        self.delete_saved_task(task_id)
                     self.update()
             
             self.pending_click_pos = None
@@ -501,10 +891,12 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         
         # Regular tooltip handling (only if not dragging)
         if not self.dragging_task_id:
-            task_id = self.get_task_at_position(event.position())
+            task_ids = self.get_tasks_at_position(event.position())
+            task_id = task_ids[0] if task_ids else None
             
-            if task_id != self.hover_task_id:
+            if task_ids != self.hover_task_ids:
                 self.hover_task_id = task_id
+                self.hover_task_ids = task_ids
                 QtWidgets.QToolTip.hideText()
                 
                 if task_id:
@@ -516,10 +908,19 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
 
     def show_task_tooltip(self):
         """Show tooltip for hovered task"""
-        if self.hover_task_id and self.hover_task_id in self.tasks:
-            task_data = self.tasks[self.hover_task_id]
-            tooltip_text = f"{task_data['time'].strftime('%H:%M:%S')} - {task_data['name']}"
-            QtWidgets.QToolTip.showText(QtGui.QCursor.pos(), tooltip_text, self)
+        lines = []
+        for task_id in self.hover_task_ids[:self.max_tooltip_tasks]:
+            task = self.get_task(task_id)
+            if task is not None:
+                lines.append(f"{task.time.strftime('%H:%M:%S')} - {task.name}")
+        
+        # Dense buckets can hold thousands of tasks
+        hidden_count = len(self.hover_task_ids) - self.max_tooltip_tasks
+        if lines and hidden_count > 0:
+            lines.append(f"... and {hidden_count} more tasks")
+        
+        if lines:
+            QtWidgets.QToolTip.showText(QtGui.QCursor.pos(), "\n".join(lines), self)
 
     def get_time_from_position(self, pos):
         """Convert mouse position to time of day within the configured range"""
@@ -536,127 +937,103 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         # Convert progress to time within the configured range
         return self.progress_to_time(progress)
 
-    def get_task_at_position(self, pos):
-        """Get task ID at mouse position (if any)"""
+    def get_marker_positions(self):
+        """Return (pixels, task_ids) of the task markers, sorted by pixel position"""
         rect = self.rect()
+        length = rect.width() if self.bar_position in ["top", "bottom"] else rect.height()
+        
+        # Only rebuild when the bar length, orientation, time range or task set changed
+        # (range and task changes both rebuild or modify the task index)
+        cache_key = (length, self.bar_position, self.task_index.version)
+        if cache_key != self.marker_cache_key:
+            # Offsets are sorted, so the pixel positions come out sorted as well
+            progress = self.time_range.progress_many(self.task_index.keys, offsets=True)
+            self.marker_pixels = array('i', [int(length * value) for value in progress])
+            self.marker_ids = self.task_index.ids[:]
+            
+            # Bin the sorted pixels into one bucket per occupied pixel, jumping over each run
+            pixels = self.marker_pixels
+            self.marker_bucket_pixels = []
+            self.marker_bucket_ends = []
+            index = 0
+            while index < len(pixels):
+                pixel = pixels[index]
+                index = bisect.bisect_right(pixels, pixel, index)
+                self.marker_bucket_pixels.append(pixel)
+                self.marker_bucket_ends.append(index)
+            
+            self.marker_cache_key = cache_key
+        
+        return self.marker_pixels, self.marker_ids
+
+    def get_marker_buckets(self):
+        """Return (bucket_pixels, bucket_ends) of the occupied pixel buckets"""
+        self.get_marker_positions()
+        return self.marker_bucket_pixels, self.marker_bucket_ends
+
+    @timed("hit_test")
+    def get_tasks_at_position(self, pos):
+        """Get the IDs of all tasks within click tolerance of the mouse position, nearest first"""
         click_tolerance = 5  # pixels
         
-        for task_id, task_data in self.tasks.items():
-            task_time = task_data['time']
-            task_progress = self.time_to_progress(task_time)
-            
-            if self.bar_position in ["top", "bottom"]:
-                task_x = int(rect.width() * task_progress)
-                if abs(pos.x() - task_x) <= click_tolerance:
-                    return task_id
-            else:  # left or right
-                task_y = int(rect.height() * task_progress)
-                if abs(pos.y() - task_y) <= click_tolerance:
-                    return task_id
+        task_ids = self.get_marker_positions()[1]
+        bucket_pixels, bucket_ends = self.get_marker_buckets()
+        position = pos.x() if self.bar_position in ["top", "bottom"] else pos.y()
         
-        return None
+        # Search the occupied buckets, so dense stretches cost one step per pixel rather than per task
+        first = bisect.bisect_left(bucket_pixels, position - click_tolerance)
+        last = bisect.bisect_right(bucket_pixels, position + click_tolerance)
+        if first == last:
+            return []
+        
+        nearby = sorted(range(first, last), key=lambda bucket: abs(bucket_pixels[bucket] - position))
+        result = []
+        for bucket in nearby:
+            start = bucket_ends[bucket - 1] if bucket > 0 else 0
+            result.extend(task_ids[start:bucket_ends[bucket]])
+        return result
+
+    def get_task_at_position(self, pos):
+        """Get task ID at mouse position (if any)"""
+        task_ids = self.get_tasks_at_position(pos)
+        return task_ids[0] if task_ids else None
+
+    def update_time_range(self):
+        """Rebuild the time range descriptor after start_time or end_time changed"""
+        self.time_range = TimeRange.from_times(self.start_time, self.end_time)
 
     def get_time_range_info(self):
         """Calculate time range duration and current progress"""
-        now = datetime.datetime.now().time()
-        
-        # Convert times to seconds since midnight
-        start_seconds = self.start_time.hour * 3600 + self.start_time.minute * 60 + self.start_time.second
-        end_seconds = self.end_time.hour * 3600 + self.end_time.minute * 60 + self.end_time.second
-        current_seconds = now.hour * 3600 + now.minute * 60 + now.second
-        
-        # Handle case where end time is next day (e.g., 18:00 to 06:00)
-        if end_seconds <= start_seconds:
-            # Range spans midnight
-            total_duration = (24 * 3600 - start_seconds) + end_seconds
-            
-            if current_seconds >= start_seconds:
-                # Current time is after start time (same day)
-                elapsed = current_seconds - start_seconds
-            else:
-                # Current time is before end time (next day)
-                elapsed = (24 * 3600 - start_seconds) + current_seconds
-        else:
-            # Normal range within same day
-            total_duration = end_seconds - start_seconds
-            elapsed = current_seconds - start_seconds
-            
-            # Clamp elapsed to valid range
-            elapsed = max(0, min(elapsed, total_duration))
+        time_range = self.time_range
+        current_seconds = time_to_seconds(datetime.datetime.now().time())
+        elapsed = time_range.elapsed(current_seconds)
         
         # Calculate progress (0.0 to 1.0)
-        if total_duration > 0:
-            progress = elapsed / total_duration
+        if time_range.total_duration > 0:
+            progress = elapsed / time_range.total_duration
         else:
             progress = 0.0
             
         return {
             'progress': max(0.0, min(1.0, progress)),
-            'total_duration': total_duration,
+            'total_duration': time_range.total_duration,
             'elapsed': elapsed,
-            'is_in_range': self.is_time_in_range(now)
+            'is_in_range': time_range.contains(current_seconds)
         }
 
     def is_time_in_range(self, time_obj):
         """Check if a given time is within the configured time range"""
-        time_seconds = time_obj.hour * 3600 + time_obj.minute * 60 + time_obj.second
-        start_seconds = self.start_time.hour * 3600 + self.start_time.minute * 60 + self.start_time.second
-        end_seconds = self.end_time.hour * 3600 + self.end_time.minute * 60 + self.end_time.second
-        
-        if end_seconds <= start_seconds:
-            # Range spans midnight
-            return time_seconds >= start_seconds or time_seconds <= end_seconds
-        else:
-            # Normal range within same day
-            return start_seconds <= time_seconds <= end_seconds
+        return self.time_range.contains(time_to_seconds(time_obj))
 
     def time_to_progress(self, time_obj):
         """Convert a time object to progress value (0.0 to 1.0) within the configured range"""
-        time_seconds = time_obj.hour * 3600 + time_obj.minute * 60 + time_obj.second
-        start_seconds = self.start_time.hour * 3600 + self.start_time.minute * 60 + self.start_time.second
-        end_seconds = self.end_time.hour * 3600 + self.end_time.minute * 60 + self.end_time.second
-        
-        if end_seconds <= start_seconds:
-            # Range spans midnight
-            total_duration = (24 * 3600 - start_seconds) + end_seconds
-            
-            if time_seconds >= start_seconds:
-                elapsed = time_seconds - start_seconds
-            else:
-                elapsed = (24 * 3600 - start_seconds) + time_seconds
-        else:
-            # Normal range within same day
-            total_duration = end_seconds - start_seconds
-            elapsed = time_seconds - start_seconds
-            elapsed = max(0, min(elapsed, total_duration))
-        
-        if total_duration > 0:
-            return elapsed / total_duration
-        return 0.0
+        return self.time_range.progress(time_to_seconds(time_obj))
 
     def progress_to_time(self, progress):
         """Convert progress value (0.0 to 1.0) to time object within the configured range"""
-        progress = max(0.0, min(1.0, progress))
-        
-        start_seconds = self.start_time.hour * 3600 + self.start_time.minute * 60 + self.start_time.second
-        end_seconds = self.end_time.hour * 3600 + self.end_time.minute * 60 + self.end_time.second
-        
-        if end_seconds <= start_seconds:
-            # Range spans midnight
-            total_duration = (24 * 3600 - start_seconds) + end_seconds
-        else:
-            # Normal range within same day
-            total_duration = end_seconds - start_seconds
-        
-        elapsed_seconds = int(progress * total_duration)
-        target_seconds = (start_seconds + elapsed_seconds) % (24 * 3600)
-        
-        hours = target_seconds // 3600
-        minutes = (target_seconds % 3600) // 60
-        seconds = target_seconds % 60
-        
-        return datetime.time(hours, minutes, seconds)
+        return self.time_range.time_at(progress)
 
+    @timed("paintEvent")
     def paintEvent(self, event):
         now = datetime.datetime.now()
         time_info = self.get_time_range_info()
@@ -668,10 +1045,12 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         rect = self.rect()
         time_str = now.strftime("%H:%M:%S")
 
-        # Fill entire widget area with transparent background to make it reactive to mouse events
-        painter.setBrush(QtGui.QColor(0, 0, 0, 1))  # Almost transparent black
-        painter.setPen(QtCore.Qt.NoPen)
-        painter.drawRect(rect)
+        # Remember what was painted so the next tick can compute the damaged region
+        self.painted_state = (rect.width(), rect.height(), self.bar_position, time_info['is_in_range'])
+        self.painted_fill = self.get_fill_length(rect, progress)
+
+        # Background and focus border only change with the size or focus state
+        painter.drawPixmap(0, 0, self.get_layer('background', (self.is_focused,), self.draw_background))
 
         # Choose bar color based on whether current time is in range
         if time_info['is_in_range']:
@@ -683,17 +1062,6 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         painter.setBrush(bar_color)
         painter.setPen(QtCore.Qt.NoPen)
 
-        # Add visual indicator for focus mode
-        if self.is_focused:
-            # Draw a subtle border to indicate focus mode
-            painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 0, 150), 2))  # Yellow border
-            painter.setBrush(QtCore.Qt.NoBrush)
-            painter.drawRect(rect.adjusted(1, 1, -1, -1))
-            
-            # Reset pen and brush for progress bar
-            painter.setBrush(bar_color)
-            painter.setPen(QtCore.Qt.NoPen)
-
         if self.bar_position in ["top", "bottom"]:
             fill_width = int(rect.width() * progress)
             painter.drawRect(0, 0, fill_width, rect.height())
@@ -701,9 +1069,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             # Draw time centered only when fully expanded
             if rect.height() >= self.full_height:
                 painter.setPen(QtGui.QColor("white"))
-                font = QtGui.QFont("Arial", 12, QtGui.QFont.Bold)
-                font.setPointSize(12)
-                painter.setFont(font)
+                painter.setFont(self.clock_font)
                 painter.drawText(rect, QtCore.Qt.AlignCenter, time_str)
 
         elif self.bar_position == "left":
@@ -716,9 +1082,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
                 painter.translate(rect.center().x(), rect.center().y())
                 painter.rotate(-90)
                 painter.setPen(QtGui.QColor("white"))
-                font = QtGui.QFont("Arial", 12, QtGui.QFont.Bold)
-                font.setPointSize(12)
-                painter.setFont(font)
+                painter.setFont(self.clock_font)
                 painter.drawText(QtCore.QRect(-rect.height() // 2, -rect.width() // 2,
                                             rect.height(), rect.width()),
                                 QtCore.Qt.AlignCenter, time_str)
@@ -734,16 +1098,15 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
                 painter.translate(rect.center().x(), rect.center().y())
                 painter.rotate(90)
                 painter.setPen(QtGui.QColor("white"))
-                font = QtGui.QFont("Arial", 12, QtGui.QFont.Bold)
-                font.setPointSize(12)
-                painter.setFont(font)
+                painter.setFont(self.clock_font)
                 painter.drawText(QtCore.QRect(-rect.height() // 2, -rect.width() // 2,
                                             rect.height(), rect.width()),
                                 QtCore.Qt.AlignCenter, time_str)
                 painter.restore()
 
-        # Draw task markers
-        self.draw_task_markers(painter, rect)
+        # Draw task markers (re-rendered only when the task set, range or orientation changed)
+        markers_key = (self.bar_position, self.task_index.version, self.dragging_task_id)
+        painter.drawPixmap(0, 0, self.get_layer('markers', markers_key, self.draw_task_markers))
         
         # Draw drag preview
         if self.dragging_task_id and self.drag_preview_time:
@@ -751,40 +1114,105 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         
         # Draw focus indicator for the focused task
         if self.is_focused and self.focused_task_id in self.tasks:
-            self.draw_focus_indicator(painter, rect)
+            focus_key = (self.bar_position, self.time_range, self.focused_task_id,
+                         self.tasks[self.focused_task_id].seconds)
+            painter.drawPixmap(0, 0, self.get_layer('focus', focus_key, self.draw_focus_indicator))
+        
+        if not self.first_frame_painted:
+            self.first_frame_painted = True
+            STATS.histogram("startup_first_paint").record(time.perf_counter_ns() - STARTUP_NS)
+            # Everything the first frame did not need runs once it is on screen
+            QtCore.QTimer.singleShot(0, self.finish_startup)
+
+    def get_layer(self, name, key, draw):
+        """Return the cached pixmap of a static layer, re-rendering it only when its inputs changed"""
+        rect = self.rect()
+        ratio = self.devicePixelRatioF()
+        
+        # Every layer depends on the widget size and the screen's device pixel ratio
+        full_key = (rect.width(), rect.height(), ratio) + key
+        cached = self.layer_cache.get(name)
+        if cached is not None and cached[0] == full_key:
+            return cached[1]
+        
+        pixmap = QtGui.QPixmap(max(1, round(rect.width() * ratio)), max(1, round(rect.height() * ratio)))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(QtCore.Qt.transparent)
+        
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        draw(painter, rect)
+        painter.end()
+        
+        self.layer_cache[name] = (full_key, pixmap)
+        return pixmap
+
+    def draw_background(self, painter, rect):
+        """Draw the widget background and the focus mode border"""
+        # Fill entire widget area with transparent background to make it reactive to mouse events
+        painter.setBrush(QtGui.QColor(0, 0, 0, 1))  # Almost transparent black
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.drawRect(rect)
+
+        # Add visual indicator for focus mode
+        if self.is_focused:
+            # Draw a subtle border to indicate focus mode
+            painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 0, 150), 2))  # Yellow border
+            painter.setBrush(QtCore.Qt.NoBrush)
+            painter.drawRect(rect.adjusted(1, 1, -1, -1))
 
     def draw_task_markers(self, painter, rect):
-        """Draw vertical lines for task markers"""
-        if not self.tasks:
+        """Draw one line per occupied pixel, colored by how many tasks it holds"""
+        # The marker positions only hold tasks within the configured time range
+        task_ids = self.get_marker_positions()[1]
+        bucket_pixels, bucket_ends = self.get_marker_buckets()
+        if not bucket_pixels:
             return
         
-        # Set up pen for task markers
-        painter.setPen(QtGui.QPen(QtGui.QColor("red"), 2))
-        
-        for task_id, task_data in self.tasks.items():
-            # Skip the task being dragged (it will be drawn as preview)
-            if task_id == self.dragging_task_id:
-                continue
-                
-            task_time = task_data['time']
-            
-            # Only show tasks that are within the configured time range
-            if not self.is_time_in_range(task_time):
+        # Skip the task being dragged (it will be drawn as preview)
+        drag_bucket = None
+        offset = self.task_index.offsets.get(self.dragging_task_id)
+        if offset is not None:
+            index = bisect.bisect_left(self.task_index.keys, offset)
+            while task_ids[index] != self.dragging_task_id:
+                index += 1
+            drag_bucket = bisect.bisect_right(bucket_ends, index)
+        
+        # Single tasks stay plain red; fuller buckets shade towards yellow on a log scale
+        levels = self.marker_density_levels
+        max_count = max(end - start for start, end in zip([0] + bucket_ends, bucket_ends))
+        scale = (levels - 2) / math.log(max_count) if max_count > 1 else 0
+        lines_by_level = [[] for _ in range(levels)]
+        horizontal = self.bar_position in ["top", "bottom"]
+        
+        start = 0
+        for bucket, (pixel, end) in enumerate(zip(bucket_pixels, bucket_ends)):
+            count = end - start
+            start = end
+            if bucket == drag_bucket:
+                count -= 1
+            if count <= 0:
                 continue
-                
-            task_progress = self.time_to_progress(task_time)
             
-            if self.bar_position in ["top", "bottom"]:
-                # Draw vertical line
-                x = int(rect.width() * task_progress)
-                painter.drawLine(x, 0, x, rect.height())
+            level = 0 if count == 1 else 1 + int(scale * math.log(count))
+            if horizontal:
+                # Vertical line
+                lines_by_level[level].append(QtCore.QLine(pixel, 0, pixel, rect.height()))
             else:  # left or right
-                # Draw horizontal line
-                y = int(rect.height() * task_progress)
-                painter.drawLine(0, y, rect.width(), y)
+                # Horizontal line
+                lines_by_level[level].append(QtCore.QLine(0, pixel, rect.width(), pixel))
+        
+        # One pen change and one draw call per density level
+        for level, lines in enumerate(lines_by_level):
+            if lines:
+                green = int(255 * level / (levels - 1))
+                painter.setPen(QtGui.QPen(QtGui.QColor(255, green, 0), 2))
+                painter.drawLines(lines)
 
 
     def open_settings(self):
+        from screen_dialog import SettingsDialog
+        
         screens = QtGui.QGuiApplication.screens()
         dialog = SettingsDialog(self, screens=screens, current_index=self.screen_index, 
                                position=self.bar_position, start_time=self.start_time, end_time=self.end_time,
@@ -799,14 +1227,38 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             self.bar_position = selected_position
             self.start_time = start_time
             self.end_time = end_time
+            self.update_time_range()
             self.task_dragging_enabled = drag_enabled
             self.drag_snap_seconds = snap_seconds
             
+            # Task offsets depend on the time range
+            self.rebuild_task_index()
+            
             self.move_to_screen(selected_index, self.bar_position)
             # Save settings after change
             self.save_settings()
 
 
+    def open_recurring_tasks(self):
+        """Edit the recurrence rules and re-expand them into the task index"""
+        from recurrence_dialog import RecurrenceDialog
+        
+        dialog = RecurrenceDialog(self, self.recurrence.rules)
+        if dialog.exec() == QtWidgets.QDialog.Accepted:
+            self.recurrence.set_rules(dialog.get_rules())
+            self.persistence.put_settings({"recurrence_rules": self.recurrence.dump()})
+            
+            # Occurrence ids are tied to the old rules, so forget their notification state
+            self.notified_tasks.difference_update([task_id for task_id in self.notified_tasks if is_occurrence_id(task_id)])
+            self.rebuild_task_index()
+            self.update()
+
+    def open_performance_stats(self):
+        from perf_dialog import PerformanceDialog
+        
+        dialog = PerformanceDialog(self, stats=STATS)
+        dialog.exec()
+
     def move_to_screen(self, screen_index, position='top'):
         screens = QtGui.QGuiApplication.screens()
         if screen_index >= len(screens):
@@ -826,6 +1278,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         self.setGeometry(slim_rect)
         
         self.update()
+        self.schedule_clock_tick()
 
     def get_slim_geometry(self):
         """Get the geometry for slim (collapsed) state based on current position"""
@@ -878,12 +1331,12 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         if task_id not in self.tasks:
             return
         
-        task_time = self.tasks[task_id]['time']
+        task_time = self.tasks[task_id].time
         current_time = datetime.datetime.now().time()
         
         # Don't focus if task time has already passed
-        current_seconds = current_time.hour * 3600 + current_time.minute * 60 + current_time.second
-        task_seconds = task_time.hour * 3600 + task_time.minute * 60 + task_time.second
+        current_seconds = time_to_seconds(current_time)
+        task_seconds = time_to_seconds(task_time)
         
         # Handle day boundary case
         if task_seconds < current_seconds:
@@ -898,6 +1351,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         # Set new focused time range
         self.start_time = current_time
         self.end_time = task_time
+        self.update_time_range()
         self.is_focused = True
         self.focused_task_id = task_id
         self.focused_task_time = task_time
@@ -906,10 +1360,11 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         self.notified_tasks.clear()
         
         # Re-check notification states for tasks in the new range
-        self.load_tasks()
+        self.rebuild_task_index()
         
         # Update display
         self.update()
+        self.schedule_clock_tick()
 
     def exit_focus_mode(self):
         """Exit focus mode and restore original time range"""
@@ -919,6 +1374,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         # Restore original time range
         self.start_time = self.original_start_time
         self.end_time = self.original_end_time
+        self.update_time_range()
         
         # Clear focus state
         self.is_focused = False
@@ -931,10 +1387,11 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         self.notified_tasks.clear()
         
         # Re-check notification states for tasks in the restored range
-        self.load_tasks()
+        self.rebuild_task_index()
         
         # Update display
         self.update()
+        self.schedule_clock_tick()
 
     def contextMenuEvent(self, event):
         """Handle right-click context menu for tasks"""
@@ -943,9 +1400,10 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         if task_id:
             menu = QtWidgets.QMenu(self)
             
-            # Add focus action
-            focus_action = menu.addAction("Focus on Task")
-            focus_action.triggered.connect(lambda: self.focus_on_task(task_id))
+            # Add focus action (recurring occurrences cannot be focused)
+            if not is_occurrence_id(task_id):
+                focus_action = menu.addAction("Focus on Task")
+                focus_action.triggered.connect(lambda: self.focus_on_task(task_id))
             
             # Add exit focus action if currently focused
             if self.is_focused:
@@ -956,13 +1414,16 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             
             # Add import/export actions to task context menu
             import_submenu = menu.addMenu("Import/Export")
-            import_file_action = import_submenu.addAction("Import from JSON File...")
+            import_file_action = import_submenu.addAction("Import from File...")
             import_file_action.triggered.connect(self.import_json_file_dialog)
             
+            sync_file_action = import_submenu.addAction("Sync from File...")
+            sync_file_action.triggered.connect(self.sync_json_file_dialog)
+            
             paste_clipboard_action = import_submenu.addAction("Paste JSON from Clipboard")
             paste_clipboard_action.triggered.connect(self.paste_json_from_clipboard)
             
-            export_file_action = import_submenu.addAction("Export to JSON File...")
+            export_file_action = import_submenu.addAction("Export to File...")
             export_file_action.triggered.connect(self.export_json_file_dialog)
             
             menu.addSeparator()
@@ -977,13 +1438,18 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             
             menu.addSeparator()
             
-            # Add edit task action
-            edit_action = menu.addAction("Edit Task")
-            edit_action.triggered.connect(lambda: self.edit_task(task_id))
-            
-            # Add delete task action
-            delete_action = menu.addAction("Delete Task")
-            delete_action.triggered.connect(lambda: self.delete_task(task_id))
+            if is_occurrence_id(task_id):
+                # Occurrences are edited through their rule
+                recurring_action = menu.addAction("Edit Recurring Tasks...")
+                recurring_action.triggered.connect(self.open_recurring_tasks)
+            else:
+                # Add edit task action
+                edit_action = menu.addAction("Edit Task")
+                edit_action.triggered.connect(lambda: self.edit_task(task_id))
+                
+                # Add delete task action
+                delete_action = menu.addAction("Delete Task")
+                delete_action.triggered.connect(lambda: self.delete_task(task_id))
             
             menu.exec(event.globalPos())
         else:
@@ -998,35 +1464,41 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             
             # Add import/export actions to general context menu
             import_submenu = menu.addMenu("Import/Export")
-            import_file_action = import_submenu.addAction("Import from JSON File...")
+            import_file_action = import_submenu.addAction("Import from File...")
             import_file_action.triggered.connect(self.import_json_file_dialog)
             
+            sync_file_action = import_submenu.addAction("Sync from File...")
+            sync_file_action.triggered.connect(self.sync_json_file_dialog)
+            
             paste_clipboard_action = import_submenu.addAction("Paste JSON from Clipboard (Ctrl+V)")
             paste_clipboard_action.triggered.connect(self.paste_json_from_clipboard)
             
-            export_file_action = import_submenu.addAction("Export to JSON File...")
+            export_file_action = import_submenu.addAction("Export to File...")
             export_file_action.triggered.connect(self.export_json_file_dialog)
             
             menu.exec(event.globalPos())
 
     def edit_task(self, task_id):
         """Edit an existing task"""
+        from task_dialog import TaskDialog
+        
         if task_id not in self.tasks:
             return
         
-        task_data = self.tasks[task_id]
-        dialog = TaskDialog(self, task_data['time'], task_data['name'], task_id)
+        task = self.tasks[task_id]
+        dialog = TaskDialog(self, task.time, task.name, task_id)
         if dialog.exec() == QtWidgets.QDialog.Accepted:
             time_obj, task_name, deleted = dialog.get_task_data()
             if deleted:
-                del self.tasks[task_id]
-                self.notified_tasks.discard(task_id)
+                self.tasks.remove(task_id)
+                self.unindex_task(task_id)
+                self.delete_saved_task(task_id)
                 
                 # If we're focused on this task, exit focus mode
                 if self.is_focused and self.focused_task_id == task_id:
                     self.exit_focus_mode()
             elif task_name:
-                self.tasks[task_id] = {'time': time_obj, 'name': task_name}
+                self.tasks.add(task_id, time_to_seconds(time_obj), task_name)
                 
                 # Reset notification state when task is modified
                 self.notified_tasks.discard(task_id)
@@ -1035,25 +1507,24 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
                 if self.is_focused and self.focused_task_id == task_id:
                     self.focused_task_time = time_obj
                     self.end_time = time_obj
+                    self.update_time_range()
+                    # The range itself changed, so every offset has to be recomputed
+                    self.rebuild_task_index()
+                    self.schedule_clock_tick()
+                else:
+                    # Move the task in the index and check if its time has already passed
+                    self.index_task(task_id)
                 
-                # Check if task time has already passed within the configured time range
-                if self.is_time_in_range(time_obj):
-                    now = datetime.datetime.now().time()
-                    if self.is_time_in_range(now):
-                        current_progress = self.get_time_range_info()['progress']
-                        task_progress = self.time_to_progress(time_obj)
-                        
-                        if current_progress > task_progress:
-                            self.notified_tasks.add(task_id)
+                self.save_task(task_id)
             else:
-                del self.tasks[task_id]
-                self.notified_tasks.discard(task_id)
+                self.tasks.remove(task_id)
+                self.unindex_task(task_id)
+                self.delete_saved_task(task_id)
                 
                 # If we're focused on this task, exit focus mode
                 if self.is_focused and self.focused_task_id == task_id:
                     self.exit_focus_mode()
             
-            self.save_tasks()
             self.update()
 
     def delete_task(self, task_id):
@@ -1061,24 +1532,24 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         if task_id not in self.tasks:
             return
         
-        task_data = self.tasks[task_id]
+        task = self.tasks[task_id]
         reply = QtWidgets.QMessageBox.question(
             self, 
             "Delete Task", 
-            f"Are you sure you want to delete the task '{task_data['name']}'?",
+            f"Are you sure you want to delete the task '{task.name}'?",
             QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
             QtWidgets.QMessageBox.No
         )
         
         if reply == QtWidgets.QMessageBox.Yes:
-            del self.tasks[task_id]
-            self.notified_tasks.discard(task_id)
+            self.tasks.remove(task_id)
+            self.unindex_task(task_id)
+            self.delete_saved_task(task_id)
             
             # If we're focused on this task, exit focus mode
             if self.is_focused and self.focused_task_id == task_id:
                 self.exit_focus_mode()
             
-            self.save_tasks()
             self.update()
 
     def draw_focus_indicator(self, painter, rect):
@@ -1086,7 +1557,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
         if not self.is_focused or self.focused_task_id not in self.tasks:
             return
         
-        task_time = self.tasks[self.focused_task_id]['time']
+        task_time = self.tasks[self.focused_task_id].time
         task_progress = self.time_to_progress(task_time)
         
         # Set up pen for focused task indicator (thicker, different color)
@@ -1143,204 +1614,285 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             painter.drawPolygon(points)
 
     def dragEnterEvent(self, event):
-        """Handle drag enter event for JSON files"""
+        """Handle drag enter event for JSON, NDJSON, CSV and iCalendar files"""
+        from task_import import import_format_for_path
+        
         if event.mimeData().hasUrls():
             urls = event.mimeData().urls()
             if len(urls) == 1:
                 file_path = urls[0].toLocalFile()
-                if file_path.lower().endswith('.json'):
+                if import_format_for_path(file_path):
                     event.acceptProposedAction()
                     return
         event.ignore()
 
     def dragMoveEvent(self, event):
         """Handle drag move event"""
+        from task_import import import_format_for_path
+        
         if event.mimeData().hasUrls():
             urls = event.mimeData().urls()
             if len(urls) == 1:
                 file_path = urls[0].toLocalFile()
-                if file_path.lower().endswith('.json'):
+                if import_format_for_path(file_path):
                     event.acceptProposedAction()
                     return
         event.ignore()
 
     def dropEvent(self, event):
-        """Handle drop event for JSON files"""
+        """Handle drop event for JSON, NDJSON, CSV and iCalendar files"""
+        from task_import import import_format_for_path
+        
         if event.mimeData().hasUrls():
             urls = event.mimeData().urls()
             if len(urls) == 1:
                 file_path = urls[0].toLocalFile()
-                if file_path.lower().endswith('.json'):
-                    self.import_tasks_from_json(file_path)
+                if import_format_for_path(file_path):
+                    self.import_tasks_from_file(file_path)
                     event.acceptProposedAction()
                     return
         event.ignore()
 
-    def import_tasks_from_json(self, file_path):
-        """Import tasks from a JSON file"""
+    def import_tasks_from_file(self, file_path, merge=False):
+        """Import tasks from a JSON, NDJSON, CSV or iCalendar file (file dialog and drag-and-drop)"""
+        from task_import import import_format_for_path
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-            
-            # Handle different JSON structures
-            tasks_data = []
-            
-            if isinstance(data, list):
-                # JSON is a list of tasks
-                tasks_data = data
-            elif isinstance(data, dict):
-                # JSON is an object, look for common keys that might contain tasks
-                if 'tasks' in data:
-                    tasks_data = data['tasks']
-                elif 'events' in data:
-                    tasks_data = data['events']
-                elif 'items' in data:
-                    tasks_data = data['items']
-                else:
-                    # Treat the object itself as a single task
-                    tasks_data = [data]
-            
-            imported_count = 0
-            skipped_count = 0
-            
-            for task_data in tasks_data:
-                if not isinstance(task_data, dict):
-                    skipped_count += 1
-                    continue
-                
-                # Extract name and time from the task data
-                name = None
-                time_str = None
-                
-                # Look for name field (try different common field names)
-                for name_field in ['name', 'title', 'task', 'description', 'label']:
-                    if name_field in task_data and task_data[name_field]:
-                        name = str(task_data[name_field])
-                        break
-                
-                # Look for time field (try different common field names)
-                for time_field in ['time', 'start_time', 'start', 'datetime', 'timestamp']:
-                    if time_field in task_data and task_data[time_field]:
-                        time_str = str(task_data[time_field])
-                        break
-                
-                if not name or not time_str:
-                    skipped_count += 1
-                    continue
-                
-                # Parse the time string
-                time_obj = None
-                try:
-                    # Try different time formats
-                    time_formats = [
-                        "%H:%M:%S",      # HH:MM:SS
-                        "%H:%M",         # HH:MM
-                        "%I:%M:%S %p",   # 12-hour format with seconds
-                        "%I:%M %p",      # 12-hour format without seconds
-                        "%Y-%m-%d %H:%M:%S",  # Full datetime
-                        "%Y-%m-%dT%H:%M:%S",  # ISO format
-                    ]
-                    
-                    for fmt in time_formats:
-                        try:
-                            if 'T' in time_str or ' ' in time_str:
-                                # Full datetime, extract time part
-                                dt = datetime.datetime.strptime(time_str, fmt)
-                                time_obj = dt.time()
-                            else:
-                                # Time only
-                                dt = datetime.datetime.strptime(time_str, fmt)
-                                time_obj = dt.time()
-                            break
-                        except ValueError:
-                            continue
-                    
-                    if time_obj is None:
-                        # Try parsing as ISO format time only
-                        try:
-                            time_obj = datetime.time.fromisoformat(time_str)
-                        except ValueError:
-                            pass
-                
-                except Exception:
-                    pass
-                
-                if time_obj is None:
-                    skipped_count += 1
-                    continue
-                
-                # Add the task
-                task_id = str(uuid.uuid4())
-                self.tasks[task_id] = {'time': time_obj, 'name': name}
-                
-                # Check if task time has already passed within the configured time range
-                if self.is_time_in_range(time_obj):
-                    now = datetime.datetime.now().time()
-                    if self.is_time_in_range(now):
-                        # Both task and current time are in range, compare progress
-                        current_progress = self.get_time_range_info()['progress']
-                        task_progress = self.time_to_progress(time_obj)
-                        
-                        # If current progress has passed task progress, mark as notified
-                        if current_progress > task_progress:
-                            self.notified_tasks.add(task_id)
-                
-                imported_count += 1
-            
-            # Save tasks and update display
-            if imported_count > 0:
-                self.save_tasks()
-                self.update()
-            
-            # Show result message
-            if imported_count > 0 or skipped_count > 0:
-                message = f"Import completed!\n\nImported: {imported_count} tasks"
-                if skipped_count > 0:
-                    message += f"\nSkipped: {skipped_count} entries (missing name or time)"
-                
-                QtWidgets.QMessageBox.information(
-                    self,
-                    "JSON Import",
-                    message,
-                    QtWidgets.QMessageBox.Ok
-                )
+            size = os.path.getsize(file_path)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Import Error",
+                f"Error importing tasks from file:\n{str(e)}",
+                QtWidgets.QMessageBox.Ok
+            )
+            return
+        
+        # Unknown extensions are read as JSON, like before
+        import_format = import_format_for_path(file_path) or 'json'
+        label = import_format.upper()
+        title = f"{label} Sync" if merge else f"{label} Import"
+        self.import_tasks(lambda: open(file_path, 'rb'), size, title, f"the {label} file", merge, import_format)
+
+    def import_tasks(self, open_source, size, title, source_label, merge=False, import_format='json'):
+        """Import pipeline shared by the file dialog, drag-and-drop and clipboard paste.
+
+        open_source returns a binary file object; it is read and parsed on a
+        worker thread, and the parsed tasks arrive here in batches. With merge,
+        rows matching an existing task are not added again (see merge_imported_tasks).
+        """
+        from import_worker import ImportWorker
+        from task_import import ImportMergeIndex
+        
+        if self.import_worker is not None:
+            QtWidgets.QMessageBox.information(
+                self,
+                title,
+                "Another import is still running. Cancel it from the tray menu or wait until it finishes.",
+                QtWidgets.QMessageBox.Ok
+            )
+            return
+        
+        # Calendars are only expanded for today's configured range
+        reader_options = None
+        if import_format == 'ics':
+            reader_options = {'date': datetime.date.today(), 'time_range': self.calendar_time_range()}
+        
+        worker = ImportWorker(open_source, size, import_format, self.import_batch_size, reader_options=reader_options)
+        worker.signals.batch.connect(self.handle_import_batch)
+        worker.signals.progress.connect(self.handle_import_progress)
+        worker.signals.finished.connect(
+            lambda skipped_count, cancelled, error_kind, error_message:
+                self.handle_import_finished(title, source_label, skipped_count, cancelled, error_kind, error_message)
+        )
+        
+        self.import_worker = worker
+        self.import_merge_index = ImportMergeIndex(self.tasks) if merge else None
+        self.import_imported_count = 0
+        self.import_updated_count = 0
+        self.import_unchanged_count = 0
+        self.import_progress = 0
+        self.update_import_actions()
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def calendar_time_range(self):
+        """The configured (unfocused) range that imported calendars are expanded for"""
+        if self.is_focused:
+            return TimeRange.from_times(self.original_start_time, self.original_end_time)
+        return self.time_range
+
+    def cancel_import(self):
+        """Cancel the running import (tray menu)"""
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+
+    def handle_import_batch(self, parsed_tasks):
+        """Add a batch parsed by the import worker"""
+        worker = self.import_worker
+        if worker is None:
+            return
+        
+        if not worker.is_cancelled():
+            if self.import_merge_index is not None:
+                new_count, updated_count, unchanged_count = self.merge_imported_tasks(parsed_tasks)
+                self.import_imported_count += new_count
+                self.import_updated_count += updated_count
+                self.import_unchanged_count += unchanged_count
             else:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "JSON Import",
-                    "No valid tasks found in the JSON file.\n\nExpected format:\n- 'name' field for task name\n- 'time' field for task time",
-                    QtWidgets.QMessageBox.Ok
-                )
+                self.import_imported_count += self.add_imported_tasks(parsed_tasks)
+            self.update_tray_tooltip()
+        worker.batch_done()
+
+    def handle_import_progress(self, bytes_read, size):
+        self.import_progress = int(100 * bytes_read / size)
+        self.update_tray_tooltip()
+
+    def handle_import_finished(self, title, source_label, skipped_count, cancelled, error_kind, error_message):
+        """Report the result of a finished import"""
+        imported_count = self.import_imported_count
+        if self.import_merge_index is not None:
+            counts = (f"New: {imported_count} tasks\nUpdated: {self.import_updated_count} tasks"
+                      f"\nUnchanged: {self.import_unchanged_count} tasks")
+            processed_count = imported_count + self.import_updated_count + self.import_unchanged_count
+        else:
+            counts = f"Imported: {imported_count} tasks"
+            processed_count = imported_count
+        self.import_worker = None
+        self.import_merge_index = None
+        self.update_import_actions()
+        self.update_tray_tooltip()
         
-        except json.JSONDecodeError as e:
+        if error_kind == 'json':
             QtWidgets.QMessageBox.critical(
                 self,
-                "JSON Import Error",
-                f"Invalid JSON file format:\n{str(e)}",
+                f"{title} Error",
+                f"Invalid JSON in {source_label}:\n{error_message}\n\nBefore the error:\n{counts}",
                 QtWidgets.QMessageBox.Ok
             )
-        except Exception as e:
+        elif error_kind:
             QtWidgets.QMessageBox.critical(
                 self,
                 "Import Error",
-                f"Error importing tasks from JSON file:\n{str(e)}",
+                f"Error importing tasks from {source_label}:\n{error_message}",
+                QtWidgets.QMessageBox.Ok
+            )
+        elif processed_count > 0 or skipped_count > 0:
+            message = f"Import {'cancelled' if cancelled else 'completed'}!\n\n{counts}"
+            if skipped_count > 0:
+                message += f"\nSkipped: {skipped_count} entries (malformed, or missing name or time)"
+            
+            QtWidgets.QMessageBox.information(
+                self,
+                title,
+                message,
                 QtWidgets.QMessageBox.Ok
             )
+        elif not cancelled:
+            QtWidgets.QMessageBox.warning(
+                self,
+                title,
+                f"No valid tasks found in {source_label}.\n\nExpected format:\n- 'name' field for task name\n- 'time' field for task time",
+                QtWidgets.QMessageBox.Ok
+            )
+
+    def update_import_actions(self):
+        """Enable the tray's cancel action only while an import is running"""
+        if hasattr(self, 'cancel_import_action'):
+            self.cancel_import_action.setEnabled(self.import_worker is not None)
+
+    def add_imported_tasks(self, parsed_tasks):
+        """Add a batch of (name, time_obj, id) rows as new tasks and return how many were added"""
+        if not parsed_tasks:
+            return 0
+        
+        imported_ids = [self.tasks.new_id() for _ in parsed_tasks]
+        self.tasks.add_many((task_id, time_to_seconds(time_obj), name)
+                            for task_id, (name, time_obj, _) in zip(imported_ids, parsed_tasks))
+        
+        # Index and save the batch in one step each, then repaint once
+        self.index_tasks(imported_ids)
+        self.save_tasks(imported_ids)
+        self.update()
+        return len(imported_ids)
+
+    def merge_imported_tasks(self, parsed_tasks):
+        """Apply only the delta of a batch of (name, time_obj, id) rows.
+
+        Returns the (new, updated, unchanged) counts. Unchanged rows are not
+        touched at all; new and updated tasks are indexed and saved in one step.
+        """
+        new_ids = []
+        updated_ids = []
+        updated_set = set()  # A file may repeat an id; each task is counted, indexed and saved once
+        unchanged_count = 0
+        for name, time_obj, import_id in parsed_tasks:
+            seconds = time_to_seconds(time_obj)
+            kind, task_id = self.import_merge_index.classify(self.tasks, import_id, name, seconds)
+            if kind == 'unchanged':
+                unchanged_count += 1
+                continue
+            
+            if kind == 'new':
+                # Always a fresh id, so a file from another day never overwrites that day's stored task
+                task_id = self.tasks.new_id()
+                new_ids.append(task_id)
+            else:
+                old_task = self.tasks[task_id]
+                self.import_merge_index.remove(task_id, old_task.name, old_task.seconds)
+                # Reset notification state like an edit does
+                self.notified_tasks.discard(task_id)
+                if task_id not in updated_set:
+                    updated_set.add(task_id)
+                    updated_ids.append(task_id)
+            
+            self.tasks.add(task_id, seconds, name)
+            self.import_merge_index.add(task_id, name, seconds)
+        
+        changed_ids = new_ids + updated_ids
+        if changed_ids:
+            self.index_tasks(changed_ids)
+            
+            # The focused task defines the end of the range, so a moved one changes every offset
+            if self.is_focused and self.focused_task_id in updated_set:
+                self.focused_task_time = self.tasks[self.focused_task_id].time
+                self.end_time = self.focused_task_time
+                self.update_time_range()
+                self.rebuild_task_index()
+                self.schedule_clock_tick()
+            
+            self.save_tasks(changed_ids)
+            self.update()
+        
+        return len(new_ids), len(updated_ids), unchanged_count
 
     def import_json_file_dialog(self):
-        """Open file dialog to import JSON file"""
+        """Open file dialog to import a JSON, NDJSON, CSV or iCalendar file"""
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
             self,
-            "Import Tasks from JSON",
+            "Import Tasks",
             "",
-            "JSON Files (*.json);;All Files (*)"
+            self.import_file_filter
         )
         
         if file_path:
-            self.import_tasks_from_json(file_path)
+            self.import_tasks_from_file(file_path)
+
+    def sync_json_file_dialog(self):
+        """Open file dialog to merge a JSON, NDJSON, CSV or iCalendar file into the current tasks"""
+        file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Sync Tasks",
+            "",
+            self.import_file_filter
+        )
+        
+        if file_path:
+            self.import_tasks_from_file(file_path, merge=True)
 
     def export_json_file_dialog(self):
-        """Open file dialog to export tasks to JSON file"""
+        """Open file dialog to export tasks as JSON, NDJSON or CSV"""
+        from task_export import EXPORT_FORMATS, format_for_path
+        
         if not self.tasks:
             QtWidgets.QMessageBox.information(
                 self,
@@ -1350,57 +1902,72 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             )
             return
         
-        file_path, _ = QtWidgets.QFileDialog.getSaveFileName(
+        filters = {
+            "JSON Files (*.json)": 'json',
+            "NDJSON Files (*.ndjson *.jsonl)": 'ndjson',
+            "CSV Files (*.csv)": 'csv',
+        }
+        file_path, selected_filter = QtWidgets.QFileDialog.getSaveFileName(
             self,
-            "Export Tasks to JSON",
+            "Export Tasks",
             f"tasks_{datetime.date.today().isoformat()}.json",
-            "JSON Files (*.json);;All Files (*)"
+            ";;".join(filters)
         )
         
         if file_path:
-            self.export_tasks_to_json(file_path)
+            # A known extension wins over the selected filter; otherwise add the filter's extension
+            export_format = filters.get(selected_filter, 'json')
+            if not os.path.splitext(file_path)[1]:
+                file_path += EXPORT_FORMATS[export_format][0]
+            self.export_tasks_to_file(file_path, format_for_path(file_path, export_format))
 
-    def export_tasks_to_json(self, file_path):
-        """Export current tasks to a JSON file"""
-        try:
-            # Prepare tasks data for export
-            tasks_data = []
-            for task_id, task_data in self.tasks.items():
-                tasks_data.append({
-                    "name": task_data['name'],
-                    "time": task_data['time'].isoformat()
-                })
-            
-            # Sort tasks by time
-            tasks_data.sort(key=lambda x: x['time'])
-            
-            # Create export data
-            export_data = {
-                "tasks": tasks_data,
-                "exported_date": datetime.date.today().isoformat(),
-                "exported_time": datetime.datetime.now().time().isoformat(),
-                "time_range": {
-                    "start_time": self.start_time.isoformat() if not self.is_focused else self.original_start_time.isoformat(),
-                    "end_time": self.end_time.isoformat() if not self.is_focused else self.original_end_time.isoformat()
-                }
-            }
-            
-            # Write to file
-            with open(file_path, 'w', encoding='utf-8') as file:
-                json.dump(export_data, file, indent=2, ensure_ascii=False)
-            
+    def export_tasks_to_file(self, file_path, export_format='json'):
+        """Export current tasks on a worker thread"""
+        from export_worker import ExportWorker
+        
+        if self.export_worker is not None:
             QtWidgets.QMessageBox.information(
                 self,
-                "Export Successful",
-                f"Successfully exported {len(tasks_data)} tasks to:\n{file_path}",
+                "Export Tasks",
+                "Another export is still running.",
                 QtWidgets.QMessageBox.Ok
             )
+            return
         
-        except Exception as e:
+        # Snapshot the tasks; sorting and writing happen on the worker thread
+        rows = [(self.tasks.external_id(task.id), task.time.isoformat(), task.name) for task in self.tasks.values()]
+        metadata = {
+            "exported_date": datetime.date.today().isoformat(),
+            "exported_time": datetime.datetime.now().time().isoformat(),
+            "time_range": {
+                "start_time": self.start_time.isoformat() if not self.is_focused else self.original_start_time.isoformat(),
+                "end_time": self.end_time.isoformat() if not self.is_focused else self.original_end_time.isoformat()
+            }
+        }
+        
+        worker = ExportWorker(file_path, rows, export_format, metadata)
+        worker.signals.finished.connect(
+            lambda count, error_message: self.handle_export_finished(file_path, count, error_message)
+        )
+        self.export_worker = worker
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def handle_export_finished(self, file_path, count, error_message):
+        """Report the result of a finished export"""
+        self.export_worker = None
+        
+        if error_message:
             QtWidgets.QMessageBox.critical(
                 self,
                 "Export Error",
-                f"Error exporting tasks to JSON file:\n{str(e)}",
+                f"Error exporting tasks to file:\n{error_message}",
+                QtWidgets.QMessageBox.Ok
+            )
+        else:
+            QtWidgets.QMessageBox.information(
+                self,
+                "Export Successful",
+                f"Successfully exported {count} tasks to:\n{file_path}",
                 QtWidgets.QMessageBox.Ok
             )
 
@@ -1413,7 +1980,9 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             super().keyPressEvent(event)
 
     def paste_json_from_clipboard(self):
-        """Paste and import JSON content from clipboard"""
+        """Paste and import JSON, NDJSON, CSV or iCalendar content from clipboard"""
+        from task_import import sniff_format
+        
         clipboard = QtWidgets.QApplication.clipboard()
         clipboard_text = clipboard.text()
         
@@ -1426,154 +1995,11 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             )
             return
         
-        try:
-            # Try to parse the clipboard content as JSON
-            data = json.loads(clipboard_text)
-            
-            # Handle different JSON structures (same as file import)
-            tasks_data = []
-            
-            if isinstance(data, list):
-                # JSON is a list of tasks
-                tasks_data = data
-            elif isinstance(data, dict):
-                # JSON is an object, look for common keys that might contain tasks
-                if 'tasks' in data:
-                    tasks_data = data['tasks']
-                elif 'events' in data:
-                    tasks_data = data['events']
-                elif 'items' in data:
-                    tasks_data = data['items']
-                else:
-                    # Treat the object itself as a single task
-                    tasks_data = [data]
-            
-            imported_count = 0
-            skipped_count = 0
-            
-            for task_data in tasks_data:
-                if not isinstance(task_data, dict):
-                    skipped_count += 1
-                    continue
-                
-                # Extract name and time from the task data
-                name = None
-                time_str = None
-                
-                # Look for name field (try different common field names)
-                for name_field in ['name', 'title', 'task', 'description', 'label']:
-                    if name_field in task_data and task_data[name_field]:
-                        name = str(task_data[name_field])
-                        break
-                
-                # Look for time field (try different common field names)
-                for time_field in ['time', 'start_time', 'start', 'datetime', 'timestamp']:
-                    if time_field in task_data and task_data[time_field]:
-                        time_str = str(task_data[time_field])
-                        break
-                
-                if not name or not time_str:
-                    skipped_count += 1
-                    continue
-                
-                # Parse the time string (same logic as file import)
-                time_obj = None
-                try:
-                    # Try different time formats
-                    time_formats = [
-                        "%H:%M:%S",      # HH:MM:SS
-                        "%H:%M",         # HH:MM
-                        "%I:%M:%S %p",   # 12-hour format with seconds
-                        "%I:%M %p",      # 12-hour format without seconds
-                        "%Y-%m-%d %H:%M:%S",  # Full datetime
-                        "%Y-%m-%dT%H:%M:%S",  # ISO format
-                    ]
-                    
-                    for fmt in time_formats:
-                        try:
-                            if 'T' in time_str or ' ' in time_str:
-                                # Full datetime, extract time part
-                                dt = datetime.datetime.strptime(time_str, fmt)
-                                time_obj = dt.time()
-                            else:
-                                # Time only
-                                dt = datetime.datetime.strptime(time_str, fmt)
-                                time_obj = dt.time()
-                            break
-                        except ValueError:
-                            continue
-                    
-                    if time_obj is None:
-                        # Try parsing as ISO format time only
-                        try:
-                            time_obj = datetime.time.fromisoformat(time_str)
-                        except ValueError:
-                            pass
-                
-                except Exception:
-                    pass
-                
-                if time_obj is None:
-                    skipped_count += 1
-                    continue
-                
-                # Add the task
-                task_id = str(uuid.uuid4())
-                self.tasks[task_id] = {'time': time_obj, 'name': name}
-                
-                # Check if task time has already passed within the configured time range
-                if self.is_time_in_range(time_obj):
-                    now = datetime.datetime.now().time()
-                    if self.is_time_in_range(now):
-                        # Both task and current time are in range, compare progress
-                        current_progress = self.get_time_range_info()['progress']
-                        task_progress = self.time_to_progress(time_obj)
-                        
-                        # If current progress has passed task progress, mark as notified
-                        if current_progress > task_progress:
-                            self.notified_tasks.add(task_id)
-                
-                imported_count += 1
-            
-            # Save tasks and update display
-            if imported_count > 0:
-                self.save_tasks()
-                self.update()
-            
-            # Show result message
-            if imported_count > 0 or skipped_count > 0:
-                message = f"Clipboard import completed!\n\nImported: {imported_count} tasks"
-                if skipped_count > 0:
-                    message += f"\nSkipped: {skipped_count} entries (missing name or time)"
-                
-                QtWidgets.QMessageBox.information(
-                    self,
-                    "Clipboard Import",
-                    message,
-                    QtWidgets.QMessageBox.Ok
-                )
-            else:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Clipboard Import",
-                    "No valid tasks found in the clipboard JSON.\n\nExpected format:\n- 'name' field for task name\n- 'time' field for task time",
-                    QtWidgets.QMessageBox.Ok
-                )
-        
-        except json.JSONDecodeError as e:
-            QtWidgets.QMessageBox.critical(
-                self,
-                "Clipboard Import Error",
-                f"Invalid JSON format in clipboard:\n{str(e)}\n\nMake sure you've copied valid JSON content.",
-                QtWidgets.QMessageBox.Ok
-            )
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(
-                self,
-                "Import Error",
-                f"Error importing tasks from clipboard:\n{str(e)}",
-                QtWidgets.QMessageBox.Ok
-            )
+        # Same pipeline as file import
+        import_format = sniff_format(clipboard_text)
+        data = clipboard_text.encode('utf-8')
+        self.import_tasks(lambda: io.BytesIO(data), len(data), "Clipboard Import",
+                          f"the clipboard {import_format.upper()}", import_format=import_format)
 
     def draw_drag_preview(self, painter, rect):
         """Draw preview of task being dragged"""
@@ -1599,8 +2025,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             # Draw time text above/below the line
             time_str = self.drag_preview_time.strftime("%H:%M:%S")
             painter.setPen(QtGui.QColor(255, 165, 0))  # Orange text
-            font = QtGui.QFont("Arial", 10, QtGui.QFont.Bold)
-            painter.setFont(font)
+            painter.setFont(self.drag_font)
             
             text_rect = painter.fontMetrics().boundingRect(time_str)
             text_x = max(0, min(x - text_rect.width() // 2, rect.width() - text_rect.width()))
@@ -1620,8 +2045,7 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             # Draw time text beside the line
             time_str = self.drag_preview_time.strftime("%H:%M:%S")
             painter.setPen(QtGui.QColor(255, 165, 0))  # Orange text
-            font = QtGui.QFont("Arial", 10, QtGui.QFont.Bold)
-            painter.setFont(font)
+            painter.setFont(self.drag_font)
             
             text_rect = painter.fontMetrics().boundingRect(time_str)
             text_y = max(text_rect.height(), min(y + text_rect.height() // 2, rect.height()))
@@ -1634,8 +2058,97 @@ class AnimatedToggleClockBar(QtWidgets.QWidget):
             painter.drawText(text_x, text_y, time_str)
 
 
+CLIENT_COMMANDS = ("add", "import", "list")
+CLIENT_USAGE = """usage: main.py add TIME NAME [TIME NAME ...]
+       main.py import FILE
+       main.py list"""
+
+
+def read_import_batches(file_path, reader_options=None, batch_size=10000):
+    """Yield lists of task records read from a JSON, NDJSON, CSV or iCalendar file"""
+    from task_import import RECORD_READERS, import_format_for_path
+    
+    read_records = RECORD_READERS[import_format_for_path(file_path) or 'json']
+    batch = []
+    with open(file_path, 'rb') as file:
+        for record in read_records(file, **(reader_options or {})):
+            # Malformed lines still go to the instance, which counts them as skipped
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def run_client(args):
+    """Command-line client: add, import or list tasks of the running instance, without a GUI"""
+    from command_server import send_requests
+    from task_import import import_format_for_path
+    
+    app = QtCore.QCoreApplication(sys.argv)
+    command = args[0]
+    if command == "add" and len(args) >= 3 and len(args) % 2 == 1:
+        requests = [{"command": "add", "tasks": [{"time": time_str, "name": name}
+                                                 for time_str, name in zip(args[1::2], args[2::2])]}]
+    elif command == "import" and len(args) == 2:
+        reader_options = None
+        if import_format_for_path(args[1]) == 'ics':
+            # Calendars are expanded for the running instance's day and range, like in the import dialog
+            try:
+                window = send_requests([{"command": "window"}])[0]
+            except OSError as e:
+                print(e, file=sys.stderr)
+                return 1
+            if not window.get("ok"):
+                print(f"Error: {window.get('error')}", file=sys.stderr)
+                return 1
+            reader_options = {'date': datetime.date.fromisoformat(window["date"]),
+                              'time_range': TimeRange(*window["time_range"])}
+        try:
+            # Every batch is sent before the first response is read
+            requests = [{"command": "add", "tasks": batch} for batch in read_import_batches(args[1], reader_options)]
+        except (OSError, ValueError) as e:
+            print(f"Error reading {args[1]}: {e}", file=sys.stderr)
+            return 1
+    elif command == "list" and len(args) == 1:
+        requests = [{"command": "list"}]
+    else:
+        print(CLIENT_USAGE, file=sys.stderr)
+        return 2
+    
+    try:
+        responses = send_requests(requests) if requests else []
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    
+    added_count = skipped_count = 0
+    for response in responses:
+        if not response.get("ok"):
+            print(f"Error: {response.get('error')}", file=sys.stderr)
+            return 1
+        if command == "list":
+            for task in response["tasks"]:
+                print(f"{task['time']}  {task['name']}")
+        else:
+            added_count += response["added"]
+            skipped_count += response["skipped"]
+    
+    if command != "list":
+        print(f"Added {added_count} tasks" + (f" ({skipped_count} skipped)" if skipped_count else ""))
+    return 0
+
+
 def main():
+    # Client mode talks to the running instance and never opens a window
+    if len(sys.argv) > 1 and sys.argv[1] in CLIENT_COMMANDS:
+        sys.exit(run_client(sys.argv[1:]))
+    
     app = QtWidgets.QApplication(sys.argv)
+    # Names used by QStandardPaths for the task database location
+    app.setOrganizationName("LinearClock")
+    app.setApplicationName("LinearClock")
     clock_bar = AnimatedToggleClockBar()
     sys.exit(app.exec())
 
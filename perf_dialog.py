@@ -0,0 +1,87 @@
+from PySide6 import QtCore, QtWidgets
+import datetime
+
+class PerformanceDialog(QtWidgets.QDialog):
+    """Shows the timing histograms collected in perf_stats"""
+
+    columns = ("Operation", "Count", "p50 (ms)", "p95 (ms)", "Max (ms)")
+
+    def __init__(self, parent=None, stats=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.setWindowTitle("Performance Stats")
+        self.setModal(True)
+        self.resize(480, 260)
+
+        layout = QtWidgets.QVBoxLayout(self)
+
+        self.table = QtWidgets.QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        # Buttons
+        button_layout = QtWidgets.QHBoxLayout()
+
+        reset_button = QtWidgets.QPushButton("Reset")
+        reset_button.clicked.connect(self.reset_stats)
+        button_layout.addWidget(reset_button)
+
+        save_button = QtWidgets.QPushButton("Save JSON...")
+        save_button.clicked.connect(self.save_stats)
+        button_layout.addWidget(save_button)
+
+        button_layout.addStretch()
+
+        close_button = QtWidgets.QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        close_button.setDefault(True)
+        button_layout.addWidget(close_button)
+
+        layout.addLayout(button_layout)
+
+        # Refresh while the dialog is open; nothing is summarized otherwise
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        """Fill the table from the current histogram summaries"""
+        snapshot = self.stats.snapshot()
+        self.table.setRowCount(len(snapshot))
+        for row, (name, summary) in enumerate(snapshot.items()):
+            values = (name, str(summary['count']), f"{summary['p50_ms']:.3f}",
+                      f"{summary['p95_ms']:.3f}", f"{summary['max_ms']:.3f}")
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem(value)
+                if column > 0:
+                    item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+    def reset_stats(self):
+        self.stats.reset()
+        self.refresh()
+
+    def save_stats(self):
+        """Dump the statistics to a JSON file"""
+        file_path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self,
+            "Save Performance Stats",
+            f"perf_stats_{datetime.datetime.now().strftime('%Y-%m-%d_%H%M%S')}.json",
+            "JSON Files (*.json);;All Files (*)"
+        )
+        if not file_path:
+            return
+
+        try:
+            self.stats.dump(file_path)
+        except OSError as e:
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Save Error",
+                f"Error saving performance stats:\n{str(e)}",
+                QtWidgets.QMessageBox.Ok
+            )
@@ -0,0 +1,136 @@
+import functools
+import json
+import threading
+import time
+
+# Sub-buckets per power of two; 4 gives bucket bounds within ~19% of each other
+SUB_BUCKETS = 4
+# Covers up to 2**40 ns (about 18 minutes)
+BUCKET_COUNT = 40 * SUB_BUCKETS
+
+
+def bucket_index(ns):
+    """Log-scale bucket of a duration in nanoseconds"""
+    bits = ns.bit_length()
+    if bits <= 2:
+        return ns
+    index = (bits - 2) * SUB_BUCKETS + ((ns >> (bits - 3)) & (SUB_BUCKETS - 1))
+    return min(index, BUCKET_COUNT - 1)
+
+
+def bucket_upper_bound(index):
+    """Largest duration (ns) that falls into a bucket"""
+    if index < SUB_BUCKETS:
+        return index
+    bits = index // SUB_BUCKETS + 2
+    sub = index % SUB_BUCKETS
+    return ((SUB_BUCKETS + sub + 1) << (bits - 3)) - 1
+
+
+class LatencyHistogram:
+    """Fixed-size log-scale histogram; recording is a few integer operations"""
+
+    def __init__(self):
+        self.buckets = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        self.buckets[bucket_index(ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, fraction):
+        """Upper bound (ns) of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count / 1e6 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) / 1e6,
+            "p95_ms": self.percentile(0.95) / 1e6,
+            "max_ms": self.max / 1e6,
+        }
+
+
+class PerfStats:
+    """Named latency histograms for the hot paths.
+
+    Histograms are created once and then only updated; each one is
+    normally fed by a single thread, so no lock is taken per sample.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def histogram(self, name):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            return histogram
+
+    def snapshot(self):
+        """Return {name: summary} sorted by name"""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+        return {name: histogram.summary() for name, histogram in histograms}
+
+    def reset(self):
+        with self.lock:
+            for name in self.histograms:
+                self.histograms[name].__init__()
+            self.started = time.time()
+
+    def dump(self, file_path):
+        """Write the current summaries and raw buckets to a JSON file"""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+        data = {
+            "since": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "dumped": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "stats": {name: histogram.summary() for name, histogram in histograms},
+            "buckets": {
+                name: {str(bucket_upper_bound(index)): count
+                       for index, count in enumerate(histogram.buckets) if count}
+                for name, histogram in histograms
+            },
+        }
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+
+
+# Process-wide statistics shown by the Performance stats dialog
+STATS = PerfStats()
+
+
+def timed(name):
+    """Decorator recording every call's duration into STATS under name"""
+    histogram = STATS.histogram(name)
+    perf_counter_ns = time.perf_counter_ns
+
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.record(perf_counter_ns() - start)
+        return wrapper
+
+    return decorate
@@ -0,0 +1,127 @@
+import sys
+import threading
+import time
+import traceback
+
+from perf_stats import timed
+
+
+class PersistenceWorker:
+    """Writes tasks and settings on a dedicated thread.
+
+    The GUI thread hands over immutable values (tuples and copied dicts).
+    Changes that arrive within debounce_ms of each other are coalesced:
+    only the latest state of each task and each setting key is written,
+    in one storage transaction and one settings sync per batch.
+    """
+
+    def __init__(self, storage, settings_factory, debounce_ms=500):
+        self.storage = storage
+        # Called on the worker thread to create its own QSettings instance
+        self.settings_factory = settings_factory
+        self.settings = None
+        self.debounce = debounce_ms / 1000.0
+
+        self.condition = threading.Condition()
+        self.pending_tasks = {}     # task_id -> (date, time, name), or None for a delete
+        self.pending_settings = {}  # key -> value
+        self.writing = False
+        self.flush_requested = False
+        self.stopped = False
+
+        self.thread = threading.Thread(target=self.run, name="persistence", daemon=True)
+        self.thread.start()
+
+    def put_tasks(self, date, rows):
+        """Queue (id, time, name) rows to be inserted or updated"""
+        with self.condition:
+            for task_id, time_str, name in rows:
+                self.pending_tasks[task_id] = (date, time_str, name)
+            self.condition.notify_all()
+
+    def delete_tasks(self, task_ids):
+        """Queue tasks to be deleted"""
+        with self.condition:
+            for task_id in task_ids:
+                self.pending_tasks[task_id] = None
+            self.condition.notify_all()
+
+    def put_settings(self, values):
+        """Queue settings values to be written"""
+        with self.condition:
+            self.pending_settings.update(values)
+            self.condition.notify_all()
+
+    def has_pending(self):
+        return bool(self.pending_tasks or self.pending_settings)
+
+    def flush(self):
+        """Write everything queued so far and wait until it is on disk"""
+        with self.condition:
+            self.flush_requested = True
+            self.condition.notify_all()
+            while (self.has_pending() or self.writing) and self.thread.is_alive():
+                self.condition.wait()
+            self.flush_requested = False
+
+    def close(self):
+        """Flush, stop the worker thread and close the storage"""
+        self.flush()
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.storage.close()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.has_pending() and not self.stopped:
+                    self.condition.wait()
+                if self.stopped and not self.has_pending():
+                    return
+
+                # Let a burst of changes settle, unless someone is waiting for a flush
+                deadline = time.monotonic() + self.debounce
+                while not self.flush_requested and not self.stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+                tasks, self.pending_tasks = self.pending_tasks, {}
+                settings, self.pending_settings = self.pending_settings, {}
+                self.flush_requested = False
+                self.writing = True
+
+            try:
+                self.write(tasks, settings)
+            except Exception:
+                traceback.print_exc(file=sys.stderr)
+
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+    @timed("save")
+    def write(self, tasks, settings):
+        """Apply one coalesced batch"""
+        if tasks:
+            deleted = [task_id for task_id, row in tasks.items() if row is None]
+            by_date = {}
+            for task_id, row in tasks.items():
+                if row is not None:
+                    date, time_str, name = row
+                    by_date.setdefault(date, []).append((task_id, time_str, name))
+
+            for date, rows in by_date.items():
+                self.storage.upsert_many(date, rows)
+            if deleted:
+                self.storage.delete_many(deleted)
+
+        if settings:
+            if self.settings is None:
+                self.settings = self.settings_factory()
+            for key, value in settings.items():
+                self.settings.setValue(key, value)
+            self.settings.sync()
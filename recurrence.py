@@ -0,0 +1,165 @@
+from collections import OrderedDict
+
+from task_store import Task
+from time_range import SECONDS_PER_DAY
+
+RULE_KINDS = ("daily", "weekdays", "interval")
+
+# Occurrence ids sit above every id ColumnarTaskStore hands out, so they never
+# collide with task ids and still fit the compact index's array('I') columns
+OCCURRENCE_ID_BASE = 1 << 31
+MAX_RULES = ((1 << 32) - OCCURRENCE_ID_BASE) // SECONDS_PER_DAY
+
+
+def occurrence_id(rule_id, seconds):
+    return OCCURRENCE_ID_BASE + rule_id * SECONDS_PER_DAY + seconds
+
+
+def is_occurrence_id(task_id):
+    return isinstance(task_id, int) and task_id >= OCCURRENCE_ID_BASE
+
+
+def split_occurrence_id(task_id):
+    """Return (rule_id, seconds) of an occurrence id"""
+    return divmod(task_id - OCCURRENCE_ID_BASE, SECONDS_PER_DAY)
+
+
+def window_segments(time_range):
+    """Split a TimeRange that may wrap past midnight into inclusive, non-wrapping (start, end) pieces"""
+    if time_range.wraps:
+        return [(time_range.start_seconds, SECONDS_PER_DAY - 1), (0, time_range.end_seconds)]
+    return [(time_range.start_seconds, time_range.end_seconds)]
+
+
+class RecurrenceRule:
+    """A task repeated every day, every weekday (Monday to Friday), or every
+    interval_minutes from seconds to until_seconds (within one day)"""
+
+    __slots__ = ('name', 'kind', 'seconds', 'until_seconds', 'interval_minutes')
+
+    def __init__(self, name, kind, seconds, until_seconds=None, interval_minutes=None):
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Unknown recurrence kind: {kind}")
+        if not 0 <= seconds < SECONDS_PER_DAY:
+            raise ValueError(f"Time of day out of range: {seconds}")
+        if kind == "interval":
+            if not interval_minutes or interval_minutes < 1:
+                raise ValueError("Interval rules need an interval of at least one minute")
+            if until_seconds is None or not seconds <= until_seconds < SECONDS_PER_DAY:
+                raise ValueError("Interval rules need an end time after their start time")
+        self.name = name
+        self.kind = kind
+        self.seconds = seconds
+        self.until_seconds = until_seconds
+        self.interval_minutes = interval_minutes
+
+    def __repr__(self):
+        return (f"RecurrenceRule({self.name!r}, {self.kind!r}, {self.seconds!r}, "
+                f"{self.until_seconds!r}, {self.interval_minutes!r})")
+
+    def occurs_on(self, date):
+        return self.kind != "weekdays" or date.weekday() < 5
+
+    def times_between(self, start_seconds, end_seconds):
+        """Yield the rule's times within an inclusive, non-wrapping window, ascending"""
+        if self.kind != "interval":
+            if start_seconds <= self.seconds <= end_seconds:
+                yield self.seconds
+            return
+
+        # Jump straight to the first step inside the window
+        step = self.interval_minutes * 60
+        first = max(start_seconds, self.seconds)
+        current = self.seconds + -(-(first - self.seconds) // step) * step
+        last = min(end_seconds, self.until_seconds)
+        while current <= last:
+            yield current
+            current += step
+
+    def to_dict(self):
+        data = {"name": self.name, "kind": self.kind, "seconds": self.seconds}
+        if self.kind == "interval":
+            data["until_seconds"] = self.until_seconds
+            data["interval_minutes"] = self.interval_minutes
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a rule from to_dict() output; raises ValueError, KeyError or TypeError if it is invalid"""
+        return cls(str(data["name"]), data["kind"], int(data["seconds"]),
+                   data.get("until_seconds"), data.get("interval_minutes"))
+
+
+class RecurrenceSchedule:
+    """Recurrence rules, expanded lazily per day and visible window.
+
+    A rule is only turned into occurrences when the task index is built for
+    a window, and only for the part of the day that window covers. The
+    expansions are kept in a small LRU cache, so toggling focus mode or
+    revisiting a range does not expand the rules again.
+    """
+
+    def __init__(self, max_cached=8):
+        self.rules = []  # Rule ids are positions in this list
+        self.cache = OrderedDict()  # (date, TimeRange) -> [(seconds, occurrence_id)]
+        self.max_cached = max_cached
+
+    def __len__(self):
+        return len(self.rules)
+
+    def set_rules(self, rules):
+        """Replace every rule; occurrence ids of the old rules become invalid"""
+        rules = list(rules)
+        if len(rules) > MAX_RULES:
+            raise ValueError(f"At most {MAX_RULES} recurrence rules are supported")
+        self.rules = rules
+        self.cache.clear()
+
+    def expand(self, date, time_range):
+        """(seconds, occurrence_id) pairs of every rule within time_range on date"""
+        key = (date, time_range)
+        entries = self.cache.get(key)
+        if entries is not None:
+            self.cache.move_to_end(key)
+            return entries
+
+        entries = []
+        segments = window_segments(time_range)
+        for rule_id, rule in enumerate(self.rules):
+            if rule.occurs_on(date):
+                for segment_start, segment_end in segments:
+                    entries.extend((seconds, occurrence_id(rule_id, seconds))
+                                   for seconds in rule.times_between(segment_start, segment_end))
+
+        self.cache[key] = entries
+        while len(self.cache) > self.max_cached:
+            self.cache.popitem(last=False)
+        return entries
+
+    def occurrence(self, task_id):
+        """A read-only Task for an occurrence id, or None if its rule no longer exists"""
+        rule_id, seconds = split_occurrence_id(task_id)
+        if rule_id >= len(self.rules):
+            return None
+        return Task(task_id, seconds, self.rules[rule_id].name)
+
+    def dump(self):
+        """JSON text of the rules, as stored in the settings"""
+        import json
+        return json.dumps([rule.to_dict() for rule in self.rules])
+
+    def load(self, text):
+        """Replace the rules with the ones in dump() output, skipping invalid entries"""
+        import json
+        try:
+            data = json.loads(text) if text else []
+        except ValueError:
+            data = []
+
+        rules = []
+        for item in data if isinstance(data, list) else []:
+            try:
+                rules.append(RecurrenceRule.from_dict(item))
+            except (ValueError, KeyError, TypeError):
+                pass  # Skip invalid rules
+        self.set_rules(rules[:MAX_RULES])
@@ -0,0 +1,180 @@
+from PySide6 import QtCore, QtWidgets
+
+from recurrence import RecurrenceRule
+from time_range import seconds_to_time
+
+KIND_LABELS = (("daily", "Every day"), ("weekdays", "Weekdays (Mon-Fri)"), ("interval", "Every N minutes"))
+
+
+def describe_rule(rule):
+    """One-line summary of a rule for the rule list"""
+    start = seconds_to_time(rule.seconds).strftime("%H:%M:%S")
+    if rule.kind == "interval":
+        until = seconds_to_time(rule.until_seconds).strftime("%H:%M:%S")
+        return f"{rule.name} - every {rule.interval_minutes} min, {start} to {until}"
+    if rule.kind == "weekdays":
+        return f"{rule.name} - weekdays at {start}"
+    return f"{rule.name} - daily at {start}"
+
+
+def qtime_seconds(time_edit):
+    qt_time = time_edit.time()
+    return qt_time.hour() * 3600 + qt_time.minute() * 60 + qt_time.second()
+
+
+def set_qtime(time_edit, seconds):
+    time_obj = seconds_to_time(seconds)
+    time_edit.setTime(QtCore.QTime(time_obj.hour, time_obj.minute, time_obj.second))
+
+
+class RecurrenceDialog(QtWidgets.QDialog):
+    """Lists the recurrence rules and edits them"""
+
+    def __init__(self, parent=None, rules=()):
+        super().__init__(parent)
+        self.rules = list(rules)
+        self.setWindowTitle("Recurring Tasks")
+        self.setModal(True)
+        self.resize(420, 360)
+
+        layout = QtWidgets.QVBoxLayout(self)
+
+        self.rule_list = QtWidgets.QListWidget()
+        self.rule_list.currentRowChanged.connect(self.show_rule)
+        layout.addWidget(self.rule_list)
+
+        # Rule editor
+        form_group = QtWidgets.QGroupBox("Rule")
+        form_layout = QtWidgets.QFormLayout(form_group)
+
+        self.name_edit = QtWidgets.QLineEdit()
+        self.name_edit.setPlaceholderText("Enter task name...")
+        form_layout.addRow("Task:", self.name_edit)
+
+        self.kind_combo = QtWidgets.QComboBox()
+        for kind, label in KIND_LABELS:
+            self.kind_combo.addItem(label, kind)
+        self.kind_combo.currentIndexChanged.connect(self.update_fields)
+        form_layout.addRow("Repeat:", self.kind_combo)
+
+        self.time_edit = QtWidgets.QTimeEdit()
+        self.time_edit.setDisplayFormat("HH:mm:ss")
+        form_layout.addRow("At / from:", self.time_edit)
+
+        self.until_edit = QtWidgets.QTimeEdit()
+        self.until_edit.setDisplayFormat("HH:mm:ss")
+        self.until_edit.setTime(QtCore.QTime(17, 0, 0))
+        form_layout.addRow("Until:", self.until_edit)
+
+        self.interval_spin = QtWidgets.QSpinBox()
+        self.interval_spin.setRange(1, 24 * 60)
+        self.interval_spin.setValue(60)
+        self.interval_spin.setSuffix(" min")
+        form_layout.addRow("Every:", self.interval_spin)
+
+        layout.addWidget(form_group)
+
+        # Rule buttons
+        rule_button_layout = QtWidgets.QHBoxLayout()
+
+        add_button = QtWidgets.QPushButton("Add")
+        add_button.clicked.connect(self.add_rule)
+        rule_button_layout.addWidget(add_button)
+
+        self.update_button = QtWidgets.QPushButton("Update")
+        self.update_button.clicked.connect(self.update_rule)
+        rule_button_layout.addWidget(self.update_button)
+
+        self.remove_button = QtWidgets.QPushButton("Remove")
+        self.remove_button.clicked.connect(self.remove_rule)
+        rule_button_layout.addWidget(self.remove_button)
+
+        rule_button_layout.addStretch()
+        layout.addLayout(rule_button_layout)
+
+        # Buttons
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addStretch()
+
+        cancel_button = QtWidgets.QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_button)
+
+        ok_button = QtWidgets.QPushButton("OK")
+        ok_button.clicked.connect(self.accept)
+        ok_button.setDefault(True)
+        button_layout.addWidget(ok_button)
+
+        layout.addLayout(button_layout)
+
+        self.refresh_list()
+        self.update_fields()
+
+    def refresh_list(self, current_row=-1):
+        self.rule_list.clear()
+        for rule in self.rules:
+            self.rule_list.addItem(describe_rule(rule))
+        self.rule_list.setCurrentRow(current_row)
+        self.update_button.setEnabled(current_row >= 0)
+        self.remove_button.setEnabled(current_row >= 0)
+
+    def update_fields(self):
+        """Only interval rules use the until time and the interval"""
+        is_interval = self.kind_combo.currentData() == "interval"
+        self.until_edit.setEnabled(is_interval)
+        self.interval_spin.setEnabled(is_interval)
+
+    def show_rule(self, row):
+        """Load the selected rule into the editor"""
+        self.update_button.setEnabled(row >= 0)
+        self.remove_button.setEnabled(row >= 0)
+        if row < 0:
+            return
+
+        rule = self.rules[row]
+        self.name_edit.setText(rule.name)
+        self.kind_combo.setCurrentIndex(self.kind_combo.findData(rule.kind))
+        set_qtime(self.time_edit, rule.seconds)
+        if rule.kind == "interval":
+            set_qtime(self.until_edit, rule.until_seconds)
+            self.interval_spin.setValue(rule.interval_minutes)
+
+    def rule_from_fields(self):
+        """Build a rule from the editor, or show why it is invalid and return None"""
+        name = self.name_edit.text().strip()
+        if not name:
+            QtWidgets.QMessageBox.warning(self, "Recurring Tasks", "Please enter a task name.")
+            return None
+
+        kind = self.kind_combo.currentData()
+        try:
+            if kind == "interval":
+                return RecurrenceRule(name, kind, qtime_seconds(self.time_edit),
+                                      qtime_seconds(self.until_edit), self.interval_spin.value())
+            return RecurrenceRule(name, kind, qtime_seconds(self.time_edit))
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, "Recurring Tasks", str(e))
+            return None
+
+    def add_rule(self):
+        rule = self.rule_from_fields()
+        if rule is not None:
+            self.rules.append(rule)
+            self.refresh_list(len(self.rules) - 1)
+
+    def update_rule(self):
+        row = self.rule_list.currentRow()
+        rule = self.rule_from_fields() if row >= 0 else None
+        if rule is not None:
+            self.rules[row] = rule
+            self.refresh_list(row)
+
+    def remove_rule(self):
+        row = self.rule_list.currentRow()
+        if row >= 0:
+            del self.rules[row]
+            self.refresh_list(min(row, len(self.rules) - 1))
+
+    def get_rules(self):
+        """Returns the edited list of rules"""
+        return list(self.rules)
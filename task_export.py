@@ -0,0 +1,89 @@
+import csv
+import json
+import os
+
+# Export formats and the file extensions that select them
+EXPORT_FORMATS = {
+    'json': ('.json',),
+    'ndjson': ('.ndjson', '.jsonl'),
+    'csv': ('.csv',),
+}
+
+
+def format_for_path(file_path, default='json'):
+    """Pick the export format from the file extension"""
+    extension = os.path.splitext(file_path)[1].lower()
+    for export_format, extensions in EXPORT_FORMATS.items():
+        if extension in extensions:
+            return export_format
+    return default
+
+
+def _indent(text, prefix):
+    """Indent every line after the first, matching json.dump's nesting"""
+    return text.replace('\n', '\n' + prefix)
+
+
+def write_json(file, rows, metadata):
+    """Pretty JSON, byte for byte what json.dump(indent=2, ensure_ascii=False) writes"""
+    file.write('{\n  "tasks": [')
+    separator = '\n    '
+    for task_id, time_str, name in rows:
+        task = {"id": task_id, "name": name, "time": time_str}
+        file.write(separator + _indent(json.dumps(task, indent=2, ensure_ascii=False), '    '))
+        separator = ',\n    '
+    file.write('\n  ]' if separator != '\n    ' else ']')
+
+    for key, value in metadata.items():
+        file.write(f',\n  {json.dumps(key, ensure_ascii=False)}: '
+                   + _indent(json.dumps(value, indent=2, ensure_ascii=False), '  '))
+    file.write('\n}')
+
+
+def write_ndjson(file, rows, metadata):
+    """One compact JSON object per line, so the file can be tailed or bulk-loaded"""
+    for task_id, time_str, name in rows:
+        file.write(json.dumps({"id": task_id, "name": name, "time": time_str},
+                              ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+def write_csv(file, rows, metadata):
+    writer = csv.writer(file)
+    writer.writerow(("id", "time", "name"))
+    writer.writerows(rows)
+
+
+WRITERS = {
+    'json': write_json,
+    'ndjson': write_ndjson,
+    'csv': write_csv,
+}
+
+
+def export_tasks(file_path, rows, export_format='json', metadata=None):
+    """Write (id, time, name) rows, sorted by time, to file_path and return how many were written.
+
+    The export is streamed to a temporary file next to the target, which
+    replaces the target only once it is complete and synced, so a crash
+    never leaves a truncated export behind. metadata is only written by
+    the JSON format.
+    """
+    rows = sorted(rows, key=lambda row: row[1])
+    temp_path = file_path + ".tmp"
+    # CSV rows are terminated by the csv module itself
+    newline = '' if export_format == 'csv' else None
+
+    try:
+        with open(temp_path, 'w', encoding='utf-8', newline=newline) as file:
+            WRITERS[export_format](file, rows, metadata or {})
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    return len(rows)
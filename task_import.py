@@ -0,0 +1,419 @@
+import codecs
+import csv
+import datetime
+import io
+import json
+import os
+import re
+
+from ics_import import iter_ics_records
+
+# Import formats and the file extensions that select them
+IMPORT_FORMATS = {
+    'json': ('.json',),
+    'ndjson': ('.ndjson', '.jsonl'),
+    'csv': ('.csv',),
+    'ics': ('.ics', '.ical'),
+}
+
+# Keys of a top-level JSON object that may hold the list of tasks
+TASK_LIST_KEYS = ('tasks', 'events', 'items')
+
+
+# Field names probed for the task name and time, in priority order
+NAME_FIELDS = ('name', 'title', 'task', 'description', 'label')
+TIME_FIELDS = ('time', 'start_time', 'start', 'datetime', 'timestamp')
+
+# Time formats tried in order by the slow path
+TIME_FORMATS = (
+    "%H:%M:%S",      # HH:MM:SS
+    "%H:%M",         # HH:MM
+    "%I:%M:%S %p",   # 12-hour format with seconds
+    "%I:%M %p",      # 12-hour format without seconds
+    "%Y-%m-%d %H:%M:%S",  # Full datetime
+    "%Y-%m-%dT%H:%M:%S",  # ISO format
+)
+
+
+def _clock_time(hour, minute, second=0):
+    return datetime.time(int(hour), int(minute), int(second))
+
+
+def _twelve_hour_time(hour, minute, second, meridiem):
+    hour = int(hour)
+    if not 1 <= hour <= 12:
+        raise ValueError("hour must be in 1..12")
+    hour %= 12
+    if meridiem.upper() == 'PM':
+        hour += 12
+    return datetime.time(hour, int(minute), int(second))
+
+
+def _datetime_time(year, month, day, hour, minute, second):
+    # Validate the date part like strptime does
+    datetime.date(int(year), int(month), int(day))
+    return _clock_time(hour, minute, second)
+
+
+# Precompiled equivalents of TIME_FORMATS for the fast path. A match that
+# fails validation falls back to the slow path, so both always agree.
+TIME_PATTERNS = (
+    (re.compile(r'(\d{1,2}):(\d{1,2}):(\d{1,2})'), lambda m: _clock_time(*m.groups())),
+    (re.compile(r'(\d{1,2}):(\d{1,2})'), lambda m: _clock_time(*m.groups())),
+    (re.compile(r'(\d{1,2}):(\d{1,2}):(\d{1,2}) ([AaPp][Mm])'), lambda m: _twelve_hour_time(*m.groups())),
+    (re.compile(r'(\d{1,2}):(\d{1,2}) ([AaPp][Mm])'),
+     lambda m: _twelve_hour_time(m.group(1), m.group(2), 0, m.group(3))),
+    (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2}) (\d{1,2}):(\d{1,2}):(\d{1,2})'), lambda m: _datetime_time(*m.groups())),
+    (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})T(\d{1,2}):(\d{1,2}):(\d{1,2})'), lambda m: _datetime_time(*m.groups())),
+)
+
+
+def _first_field(task_data, fields):
+    """Return (field, value as str) of the first field with a truthy value"""
+    for field in fields:
+        if field in task_data and task_data[field]:
+            return field, str(task_data[field])
+    return None, None
+
+
+def _parse_time_slow(time_str):
+    """Try every time format in order; returns (time_obj, format_index) or (None, None)"""
+    for index, fmt in enumerate(TIME_FORMATS):
+        try:
+            return datetime.datetime.strptime(time_str, fmt).time(), index
+        except ValueError:
+            continue
+
+    # Try parsing as ISO format time only
+    try:
+        return datetime.time.fromisoformat(time_str), None
+    except ValueError:
+        return None, None
+
+
+class TaskRecordParser:
+    """Shared parser for imported task records (file, drag-and-drop, clipboard).
+
+    The field names and the time format of the last row that needed the
+    slow path (probing every field and format in order) are remembered, and
+    following rows are first tried with direct lookups and the matching
+    precompiled pattern. Rows the fast path cannot handle use the slow path.
+    """
+
+    # Parsed time strings are cached; a day has at most 86400 distinct times
+    time_cache_size = 100000
+
+    def __init__(self):
+        self.time_cache = {}
+        self.name_field = None
+        self.time_field = None
+        self.time_pattern = None
+        # Higher-priority fields that must be empty for the learned field to be the one used
+        self.name_shadowing = ()
+        self.time_shadowing = ()
+
+    def parse(self, task_data):
+        """Return (name, time_obj) for a task record, or None if it should be skipped"""
+        if not isinstance(task_data, dict):
+            return None
+
+        if self.name_field is not None:
+            parsed = self.parse_fast(task_data)
+            if parsed is not None:
+                return parsed
+        return self.parse_slow(task_data)
+
+    def parse_fast(self, task_data):
+        name = task_data.get(self.name_field)
+        time_value = task_data.get(self.time_field)
+        if not name or not time_value or self.time_pattern is None:
+            return None
+        if self.name_shadowing and any(task_data.get(field) for field in self.name_shadowing):
+            return None
+        if self.time_shadowing and any(task_data.get(field) for field in self.time_shadowing):
+            return None
+
+        time_str = str(time_value)
+        time_obj = self.time_cache.get(time_str)
+        if time_obj is None:
+            match = self.time_pattern[0].fullmatch(time_str)
+            if match is None:
+                return None
+            try:
+                time_obj = self.time_pattern[1](match)
+            except ValueError:
+                return None
+
+            if len(self.time_cache) >= self.time_cache_size:
+                self.time_cache.clear()
+            self.time_cache[time_str] = time_obj
+
+        return str(name), time_obj
+
+    def parse_slow(self, task_data):
+        name_field, name = _first_field(task_data, NAME_FIELDS)
+        time_field, time_str = _first_field(task_data, TIME_FIELDS)
+        if not name or not time_str:
+            return None
+
+        time_obj, format_index = _parse_time_slow(time_str)
+        if time_obj is None:
+            return None
+
+        # Learn the mapping and format for the rows that follow
+        self.name_field = name_field
+        self.time_field = time_field
+        self.name_shadowing = NAME_FIELDS[:NAME_FIELDS.index(name_field)]
+        self.time_shadowing = TIME_FIELDS[:TIME_FIELDS.index(time_field)]
+        self.time_pattern = TIME_PATTERNS[format_index] if format_index is not None else None
+
+        return name, time_obj
+
+
+class _JsonStream:
+    """Incrementally decoded JSON text, read from a binary file in chunks"""
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read the next chunk, dropping the part of the buffer that was already consumed"""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(chunk, final=not chunk)
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ('' at the end)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        """Consume one of chars (after whitespace) and return it"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        if self.peek() in '-0123456789':
+            # A bare number may continue in the next chunk, so read on until a delimiter
+            while not self.eof and not any(char in ',]} \t\r\n' for char in self.buffer[self.pos:]):
+                self.fill()
+
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Only a value cut off by the end of the chunk is worth reading on for;
+                # anything else is a syntax error and would load the rest of the file
+                if self.ran_out(e) and self.fill():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+    def ran_out(self, error):
+        """Whether a decode error was caused by the buffer ending mid-value"""
+        if error.msg.startswith('Unterminated string'):
+            return True
+        # A cut-off literal, number or escape leaves a short tail without delimiters
+        tail = self.buffer[error.pos:]
+        return len(tail) < 16 and not any(char in '[]{},:" \t\r\n' for char in tail)
+
+    def array_items(self):
+        """Yield the items of the array whose '[' was just consumed"""
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_json_records(file, chunk_size=64 * 1024):
+    """Yield task records from a JSON document one at a time.
+
+    file is a binary file object. The document may be a list of tasks, an
+    object holding the list under 'tasks', 'events' or 'items' (the first
+    one present is used), or a single task object. Only one record is
+    decoded at a time, so memory stays bounded for very large files.
+    """
+    stream = _JsonStream(file, chunk_size)
+
+    first = stream.peek()
+    if first == '[':
+        # JSON is a list of tasks
+        stream.pos += 1
+        yield from stream.array_items()
+    elif first == '{':
+        # JSON is an object, look for common keys that might contain tasks
+        stream.pos += 1
+        fields = {}
+        if stream.peek() == '}':
+            stream.pos += 1
+        else:
+            while True:
+                key = stream.value()
+                stream.expect(':')
+                if key in TASK_LIST_KEYS:
+                    if stream.peek() == '[':
+                        stream.pos += 1
+                        yield from stream.array_items()
+                    else:
+                        yield stream.value()
+                    return
+                fields[key] = stream.value()
+                if stream.expect(',}') == '}':
+                    break
+
+        # Treat the object itself as a single task
+        yield fields
+    else:
+        # Scalars hold no tasks, but invalid documents should still raise
+        stream.value()
+
+
+def iter_ndjson_records(file):
+    """Yield task records from line-delimited JSON, one line at a time.
+
+    Blank lines are ignored. A line that is not valid JSON (or not UTF-8)
+    yields None, so the caller can count it as skipped and carry on.
+    """
+    first = True
+    for line in file:
+        if first:
+            line = line.removeprefix(codecs.BOM_UTF8)
+            first = False
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def iter_csv_records(file):
+    """Yield task records from CSV with a header row, one row at a time.
+
+    Header names are matched case-insensitively against the same fields as
+    JSON records (name, time, ...). A row the csv module rejects yields None.
+    """
+    reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', errors='replace', newline=''))
+    header = None
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error:
+            yield None
+            continue
+
+        if header is None:
+            header = [field.strip().lower() for field in row]
+            continue
+        if row:
+            yield dict(zip(header, row))
+
+
+RECORD_READERS = {
+    'json': iter_json_records,
+    'ndjson': iter_ndjson_records,
+    'csv': iter_csv_records,
+    'ics': iter_ics_records,
+}
+
+
+def import_format_for_path(file_path):
+    """Pick the import format from the file extension, or None if it is not supported"""
+    extension = os.path.splitext(file_path)[1].lower()
+    for import_format, extensions in IMPORT_FORMATS.items():
+        if extension in extensions:
+            return import_format
+    return None
+
+
+def sniff_format(text):
+    """Guess the format of pasted text: 'json', 'ndjson', 'csv' or 'ics'"""
+    stripped = text.lstrip()
+    if stripped[:15].upper() == 'BEGIN:VCALENDAR':
+        return 'ics'
+    first_line, _, rest = stripped.partition('\n')
+    first_line = first_line.strip()
+    if first_line.startswith('{'):
+        # One object per line, unless the only line is a compact {"tasks": [...]} document
+        try:
+            first_object = json.loads(first_line)
+        except ValueError:
+            return 'json'
+        second_line = rest.lstrip().partition('\n')[0].strip()
+        if second_line:
+            try:
+                return 'ndjson' if isinstance(json.loads(second_line), dict) else 'json'
+            except ValueError:
+                return 'json'
+        if isinstance(first_object, dict) and not any(key in first_object for key in TASK_LIST_KEYS):
+            return 'ndjson'
+        return 'json'
+    if stripped.startswith('['):
+        return 'json'
+    if ',' in first_line:
+        return 'csv'
+    # Let the JSON parser report what is wrong
+    return 'json'
+
+
+class ImportMergeIndex:
+    """Hash index over the existing tasks, used by merge (sync) imports.
+
+    Incoming rows are matched by task id first, which exported files carry,
+    and then by their exact (seconds, name) pair. Lookups check the current
+    task data, so entries made stale by edits during an import never match.
+    """
+
+    def __init__(self, tasks):
+        self.by_key = {}  # (seconds, name) -> task_id
+        for task in tasks.values():
+            self.by_key.setdefault((task.seconds, task.name), task.id)
+
+    def classify(self, tasks, import_id, name, seconds):
+        """Return ('new', None), ('unchanged', task_id) or ('updated', task_id) for a row"""
+        existing_id = tasks.id_for(import_id) if import_id is not None else None
+        if existing_id is not None:
+            existing = tasks[existing_id]
+            if existing.seconds == seconds and existing.name == name:
+                return 'unchanged', existing_id
+            return 'updated', existing_id
+
+        task_id = self.by_key.get((seconds, name))
+        if task_id is not None:
+            task = tasks.get(task_id)
+            if task is not None and task.seconds == seconds and task.name == name:
+                return 'unchanged', task_id
+        return 'new', None
+
+    def add(self, task_id, name, seconds):
+        self.by_key.setdefault((seconds, name), task_id)
+
+    def remove(self, task_id, name, seconds):
+        if self.by_key.get((seconds, name)) == task_id:
+            del self.by_key[(seconds, name)]
@@ -0,0 +1,240 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+# Ids at or above this are not store codes (recurring occurrences) and are kept in a dict
+DENSE_ID_LIMIT = 1 << 31
+
+
+class CompactOffsets:
+    """task_id -> offset map for small integer ids, kept in an array (-1 means absent)"""
+
+    def __init__(self):
+        self.values = array('i')
+        self.sparse = {}
+
+    def get(self, task_id, default=None):
+        if task_id is None:
+            return default
+        if task_id >= DENSE_ID_LIMIT:
+            return self.sparse.get(task_id, default)
+        if not 0 <= task_id < len(self.values):
+            return default
+        offset = self.values[task_id]
+        return default if offset < 0 else offset
+
+    def __contains__(self, task_id):
+        return self.get(task_id) is not None
+
+    def __setitem__(self, task_id, offset):
+        if task_id >= DENSE_ID_LIMIT:
+            self.sparse[task_id] = offset
+            return
+        missing = task_id + 1 - len(self.values)
+        if missing > 0:
+            self.values.extend(array('i', [-1]) * missing)
+        self.values[task_id] = offset
+
+    def pop(self, task_id, default=None):
+        if task_id is not None and task_id >= DENSE_ID_LIMIT:
+            return self.sparse.pop(task_id, default)
+        offset = self.get(task_id)
+        if offset is None:
+            return default
+        self.values[task_id] = -1
+        return offset
+
+    def items(self):
+        yield from ((task_id, offset) for task_id, offset in enumerate(self.values) if offset >= 0)
+        yield from self.sparse.items()
+
+
+class TaskIndex:
+    """Tasks kept sorted by seconds into the configured time range.
+
+    A cursor points at the first task that is still ahead of the last
+    checked offset (the watermark), so checking for due tasks only looks
+    at the head of the pending part of the index.
+    """
+
+    def __init__(self, compact=False):
+        # Compact indexes hold integer ids (ColumnarTaskStore) in arrays instead of lists and dicts
+        self.compact = compact
+        self.keys = array('i') if compact else []       # Offsets in seconds, sorted ascending
+        self.ids = array('I') if compact else []        # Task ids, parallel to keys
+        self.offsets = CompactOffsets() if compact else {}  # task_id -> offset, used to locate entries on removal
+        self.cursor = 0
+        self.watermark = -1
+        self.version = 0    # Bumped on every change so derived caches can be invalidated
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, task_id):
+        return task_id in self.offsets
+
+    def rebuild(self, entries, watermark=-1):
+        """Replace the index with (offset, task_id) pairs and seek to watermark"""
+        entries = sorted(entries, key=itemgetter(0))
+        keys = map(itemgetter(0), entries)
+        ids = map(itemgetter(1), entries)
+        if self.compact:
+            self.keys = keys = array('i', keys)
+            self.ids = ids = array('I', ids)
+            self.offsets = offsets = CompactOffsets()
+            largest_id = max(ids, default=-1)
+            if largest_id < DENSE_ID_LIMIT:
+                # Only store codes (the usual case): fill the dense column without per-entry checks
+                values = offsets.values = array('i', [-1]) * (largest_id + 1)
+                for offset, task_id in zip(keys, ids):
+                    values[task_id] = offset
+            else:
+                dense_ids = [task_id for task_id in ids if task_id < DENSE_ID_LIMIT]
+                values = offsets.values = array('i', [-1]) * (max(dense_ids) + 1 if dense_ids else 0)
+                for offset, task_id in zip(keys, ids):
+                    if task_id < DENSE_ID_LIMIT:
+                        values[task_id] = offset
+                    else:
+                        offsets.sparse[task_id] = offset
+        else:
+            self.keys = list(keys)
+            self.ids = list(ids)
+            self.offsets = dict(zip(self.ids, self.keys))
+        self.version += 1
+        self.seek(watermark)
+
+    def clear(self):
+        """Remove every task from the index"""
+        self.rebuild([], self.watermark)
+
+    def seek(self, watermark):
+        """Treat every task at or before watermark as passed"""
+        self.watermark = watermark
+        self.cursor = bisect_right(self.keys, watermark)
+
+    def insert(self, task_id, offset):
+        """Insert or move a task, keeping the cursor on the same pending task"""
+        if task_id in self.offsets:
+            self.remove(task_id)
+
+        index = bisect_right(self.keys, offset)
+        self.keys.insert(index, offset)
+        self.ids.insert(index, task_id)
+        self.offsets[task_id] = offset
+        self.version += 1
+
+        if offset <= self.watermark:
+            self.cursor += 1
+
+    def insert_many(self, entries):
+        """Insert or move a batch of (offset, task_id) pairs; the last pair of a repeated id wins"""
+        latest = {task_id: offset for offset, task_id in entries}
+        if len(latest) < 64:
+            for task_id, offset in latest.items():
+                self.insert(task_id, offset)
+            return
+
+        self.remove_many([task_id for task_id in latest if task_id in self.offsets])
+
+        # Splice the sorted batch into the sorted columns: one bisect per new entry,
+        # while the runs of existing entries between them are copied as slices
+        keys = self.keys
+        ids = self.ids
+        new_keys = keys[:0]
+        new_ids = ids[:0]
+        previous = 0
+        passed = 0
+        for task_id, offset in sorted(latest.items(), key=lambda entry: entry[1]):
+            position = bisect_right(keys, offset, previous)
+            new_keys += keys[previous:position]
+            new_ids += ids[previous:position]
+            new_keys.append(offset)
+            new_ids.append(task_id)
+            self.offsets[task_id] = offset
+            previous = position
+            if offset <= self.watermark:
+                passed += 1
+        new_keys += keys[previous:]
+        new_ids += ids[previous:]
+
+        self.keys = new_keys
+        self.ids = new_ids
+        self.cursor += passed
+        self.version += 1
+
+    def remove_many(self, task_ids):
+        """Remove a batch of tasks, copying the remaining entries once"""
+        indexes = []
+        for task_id in task_ids:
+            offset = self.offsets.pop(task_id, None)
+            if offset is None:
+                continue
+            index = bisect_left(self.keys, offset)
+            while self.ids[index] != task_id:
+                index += 1
+            indexes.append(index)
+        if not indexes:
+            return
+
+        indexes.sort()
+        keys = self.keys
+        ids = self.ids
+        new_keys = keys[:0]
+        new_ids = ids[:0]
+        start = 0
+        for index in indexes:
+            new_keys += keys[start:index]
+            new_ids += ids[start:index]
+            start = index + 1
+        new_keys += keys[start:]
+        new_ids += ids[start:]
+
+        self.keys = new_keys
+        self.ids = new_ids
+        self.cursor -= bisect_left(indexes, self.cursor)
+        self.version += 1
+
+    def remove(self, task_id):
+        """Remove a task from the index if it is present"""
+        offset = self.offsets.pop(task_id, None)
+        if offset is None:
+            return
+
+        index = bisect_left(self.keys, offset)
+        while self.ids[index] != task_id:
+            index += 1
+
+        del self.keys[index]
+        del self.ids[index]
+        self.version += 1
+
+        if index < self.cursor:
+            self.cursor -= 1
+
+    def passed(self):
+        """Return the ids of tasks at or before the watermark"""
+        return self.ids[:self.cursor]
+
+    def pending(self):
+        """Iterate (offset, task_id) pairs after the watermark in offset order"""
+        keys = self.keys
+        ids = self.ids
+        for index in range(self.cursor, len(keys)):
+            yield keys[index], ids[index]
+
+    def advance(self, offset):
+        """Move the watermark to offset and return the ids of tasks that became due"""
+        if offset < self.watermark:
+            # Range restarted (new cycle or clock set back), start over from offset
+            self.seek(offset - 1)
+
+        keys = self.keys
+        end = len(keys)
+        start = self.cursor
+        cursor = start
+        while cursor < end and keys[cursor] <= offset:
+            cursor += 1
+
+        self.cursor = cursor
+        self.watermark = offset
+        return self.ids[start:cursor]
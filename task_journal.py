@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+import time
+
+
+class JournalTaskStorage:
+    """Tasks stored as an append-only journal of mutations plus a snapshot.
+
+    Every add, edit, move or delete appends one compact JSON line to
+    journal.log. fsync is batched: it runs once fsync_batch records are
+    pending or fsync_interval seconds after the first unsynced write.
+    When the journal grows past compact_threshold bytes it is rotated and
+    folded into snapshot.json on a background thread. Startup replays the
+    snapshot and then the journal(s).
+
+    Exposes the same methods as TaskStorage.
+    """
+
+    def __init__(self, directory, compact_threshold=4 * 1024 * 1024, fsync_batch=256, fsync_interval=1.0):
+        self.directory = directory
+        self.compact_threshold = compact_threshold
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.journal_path = os.path.join(directory, "journal.log")
+        # Journal being folded into the snapshot; replayed too if a compaction was interrupted
+        self.compacting_path = os.path.join(directory, "journal.compacting")
+
+        self.days = {}      # date -> {task_id: (time, name)}
+        self.task_dates = {}  # task_id -> date
+        self.meta = {}
+
+        self.lock = threading.RLock()
+        self.pending_records = 0
+        self.compactor = None
+        self.closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self.replay()
+
+        # A compaction was interrupted: finish it before the journal is rotated again
+        if os.path.exists(self.compacting_path):
+            self.write_snapshot(self.build_snapshot())
+
+        self.repair_journal()
+        self.journal = open(self.journal_path, "a", encoding="utf-8")
+        self.journal_size = self.journal.tell()
+
+        # Flushes batched writes that were not followed by enough records to trigger an fsync
+        self.flush_event = threading.Event()
+        self.flusher = threading.Thread(target=self.run_flusher, name="task-journal-flush", daemon=True)
+        self.flusher.start()
+
+    def replay(self):
+        """Rebuild the in-memory state from the snapshot and the journal files"""
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+            self.meta = dict(snapshot.get("meta", {}))
+            for task_id, (date, time_str, name) in snapshot.get("tasks", {}).items():
+                self.apply(["put", task_id, date, time_str, name])
+
+        for path in (self.compacting_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line after a crash
+                    self.apply(record)
+
+    def repair_journal(self, chunk_size=64 * 1024):
+        """End the journal with a complete line, so appended records do not join a torn one"""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb+") as file:
+            end = file.seek(0, os.SEEK_END)
+            # Find the last newline, reading backwards from the end
+            position = end
+            while position > 0:
+                start = max(0, position - chunk_size)
+                file.seek(start)
+                newline = file.read(position - start).rfind(b"\n")
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position == end:
+                return
+
+            file.seek(position)
+            tail = file.read()
+            try:
+                json.loads(tail)
+            except ValueError:
+                # Torn record, already skipped by replay()
+                file.truncate(position)
+            else:
+                # A complete record that only lacks its newline was replayed and is kept
+                file.write(b"\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def apply(self, record):
+        """Apply a single journal record to the in-memory state"""
+        op = record[0]
+        if op == "put":
+            _, task_id, date, time_str, name = record
+            old_date = self.task_dates.get(task_id)
+            if old_date is not None and old_date != date:
+                self.days[old_date].pop(task_id, None)
+            self.days.setdefault(date, {})[task_id] = (time_str, name)
+            self.task_dates[task_id] = date
+        elif op == "del":
+            date = self.task_dates.pop(record[1], None)
+            if date is not None:
+                self.days[date].pop(record[1], None)
+        elif op == "meta":
+            self.meta[record[1]] = record[2]
+
+    def append(self, records):
+        """Apply records and append them to the journal"""
+        with self.lock:
+            lines = []
+            for record in records:
+                self.apply(record)
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            if not lines:
+                return
+
+            data = "".join(lines)
+            self.journal.write(data)
+            self.journal_size += len(data)
+            self.pending_records += len(lines)
+
+            if self.pending_records >= self.fsync_batch:
+                self.sync()
+            else:
+                self.flush_event.set()
+
+            if self.journal_size >= self.compact_threshold and self.compactor is None:
+                self.start_compaction()
+
+    def sync(self):
+        """Write buffered records and fsync the journal"""
+        with self.lock:
+            if self.closed:
+                return
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.pending_records = 0
+
+    def run_flusher(self):
+        while True:
+            self.flush_event.wait()
+            if self.closed:
+                return
+            time.sleep(self.fsync_interval)
+            self.flush_event.clear()
+            if self.pending_records:
+                self.sync()
+
+    def start_compaction(self):
+        """Rotate the journal and fold it into a new snapshot on a background thread"""
+        self.sync()
+        self.journal.close()
+        os.replace(self.journal_path, self.compacting_path)
+        self.journal = open(self.journal_path, "a", encoding="utf-8")
+        self.journal_size = 0
+
+        # Copy the state while holding the lock; the snapshot is written without it
+        self.compactor = threading.Thread(target=self.write_snapshot, args=(self.build_snapshot(),),
+                                          name="task-journal-compact", daemon=True)
+        self.compactor.start()
+
+    def build_snapshot(self):
+        """Copy the current state into a JSON-serializable snapshot"""
+        tasks = {
+            task_id: (date, time_str, name)
+            for date, day in self.days.items()
+            for task_id, (time_str, name) in day.items()
+        }
+        return {"tasks": tasks, "meta": dict(self.meta)}
+
+    def write_snapshot(self, snapshot):
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(snapshot, file, ensure_ascii=False, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        # Everything in the rotated journal is now part of the snapshot
+        os.remove(self.compacting_path)
+        with self.lock:
+            self.compactor = None
+
+    def load_day(self, date):
+        """Return (id, time, name) rows of a date (YYYY-MM-DD), ordered by time"""
+        with self.lock:
+            day = self.days.get(date, {})
+            rows = [(task_id, time_str, name) for task_id, (time_str, name) in day.items()]
+        rows.sort(key=lambda row: row[1])
+        return rows
+
+    def upsert(self, date, task_id, time_str, name):
+        """Insert or update a single task"""
+        self.append([["put", task_id, date, time_str, name]])
+
+    def upsert_many(self, date, rows):
+        """Insert or update (id, time, name) rows with one journal write"""
+        self.append([["put", task_id, date, time_str, name] for task_id, time_str, name in rows])
+
+    def delete(self, task_id):
+        """Delete a single task"""
+        self.append([["del", task_id]])
+
+    def delete_many(self, task_ids):
+        """Delete several tasks with one journal write"""
+        self.append([["del", task_id] for task_id in task_ids])
+
+    def get_meta(self, key, default=None):
+        """Read a bookkeeping value (e.g. migration state)"""
+        with self.lock:
+            return self.meta.get(key, default)
+
+    def set_meta(self, key, value):
+        """Write a bookkeeping value"""
+        self.append([["meta", key, value]])
+
+    def close(self):
+        """Flush pending records and wait for a running compaction"""
+        compactor = self.compactor
+        if compactor is not None:
+            compactor.join()
+
+        with self.lock:
+            if self.closed:
+                return
+            self.sync()
+            self.closed = True
+            self.journal.close()
+        self.flush_event.set()
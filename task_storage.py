@@ -0,0 +1,67 @@
+import sqlite3
+import threading
+
+
+class TaskStorage:
+    """Tasks stored one row per task in a local SQLite database.
+
+    Rows are indexed on (date, time), so loading a day only reads that
+    day's rows, and edits touch a single row instead of rewriting the day.
+    Safe to use from the GUI thread and the persistence thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id TEXT PRIMARY KEY, date TEXT NOT NULL, time TEXT NOT NULL, name TEXT NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS tasks_date_time ON tasks (date, time)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def load_day(self, date):
+        """Return (id, time, name) rows of a date (YYYY-MM-DD), ordered by time"""
+        with self.lock:
+            cursor = self.connection.execute(
+                "SELECT id, time, name FROM tasks WHERE date = ? ORDER BY time", (date,)
+            )
+            return cursor.fetchall()
+
+    def upsert(self, date, task_id, time_str, name):
+        """Insert or update a single task"""
+        self.upsert_many(date, [(task_id, time_str, name)])
+
+    def upsert_many(self, date, rows):
+        """Insert or update (id, time, name) rows in one transaction"""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO tasks (id, date, time, name) VALUES (?, ?, ?, ?)",
+                ((task_id, date, time_str, name) for task_id, time_str, name in rows),
+            )
+
+    def delete(self, task_id):
+        """Delete a single task"""
+        self.delete_many([task_id])
+
+    def delete_many(self, task_ids):
+        """Delete several tasks in one transaction"""
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM tasks WHERE id = ?", ((task_id,) for task_id in task_ids))
+
+    def get_meta(self, key, default=None):
+        """Read a bookkeeping value (e.g. migration state)"""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        """Write a bookkeeping value"""
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
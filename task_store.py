@@ -0,0 +1,406 @@
+import binascii
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress, filterfalse, repeat
+from operator import eq, ge, itemgetter
+
+from time_range import seconds_to_time
+
+HEX_DIGITS_AND_DASH = '0123456789abcdef-'
+
+
+def is_canonical_uuid(external_id):
+    """Whether an id has the exact form new_id() writes (lower-case 8-4-4-4-12 hex).
+
+    Only this form is packed, so every other id round-trips unchanged.
+    Plain string checks instead of a regex, as this runs for every loaded task.
+    """
+    return (len(external_id) == 36 and external_id.count('-') == 4
+            and external_id[8] == external_id[13] == external_id[18] == external_id[23] == '-'
+            and not external_id.strip(HEX_DIGITS_AND_DASH))
+
+
+def pack_uuids(external_ids):
+    """(high, low) 64-bit columns of a list of canonical UUIDs, or None unless every id is one.
+
+    The ids are checked and decoded as one joined string, so the work is
+    done by a few C-level passes instead of a Python loop per id.
+    """
+    count = len(external_ids)
+    joined = '\n'.join(external_ids)
+    if (len(joined) != 37 * count - 1 or joined.count('\n') != count - 1 or joined.count('-') != 4 * count
+            or joined[36::37].strip('\n')
+            or any(joined[position::37].strip('-') for position in (8, 13, 18, 23))):
+        return None
+    try:
+        data = joined.encode('ascii')
+    except UnicodeEncodeError:
+        return None
+    if data.translate(None, b'0123456789abcdef-\n'):
+        return None
+
+    words = array('Q')
+    words.frombytes(binascii.unhexlify(data.translate(None, b'-\n')))
+    if sys.byteorder == 'little':
+        words.byteswap()
+    return words[0::2], words[1::2]
+
+
+class Task:
+    """A single task: id, time as whole seconds since midnight, and name"""
+
+    __slots__ = ('id', 'seconds', 'name')
+
+    def __init__(self, task_id, seconds, name):
+        self.id = task_id
+        self.seconds = seconds
+        self.name = name
+
+    @property
+    def time(self):
+        return seconds_to_time(self.seconds)
+
+    def __repr__(self):
+        return f"Task({self.id!r}, {self.seconds!r}, {self.name!r})"
+
+
+class TaskStore:
+    """The tasks of one day, independent of Qt.
+
+    Tasks are slotted objects with integer times and interned names, so a
+    large day costs a fraction of the per-task dicts it replaces. A time
+    ordering for range queries is built lazily after changes.
+    """
+
+    def __init__(self):
+        self.tasks = {}         # task_id -> Task
+        self.sorted_keys = []   # Seconds, sorted ascending (valid unless dirty)
+        self.sorted_tasks = []  # Tasks, parallel to sorted_keys
+        self.dirty = False
+        self.version = 0        # Bumped on every change so derived caches can be invalidated
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __contains__(self, task_id):
+        return task_id in self.tasks
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def __getitem__(self, task_id):
+        return self.tasks[task_id]
+
+    def get(self, task_id, default=None):
+        return self.tasks.get(task_id, default)
+
+    def values(self):
+        return self.tasks.values()
+
+    def changed(self):
+        self.dirty = True
+        self.version += 1
+
+    def new_id(self):
+        """Return an unused task id"""
+        import uuid
+        return str(uuid.uuid4())
+
+    def external_id(self, task_id):
+        """The id a task is stored and exported under"""
+        return task_id
+
+    def id_for(self, external_id):
+        """The task id for a stored or exported id, or None if no such task exists"""
+        return external_id if external_id in self.tasks else None
+
+    def add(self, task_id, seconds, name):
+        """Add a task, or replace the task with the same id"""
+        task = Task(task_id, seconds, sys.intern(name))
+        self.tasks[task_id] = task
+        self.changed()
+        return task
+
+    def add_many(self, rows):
+        """Add or replace (id, seconds, name) rows and return their tasks"""
+        intern = sys.intern
+        added = [Task(task_id, seconds, intern(name)) for task_id, seconds, name in rows]
+        for task in added:
+            self.tasks[task.id] = task
+        if added:
+            self.changed()
+        return added
+
+    def load(self, rows):
+        """Add (external id, seconds, name) rows read from storage"""
+        return self.add_many(rows)
+
+    def move(self, task_id, seconds):
+        """Change the time of a task"""
+        self.tasks[task_id].seconds = seconds
+        self.changed()
+
+    def rename(self, task_id, name):
+        """Change the name of a task"""
+        self.tasks[task_id].name = sys.intern(name)
+        self.changed()
+
+    def remove(self, task_id):
+        """Remove a task and return it, or None if it does not exist"""
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            self.changed()
+        return task
+
+    def clear(self):
+        self.tasks = {}
+        self.changed()
+
+    def ordered(self):
+        """Return (keys, tasks) sorted by time"""
+        if self.dirty:
+            self.sorted_tasks = sorted(self.tasks.values(), key=lambda task: task.seconds)
+            self.sorted_keys = [task.seconds for task in self.sorted_tasks]
+            self.dirty = False
+        return self.sorted_keys, self.sorted_tasks
+
+    def between(self, start_seconds, end_seconds):
+        """Tasks with start <= seconds <= end, in time order; start > end wraps past midnight"""
+        keys, tasks = self.ordered()
+        if start_seconds <= end_seconds:
+            return tasks[bisect_left(keys, start_seconds):bisect_right(keys, end_seconds)]
+        return tasks[bisect_left(keys, start_seconds):] + tasks[:bisect_right(keys, end_seconds)]
+
+    def columns(self):
+        """Return (task_ids, seconds) as parallel sequences"""
+        tasks = list(self.tasks.values())
+        return [task.id for task in tasks], [task.seconds for task in tasks]
+
+
+class ColumnarTaskStore:
+    """The tasks of one day as parallel arrays, for very large days.
+
+    Tasks get compact integer ids (codes, starting at 1). Per code the store
+    keeps the time, an index into a shared name table and the external id:
+    UUIDs are packed into two 64-bit columns, other ids go to a small dict.
+    A second pair of columns holds (seconds, code) sorted by time, so range
+    queries bisect plain arrays. Like TaskStore's ordering it is brought up
+    to date lazily: changes only touch the per-code columns, and the next
+    query merges them into the sorted columns in one bulk pass. Codes are
+    not reused until clear(), which keeps the external id of a removed task
+    available for deleting it.
+    """
+
+    def __init__(self):
+        self.version = 0  # Bumped on every change so derived caches can be invalidated
+        self.clear()
+
+    def clear(self):
+        self.code_seconds = array('i', [-1])  # code -> seconds, -1 once removed (code 0 is never used)
+        self.code_names = array('I', [0])     # code -> index into names
+        self.uuid_hi = array('Q', [0])        # code -> external UUID, high and low 64 bits
+        self.uuid_lo = array('Q', [0])
+        self.foreign_ids = {}                 # code -> external id that is not a canonical UUID
+        self.codes_by_external = None         # external id -> code, built on the first id_for()
+        self.names = []                       # Name table
+        self.name_codes = {}                  # name -> index into names
+        self.seconds = array('i')             # Seconds of the live tasks, sorted ascending (see ordered())
+        self.codes = array('I')               # Codes, parallel to seconds
+        self.sorted_upto = 1                  # Codes from here on are not in the sorted columns yet
+        self.moved = set()                    # Sorted codes moved, replaced or removed since
+        self.count = 0
+        self.version += 1
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, task_id):
+        return (isinstance(task_id, int) and 0 < task_id < len(self.code_seconds)
+                and self.code_seconds[task_id] >= 0)
+
+    def __iter__(self):
+        return iter(self.ordered()[1])
+
+    def __getitem__(self, task_id):
+        if task_id not in self:
+            raise KeyError(task_id)
+        return Task(task_id, self.code_seconds[task_id], self.names[self.code_names[task_id]])
+
+    def get(self, task_id, default=None):
+        return self[task_id] if task_id in self else default
+
+    def values(self):
+        """Tasks in time order"""
+        seconds, codes = self.ordered()
+        return iter(self.tasks_at(seconds, codes))
+
+    def tasks_at(self, seconds, codes):
+        """Task objects for parallel slices of the sorted columns"""
+        names = map(self.names.__getitem__, map(self.code_names.__getitem__, codes))
+        return list(map(Task, codes, seconds, names))
+
+    def changed(self, task_id):
+        if task_id < self.sorted_upto:
+            self.moved.add(task_id)
+        self.version += 1
+
+    def name_index(self, name):
+        index = self.name_codes.get(name)
+        if index is None:
+            index = self.name_codes[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return index
+
+    def new_code(self, external_id):
+        """Allocate a code for an external id; the task itself is added by add()"""
+        code = len(self.code_seconds)
+        self.code_seconds.append(-1)
+        self.code_names.append(0)
+        if is_canonical_uuid(external_id):
+            value = int(external_id.replace('-', ''), 16)
+            self.uuid_hi.append(value >> 64)
+            self.uuid_lo.append(value & 0xFFFFFFFFFFFFFFFF)
+        else:
+            self.uuid_hi.append(0)
+            self.uuid_lo.append(0)
+            self.foreign_ids[code] = external_id
+        if self.codes_by_external is not None:
+            self.codes_by_external[external_id] = code
+        return code
+
+    def new_id(self):
+        """Return an unused task id"""
+        import uuid
+        return self.new_code(str(uuid.uuid4()))
+
+    def external_id(self, task_id):
+        """The id a task is stored and exported under"""
+        foreign_id = self.foreign_ids.get(task_id)
+        if foreign_id is not None:
+            return foreign_id
+        digits = '%016x%016x' % (self.uuid_hi[task_id], self.uuid_lo[task_id])
+        return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+    def id_for(self, external_id):
+        """The task id for a stored or exported id, or None if no such task exists"""
+        if self.codes_by_external is None:
+            # Only merge imports look tasks up by external id, so the map is built on demand
+            self.codes_by_external = {self.external_id(code): code for code in range(1, len(self.code_seconds))}
+        code = self.codes_by_external.get(external_id)
+        return code if code in self else None
+
+    def ordered(self):
+        """Return (seconds, codes) sorted by time, merging in the changes since the last call"""
+        code_seconds = self.code_seconds
+        if self.sorted_upto == len(code_seconds) and not self.moved:
+            return self.seconds, self.codes
+
+        # Sorted entries that are still valid form one ascending run (removed codes have -1 now)
+        codes = self.codes
+        kept = compress(codes, map(eq, map(code_seconds.__getitem__, codes), self.seconds))
+        order = list(filterfalse(self.moved.__contains__, kept) if self.moved else kept)
+        new_codes = range(self.sorted_upto, len(code_seconds))
+        order.extend(compress(new_codes, map(ge, map(code_seconds.__getitem__, new_codes), repeat(0))))
+        order.extend(code for code in self.moved if code_seconds[code] >= 0)
+        # The sort finds the existing run and merges the changes into it
+        order.sort(key=code_seconds.__getitem__)
+
+        self.codes = array('I', order)
+        self.seconds = array('i', map(code_seconds.__getitem__, order))
+        self.sorted_upto = len(code_seconds)
+        self.moved = set()
+        return self.seconds, self.codes
+
+    def add(self, task_id, seconds, name):
+        """Add a task under a code from new_id() or load(), or replace the task with that code"""
+        if self.code_seconds[task_id] < 0:
+            self.count += 1
+        self.code_seconds[task_id] = seconds
+        name_index = self.code_names[task_id] = self.name_index(name)
+        self.changed(task_id)
+        return Task(task_id, seconds, self.names[name_index])
+
+    def add_many(self, rows):
+        """Add or replace (code, seconds, name) rows and return their codes"""
+        added = {}  # Insertion ordered; a code repeated in rows keeps its last values
+        code_seconds = self.code_seconds
+        code_names = self.code_names
+        for task_id, seconds, name in rows:
+            if task_id not in added and task_id not in self:
+                self.count += 1
+            code_seconds[task_id] = seconds
+            code_names[task_id] = self.name_index(name)
+            added[task_id] = None
+        for task_id in added:
+            self.changed(task_id)
+        return list(added)
+
+    def load(self, rows):
+        """Add (external id, seconds, name) rows read from storage"""
+        rows = rows if isinstance(rows, list) else list(rows)
+        first = len(self.code_seconds)
+        external_ids = list(map(itemgetter(0), rows))
+
+        # Every column is built in bulk; only new names and non-UUID ids are handled one by one
+        name_codes = self.name_codes
+        for name in dict.fromkeys(map(itemgetter(2), rows)):
+            if name not in name_codes:
+                self.name_index(name)
+        self.code_seconds.extend(array('i', map(itemgetter(1), rows)))
+        self.code_names.extend(array('I', map(name_codes.__getitem__, map(itemgetter(2), rows))))
+
+        packed = pack_uuids(external_ids)
+        if packed is not None:
+            self.uuid_hi.extend(packed[0])
+            self.uuid_lo.extend(packed[1])
+        else:
+            for code, external_id in enumerate(external_ids, first):
+                if is_canonical_uuid(external_id):
+                    value = int(external_id.replace('-', ''), 16)
+                    self.uuid_hi.append(value >> 64)
+                    self.uuid_lo.append(value & 0xFFFFFFFFFFFFFFFF)
+                else:
+                    self.uuid_hi.append(0)
+                    self.uuid_lo.append(0)
+                    self.foreign_ids[code] = external_id
+        # The lookup map is rebuilt on the next id_for()
+        self.codes_by_external = None
+
+        self.count += len(rows)
+        self.version += 1
+        return range(first, len(self.code_seconds))
+
+    def move(self, task_id, seconds):
+        """Change the time of a task"""
+        self.code_seconds[task_id] = seconds
+        self.changed(task_id)
+
+    def rename(self, task_id, name):
+        """Change the name of a task"""
+        self.code_names[task_id] = self.name_index(name)
+        self.version += 1
+
+    def remove(self, task_id):
+        """Remove a task and return it, or None if it does not exist"""
+        if task_id not in self:
+            return None
+        task = Task(task_id, self.code_seconds[task_id], self.names[self.code_names[task_id]])
+        self.code_seconds[task_id] = -1
+        self.count -= 1
+        self.changed(task_id)
+        return task
+
+    def between(self, start_seconds, end_seconds):
+        """Tasks with start <= seconds <= end, in time order; start > end wraps past midnight"""
+        keys, codes = self.ordered()
+        start = bisect_left(keys, start_seconds)
+        end = bisect_right(keys, end_seconds)
+        if start_seconds <= end_seconds:
+            return self.tasks_at(keys[start:end], codes[start:end])
+        return self.tasks_at(keys[start:], codes[start:]) + self.tasks_at(keys[:end], codes[:end])
+
+    def columns(self):
+        """Return (task_ids, seconds) as parallel sequences"""
+        seconds, codes = self.ordered()
+        return codes, seconds
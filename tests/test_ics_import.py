@@ -0,0 +1,119 @@
+import datetime
+import io
+import time
+import zoneinfo
+
+import pytest
+
+from ics_import import iter_ics_records
+from time_range import TimeRange
+
+WHOLE_DAY = TimeRange.from_times(datetime.time(0), datetime.time(0))
+
+
+@pytest.fixture(autouse=True)
+def utc_local_time(monkeypatch):
+    """Read event times as UTC, so converted times do not depend on the machine's zone"""
+    if not hasattr(time, 'tzset'):
+        pytest.skip("needs time.tzset to set the local time zone")
+    monkeypatch.setenv('TZ', 'UTC')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def calendar(*events):
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for event in events:
+        lines += ["BEGIN:VEVENT"] + list(event) + ["END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines).encode('utf-8')
+
+
+def import_times(data, date, time_range=WHOLE_DAY):
+    """(time, name) of the records for date; None for records that were skipped"""
+    return [None if record is None else (record['time'], record['name'])
+            for record in iter_ics_records(io.BytesIO(data), date, time_range)]
+
+
+def test_single_event_and_folded_summary():
+    data = calendar(["UID:1", "DTSTART:20240506T093000", "SUMMARY:Stand", " up\\, daily"])
+    assert import_times(data, datetime.date(2024, 5, 6)) == [("09:30:00", "Standup, daily")]
+    assert import_times(data, datetime.date(2024, 5, 7)) == []
+
+
+def test_all_day_and_cancelled_events_are_left_out():
+    data = calendar(["UID:1", "DTSTART;VALUE=DATE:20240506", "SUMMARY:Holiday"],
+                    ["UID:2", "DTSTART:20240506T100000", "STATUS:CANCELLED", "SUMMARY:Off"])
+    assert import_times(data, datetime.date(2024, 5, 6)) == []
+
+
+def test_only_the_window_is_expanded():
+    data = calendar(["UID:1", "DTSTART:20240506T080000", "RRULE:FREQ=HOURLY", "SUMMARY:Ping"])
+    window = TimeRange.from_times(datetime.time(22), datetime.time(2))
+    times = sorted(time_str for time_str, _ in import_times(data, datetime.date(2024, 5, 8), window))
+    assert times == ["00:00:00", "01:00:00", "02:00:00", "22:00:00", "23:00:00"]
+
+
+def test_weekly_byday_with_interval():
+    data = calendar(["UID:1", "DTSTART:20240506T090000", "RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE",
+                     "SUMMARY:Sync"])
+    dates = [datetime.date(2024, 5, 6) + datetime.timedelta(days=day) for day in range(21)]
+    found = [date for date in dates if import_times(data, date)]
+    assert found == [datetime.date(2024, 5, 6), datetime.date(2024, 5, 8),
+                     datetime.date(2024, 5, 20), datetime.date(2024, 5, 22)]
+
+
+def test_count_and_until():
+    counted = calendar(["UID:1", "DTSTART:20240506T090000", "RRULE:FREQ=DAILY;COUNT=3", "SUMMARY:A"])
+    assert import_times(counted, datetime.date(2024, 5, 8))
+    assert not import_times(counted, datetime.date(2024, 5, 9))
+
+    until = calendar(["UID:1", "DTSTART:20240506T090000", "RRULE:FREQ=DAILY;UNTIL=20240507", "SUMMARY:A"])
+    assert import_times(until, datetime.date(2024, 5, 7))
+    assert not import_times(until, datetime.date(2024, 5, 8))
+
+
+def test_count_includes_excluded_dates():
+    data = calendar(["UID:1", "DTSTART:20240506T090000", "RRULE:FREQ=DAILY;COUNT=3",
+                     "EXDATE:20240507T090000", "SUMMARY:A"])
+    assert not import_times(data, datetime.date(2024, 5, 7))
+    assert import_times(data, datetime.date(2024, 5, 8))
+    assert not import_times(data, datetime.date(2024, 5, 9))
+
+
+def test_monthly_byday_ordinals():
+    last_friday = calendar(["UID:1", "DTSTART:20240105T170000", "RRULE:FREQ=MONTHLY;BYDAY=-1FR", "SUMMARY:Report"])
+    assert import_times(last_friday, datetime.date(2024, 5, 31))
+    assert not import_times(last_friday, datetime.date(2024, 5, 24))
+
+    second_tuesday = calendar(["UID:1", "DTSTART:20240109T170000", "RRULE:FREQ=MONTHLY;BYDAY=2TU", "SUMMARY:R"])
+    assert import_times(second_tuesday, datetime.date(2024, 5, 14))
+    assert not import_times(second_tuesday, datetime.date(2024, 5, 7))
+
+
+def test_recurrence_id_replaces_its_occurrence():
+    data = calendar(["UID:1", "DTSTART:20240506T090000", "RRULE:FREQ=DAILY", "SUMMARY:Standup"],
+                    ["UID:1", "RECURRENCE-ID:20240508T090000", "DTSTART:20240508T110000", "SUMMARY:Standup (moved)"])
+    assert import_times(data, datetime.date(2024, 5, 8)) == [("11:00:00", "Standup (moved)")]
+    assert import_times(data, datetime.date(2024, 5, 9)) == [("09:00:00", "Standup")]
+
+
+def test_time_zones_are_converted_to_local_time():
+    try:
+        zoneinfo.ZoneInfo("America/New_York")
+    except zoneinfo.ZoneInfoNotFoundError:
+        pytest.skip("no time zone database (install tzdata)")
+    data = calendar(["UID:1", "DTSTART;TZID=America/New_York:20240506T220000", "RRULE:FREQ=DAILY", "SUMMARY:NY"],
+                    ["UID:2", "DTSTART:20240506T120000Z", "SUMMARY:UTC"])
+    # 22:00 in New York is 02:00 UTC the next day, also across the DST change in November
+    assert import_times(data, datetime.date(2024, 5, 6)) == [("12:00:00", "UTC")]
+    assert import_times(data, datetime.date(2024, 5, 7)) == [("02:00:00", "NY")]
+    assert import_times(data, datetime.date(2024, 12, 2)) == [("03:00:00", "NY")]
+
+
+def test_unsupported_rules_are_skipped():
+    data = calendar(["UID:1", "DTSTART:20240506T090000", "RRULE:FREQ=DAILY;BYSETPOS=1", "SUMMARY:A"],
+                    ["UID:2", "DTSTART:20240506T100000", "SUMMARY:B"])
+    assert import_times(data, datetime.date(2024, 5, 6)) == [None, ("10:00:00", "B")]
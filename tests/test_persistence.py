@@ -0,0 +1,56 @@
+from persistence import PersistenceWorker
+
+
+class RecordingStorage:
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+
+    def upsert_many(self, date, rows):
+        self.calls.append(("upsert", date, sorted(rows)))
+
+    def delete_many(self, task_ids):
+        self.calls.append(("delete", sorted(task_ids)))
+
+    def close(self):
+        self.closed = True
+
+
+class RecordingSettings:
+    def __init__(self):
+        self.values = {}
+        self.sync_count = 0
+
+    def setValue(self, key, value):
+        self.values[key] = value
+
+    def sync(self):
+        self.sync_count += 1
+
+
+def test_changes_within_the_debounce_window_are_written_together():
+    storage = RecordingStorage()
+    settings = RecordingSettings()
+    worker = PersistenceWorker(storage, lambda: settings, debounce_ms=10000)
+    worker.put_tasks("2024-05-06", [("a", "10:00:00", "A"), ("b", "11:00:00", "B")])
+    worker.put_tasks("2024-05-06", [("a", "10:30:00", "A moved")])
+    worker.delete_tasks(["b", "c"])
+    worker.put_settings({"screen": 0})
+    worker.put_settings({"screen": 1, "position": "top"})
+    worker.flush()
+
+    # Only the latest state of each task and setting is written, in one batch
+    assert storage.calls == [("upsert", "2024-05-06", [("a", "10:30:00", "A moved")]), ("delete", ["b", "c"])]
+    assert settings.values == {"screen": 1, "position": "top"}
+    assert settings.sync_count == 1
+
+    worker.close()
+    assert storage.closed
+
+
+def test_close_writes_pending_changes():
+    storage = RecordingStorage()
+    worker = PersistenceWorker(storage, RecordingSettings, debounce_ms=10000)
+    worker.put_tasks("2024-05-06", [("a", "10:00:00", "A")])
+    worker.close()
+    assert storage.calls == [("upsert", "2024-05-06", [("a", "10:00:00", "A")])]
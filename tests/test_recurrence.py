@@ -0,0 +1,128 @@
+import datetime
+
+import pytest
+
+from recurrence import (MAX_RULES, OCCURRENCE_ID_BASE, RecurrenceRule, RecurrenceSchedule, is_occurrence_id,
+                        occurrence_id, split_occurrence_id, window_segments)
+from time_range import SECONDS_PER_DAY, TimeRange
+
+MONDAY = datetime.date(2024, 5, 6)
+SATURDAY = datetime.date(2024, 5, 11)
+DAY = TimeRange.from_times(datetime.time(0), datetime.time(23, 59, 59))
+NIGHT = TimeRange.from_times(datetime.time(22), datetime.time(6))
+
+
+def hours(value):
+    return int(value * 3600)
+
+
+@pytest.mark.parametrize("args", [
+    ("x", "hourly", 0),
+    ("x", "daily", -1),
+    ("x", "daily", SECONDS_PER_DAY),
+    ("x", "interval", hours(9), hours(17), 0),
+    ("x", "interval", hours(9), None, 30),
+    ("x", "interval", hours(9), hours(8), 30),
+])
+def test_invalid_rules(args):
+    with pytest.raises(ValueError):
+        RecurrenceRule(*args)
+
+
+def test_occurs_on():
+    assert RecurrenceRule("x", "daily", 0).occurs_on(SATURDAY)
+    assert RecurrenceRule("x", "weekdays", 0).occurs_on(MONDAY)
+    assert not RecurrenceRule("x", "weekdays", 0).occurs_on(SATURDAY)
+
+
+def test_times_between():
+    daily = RecurrenceRule("x", "daily", hours(9))
+    assert list(daily.times_between(hours(8), hours(9))) == [hours(9)]
+    assert list(daily.times_between(hours(10), hours(11))) == []
+
+    interval = RecurrenceRule("x", "interval", hours(9), hours(11), 45)
+    assert list(interval.times_between(0, SECONDS_PER_DAY - 1)) == [hours(9), hours(9.75), hours(10.5)]
+    # The window starts between two steps and ends before until_seconds
+    assert list(interval.times_between(hours(9.5), hours(10.5))) == [hours(9.75), hours(10.5)]
+    assert list(interval.times_between(hours(9.8), hours(10.4))) == []
+
+
+def test_rule_dict_round_trip():
+    for rule in (RecurrenceRule("Stretch", "weekdays", hours(10)),
+                 RecurrenceRule("Water", "interval", hours(8), hours(20), 90)):
+        copy = RecurrenceRule.from_dict(rule.to_dict())
+        assert repr(copy) == repr(rule)
+
+
+def test_occurrence_ids():
+    task_id = occurrence_id(3, hours(12))
+    assert task_id >= OCCURRENCE_ID_BASE and task_id < 1 << 32
+    assert is_occurrence_id(task_id)
+    assert not is_occurrence_id(OCCURRENCE_ID_BASE - 1)
+    assert not is_occurrence_id("x")
+    assert split_occurrence_id(task_id) == (3, hours(12))
+    assert occurrence_id(MAX_RULES - 1, SECONDS_PER_DAY - 1) < 1 << 32
+
+
+def test_window_segments():
+    assert window_segments(DAY) == [(0, SECONDS_PER_DAY - 1)]
+    assert window_segments(NIGHT) == [(hours(22), SECONDS_PER_DAY - 1), (0, hours(6))]
+
+
+def test_expand():
+    schedule = RecurrenceSchedule()
+    schedule.set_rules([RecurrenceRule("Standup", "weekdays", hours(9.5)),
+                        RecurrenceRule("Water", "interval", hours(21), hours(23), 60),
+                        RecurrenceRule("Sleep", "daily", hours(1))])
+
+    assert schedule.expand(MONDAY, DAY) == [(hours(9.5), occurrence_id(0, hours(9.5))),
+                                           (hours(21), occurrence_id(1, hours(21))),
+                                           (hours(22), occurrence_id(1, hours(22))),
+                                           (hours(23), occurrence_id(1, hours(23))),
+                                           (hours(1), occurrence_id(2, hours(1)))]
+    # A wrapping window covers the evening and the early morning; weekday rules skip the weekend
+    assert sorted(seconds for seconds, _ in schedule.expand(SATURDAY, NIGHT)) == [hours(1), hours(22), hours(23)]
+
+    task = schedule.occurrence(occurrence_id(1, hours(22)))
+    assert (task.name, task.seconds) == ("Water", hours(22))
+    assert schedule.occurrence(occurrence_id(5, 0)) is None
+
+
+def test_expand_cache():
+    schedule = RecurrenceSchedule(max_cached=2)
+    schedule.set_rules([RecurrenceRule("Sleep", "daily", hours(1))])
+    first = schedule.expand(MONDAY, DAY)
+    assert schedule.expand(MONDAY, DAY) is first
+
+    schedule.expand(SATURDAY, DAY)
+    schedule.expand(MONDAY, DAY)  # Marks the Monday entry as most recently used
+    schedule.expand(MONDAY, NIGHT)
+    assert list(schedule.cache) == [(MONDAY, DAY), (MONDAY, NIGHT)]
+
+    # New rules drop every cached expansion
+    schedule.set_rules([])
+    assert not schedule.cache
+    assert schedule.expand(MONDAY, DAY) == []
+
+
+def test_dump_load():
+    schedule = RecurrenceSchedule()
+    schedule.set_rules([RecurrenceRule("Stretch", "weekdays", hours(10)),
+                        RecurrenceRule("Water", "interval", hours(8), hours(20), 90)])
+    copy = RecurrenceSchedule()
+    copy.load(schedule.dump())
+    assert [repr(rule) for rule in copy.rules] == [repr(rule) for rule in schedule.rules]
+
+
+def test_load_skips_invalid_rules():
+    schedule = RecurrenceSchedule()
+    schedule.load('[{"name": "Ok", "kind": "daily", "seconds": 60}, {"name": "Bad", "kind": "hourly", '
+                  '"seconds": 0}, {"kind": "daily"}, {"name": "x", "kind": "daily", "seconds": "noon"}, 3]')
+    assert [rule.name for rule in schedule.rules] == ["Ok"]
+
+    for text in ("", "not json", '{"name": "x"}'):
+        schedule.load(text)
+        assert len(schedule) == 0
+
+    with pytest.raises(ValueError):
+        schedule.set_rules([RecurrenceRule("x", "daily", 0)] * (MAX_RULES + 1))
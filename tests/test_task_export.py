@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+
+from task_export import export_tasks, format_for_path
+from task_import import RECORD_READERS
+
+ROWS = [("b", "11:00:00", "Second, \"quoted\""), ("a", "09:30:00", "First é"), ("c", "23:59:59", "Last\nline")]
+SORTED_ROWS = sorted(ROWS, key=lambda row: row[1])
+
+
+def test_format_for_path():
+    assert format_for_path("out.JSON") == 'json'
+    assert format_for_path("out.jsonl") == 'ndjson'
+    assert format_for_path("out.csv") == 'csv'
+    assert format_for_path("out.txt") == 'json'
+
+
+@pytest.mark.parametrize("rows", [ROWS, []])
+def test_json_export_matches_json_dump(tmp_path, rows):
+    path = str(tmp_path / "tasks.json")
+    metadata = {"export_date": "2024-05-06", "nested": {"a": [1, 2]}}
+    assert export_tasks(path, rows, 'json', metadata) == len(rows)
+
+    expected = {"tasks": [{"id": task_id, "name": name, "time": time_str}
+                          for task_id, time_str, name in sorted(rows, key=lambda row: row[1])], **metadata}
+    with open(path, encoding='utf-8') as file:
+        assert file.read() == json.dumps(expected, indent=2, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("export_format", ['json', 'ndjson', 'csv'])
+def test_exports_import_back(tmp_path, export_format):
+    path = str(tmp_path / f"tasks.{export_format}")
+    export_tasks(path, ROWS, export_format)
+    with open(path, 'rb') as file:
+        records = list(RECORD_READERS[export_format](file))
+    assert [(record["id"], record["time"], record["name"]) for record in records] == SORTED_ROWS
+
+
+def test_failed_export_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("old")
+
+    # The second row cannot be written, after the first one already was
+    with pytest.raises(TypeError):
+        export_tasks(path, [("a", "10:00:00", "A"), ("b", "11:00:00", object())], 'json')
+    with open(path, encoding='utf-8') as file:
+        assert file.read() == "old"
+    assert not os.path.exists(path + ".tmp")
@@ -0,0 +1,143 @@
+import datetime
+import io
+import json
+import random
+
+import pytest
+
+from task_import import (ImportMergeIndex, TaskRecordParser, import_format_for_path, iter_csv_records,
+                         iter_json_records, iter_ndjson_records, sniff_format)
+from task_store import ColumnarTaskStore, TaskStore
+
+TASKS = [{"name": f"Task {i} é\\\"", "time": "10:00", "done": i % 2 == 0, "note": None, "n": -12.5}
+         for i in range(20)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_json_records_across_chunk_boundaries(chunk_size):
+    data = json.dumps({"version": 2, "tasks": TASKS}, ensure_ascii=False).encode('utf-8')
+    assert list(iter_json_records(io.BytesIO(data), chunk_size)) == TASKS
+
+
+@pytest.mark.parametrize("document, expected", [
+    ([{"name": "a"}], [{"name": "a"}]),
+    ({"events": [{"name": "a"}], "tasks": [{"name": "b"}]}, [{"name": "a"}]),
+    ({"name": "a", "time": "10:00"}, [{"name": "a", "time": "10:00"}]),
+    ([], []),
+    ([1, "x"], [1, "x"]),
+])
+def test_json_document_shapes(document, expected):
+    assert list(iter_json_records(io.BytesIO(json.dumps(document).encode('utf-8')), 4)) == expected
+
+
+def test_json_syntax_error_raises_without_reading_on():
+    class CountingFile(io.BytesIO):
+        read_bytes = 0
+
+        def read(self, size=-1):
+            chunk = super().read(size)
+            self.read_bytes += len(chunk)
+            return chunk
+
+    file = CountingFile(b'[{"name": "a", "time": "10:00"}, {"name" "b"}, ' + b'{"name": "c"}, ' * 100000 + b'{}]')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_records(file, 1024))
+    assert file.read_bytes <= 2048
+
+
+def test_truncated_json_raises():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_records(io.BytesIO(b'[{"name": "a", "time": "10:0'), 4))
+
+
+@pytest.mark.parametrize("record, expected", [
+    ({"name": "Deploy", "time": "14:30"}, ("Deploy", datetime.time(14, 30))),
+    ({"title": "Deploy", "start": "14:30:15"}, ("Deploy", datetime.time(14, 30, 15))),
+    ({"task": "Deploy", "time": "02:30 PM"}, ("Deploy", datetime.time(14, 30))),
+    ({"label": "Deploy", "timestamp": "2024-05-06T14:30:00"}, ("Deploy", datetime.time(14, 30))),
+    ({"name": "", "title": "Deploy", "time": "14:30"}, ("Deploy", datetime.time(14, 30))),
+    ({"name": "Deploy"}, None),
+    ({"name": "Deploy", "time": "25:00"}, None),
+    ("not a record", None),
+])
+def test_record_parser(record, expected):
+    assert TaskRecordParser().parse(record) == expected
+
+
+def test_record_parser_fast_path_matches_slow_path():
+    rng = random.Random(5)
+    name_fields = ("name", "title", "task")
+    time_values = ("14:30", "14:30:15", "2:30 PM", "02:30:15 AM", "2024-05-06 14:30:00", "13:61", "nonsense", "")
+    parser = TaskRecordParser()
+    for _ in range(2000):
+        record = {rng.choice(name_fields): rng.choice(("A", "", "B")),
+                  rng.choice(("time", "start")): rng.choice(time_values)}
+        if rng.random() < 0.2:
+            record["name"] = "Shadowing"
+        assert parser.parse(record) == TaskRecordParser().parse(record)
+
+
+def test_import_format_for_path():
+    assert import_format_for_path("tasks.JSON") == 'json'
+    assert import_format_for_path("tasks.jsonl") == 'ndjson'
+    assert import_format_for_path("tasks.csv") == 'csv'
+    assert import_format_for_path("calendar.ics") == 'ics'
+    assert import_format_for_path("tasks.txt") is None
+
+
+@pytest.mark.parametrize("store_class", [TaskStore, ColumnarTaskStore])
+def test_merge_index_classifies_rows(store_class):
+    tasks = store_class()
+    tasks.load([("11111111-1111-1111-1111-111111111111", 3600, "A"), ("legacy", 7200, "B")])
+    merge_index = ImportMergeIndex(tasks)
+    a_id = tasks.id_for("11111111-1111-1111-1111-111111111111")
+    b_id = tasks.id_for("legacy")
+
+    # Matched by id first, then by the exact (time, name) pair
+    assert merge_index.classify(tasks, "11111111-1111-1111-1111-111111111111", "A", 3600) == ('unchanged', a_id)
+    assert merge_index.classify(tasks, "legacy", "B renamed", 7200) == ('updated', b_id)
+    assert merge_index.classify(tasks, None, "B", 7200) == ('unchanged', b_id)
+    assert merge_index.classify(tasks, "unknown-id", "A", 3600) == ('unchanged', a_id)
+    assert merge_index.classify(tasks, None, "A", 3601) == ('new', None)
+
+
+def test_merge_index_ignores_stale_entries():
+    tasks = TaskStore()
+    tasks.load([("a", 3600, "A")])
+    merge_index = ImportMergeIndex(tasks)
+
+    # Edited during the import without updating the index
+    tasks.move("a", 4000)
+    assert merge_index.classify(tasks, None, "A", 3600) == ('new', None)
+
+    merge_index.remove("a", "A", 3600)
+    merge_index.add("a", "A", 4000)
+    assert merge_index.classify(tasks, None, "A", 4000) == ('unchanged', "a")
+
+
+@pytest.mark.parametrize("text, expected", [
+    (json.dumps({"tasks": TASKS}), 'json'),
+    (json.dumps(TASKS, indent=2), 'json'),
+    ("\n".join(json.dumps(task) for task in TASKS), 'ndjson'),
+    (json.dumps(TASKS[0]) + "\n\n" + json.dumps(TASKS[1]), 'ndjson'),
+    (json.dumps(TASKS[0]), 'ndjson'),
+    ('{"tasks": [\n]}', 'json'),
+    ("name,time\nA,10:00\n", 'csv'),
+    ("BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n", 'ics'),
+])
+def test_sniff_format(text, expected):
+    assert sniff_format(text) == expected
+
+
+def test_ndjson_records():
+    data = b"\xef\xbb\xbf" + b'{"name": "a", "time": "10:00"}\n\n{"name": "b", ' + b'\n[1]\n\xff\n'
+    assert list(iter_ndjson_records(io.BytesIO(data))) == [{"name": "a", "time": "10:00"}, None, [1], None]
+
+
+def test_csv_records():
+    data = ('\ufeffName, TIME\r\n"Deploy, prod",14:30\r\n\r\n"Multi\nline",15:00\r\nShort\r\n').encode('utf-8')
+    assert list(iter_csv_records(io.BytesIO(data))) == [
+        {"name": "Deploy, prod", "time": "14:30"},
+        {"name": "Multi\nline", "time": "15:00"},
+        {"name": "Short"},
+    ]
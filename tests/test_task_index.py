@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from task_index import TaskIndex
+
+
+def check_against(index, reference):
+    """The index holds exactly the reference's (offset, id) pairs, sorted, with a consistent cursor"""
+    entries = list(zip(index.keys, index.ids))
+    assert len(index.keys) == len(index.ids) == len(reference)
+    assert sorted(entries) == sorted((offset, task_id) for task_id, offset in reference.items())
+    assert list(index.keys) == sorted(index.keys)
+    for task_id, offset in reference.items():
+        assert index.offsets.get(task_id) == offset
+    assert all(offset <= index.watermark for offset in index.keys[:index.cursor])
+    assert all(offset > index.watermark for offset in index.keys[index.cursor:])
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_advance_returns_each_due_task_once(compact):
+    index = TaskIndex(compact=compact)
+    index.rebuild([(30, 3), (10, 1), (20, 2)])
+    assert list(index.advance(15)) == [1]
+    assert list(index.advance(15)) == []
+    assert list(index.advance(30)) == [2, 3]
+    assert list(index.passed()) == [1, 2, 3]
+    assert list(index.pending()) == []
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_advance_backwards_starts_over(compact):
+    index = TaskIndex(compact=compact)
+    index.rebuild([(10, 1), (20, 2)])
+    index.advance(25)
+    # A new cycle counts only tasks at the new offset as due
+    assert list(index.advance(10)) == [1]
+    assert list(index.advance(20)) == [2]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_insert_keeps_cursor_on_pending_task(compact):
+    index = TaskIndex(compact=compact)
+    index.rebuild([(10, 1), (30, 3)], watermark=20)
+    index.insert(2, 5)
+    assert list(index.passed()) == [2, 1]
+    assert list(index.pending()) == [(30, 3)]
+    index.insert(1, 40)  # Moving a passed task ahead makes it pending again
+    assert list(index.advance(45)) == [3, 1]
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("batch_size", [3, 100])
+def test_insert_many_keeps_last_entry_of_repeated_id(compact, batch_size):
+    index = TaskIndex(compact=compact)
+    index.rebuild([(offset, offset) for offset in range(10)])
+    entries = [(offset * 2, offset) for offset in range(batch_size)] + [(7, 1)]
+    index.insert_many(entries)
+
+    reference = {task_id: task_id for task_id in range(10)}
+    reference.update({task_id: offset for offset, task_id in entries})
+    check_against(index, reference)
+    index.remove(1)
+    del reference[1]
+    check_against(index, reference)
+    assert 1 not in list(index.ids)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_random_operations_match_dict(compact):
+    rng = random.Random(7)
+    index = TaskIndex(compact=compact)
+    reference = {}
+    index.rebuild([])
+    for _ in range(2000):
+        operation = rng.random()
+        if operation < 0.4:
+            task_id, offset = rng.randrange(200), rng.randrange(1000)
+            index.insert(task_id, offset)
+            reference[task_id] = offset
+        elif operation < 0.5:
+            # Batches may repeat ids; the last entry of an id wins
+            entries = [(rng.randrange(1000), rng.randrange(200)) for _ in range(rng.choice((5, 80)))]
+            index.insert_many(entries)
+            reference.update({task_id: offset for offset, task_id in entries})
+        elif operation < 0.8:
+            task_id = rng.randrange(200)
+            index.remove(task_id)
+            reference.pop(task_id, None)
+        else:
+            offset = rng.randrange(1000)
+            due = index.advance(offset)
+            assert all(reference[task_id] <= offset for task_id in due)
+        check_against(index, reference)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_insert_many_matches_rebuild(compact):
+    rng = random.Random(11)
+    entries = [(rng.randrange(5000), task_id) for task_id in range(3000)]
+    index = TaskIndex(compact=compact)
+    index.rebuild(entries[:1000], watermark=2500)
+    for start in range(1000, 3000, 500):
+        # Each batch also moves some tasks that are already indexed
+        moved = [(rng.randrange(5000), rng.randrange(start)) for _ in range(100)]
+        batch = entries[start:start + 500] + moved
+        index.insert_many(batch)
+        for offset, task_id in batch:
+            entries[task_id] = (offset, task_id)
+
+    expected = TaskIndex(compact=compact)
+    expected.rebuild(entries, watermark=2500)
+    assert list(index.keys) == list(expected.keys)
+    assert sorted(index.ids) == sorted(expected.ids)
+    assert index.cursor == expected.cursor
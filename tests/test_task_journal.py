@@ -0,0 +1,76 @@
+import os
+
+from task_journal import JournalTaskStorage
+
+
+def reopen(storage):
+    storage.close()
+    return JournalTaskStorage(storage.directory)
+
+
+def test_changes_survive_a_restart(tmp_path):
+    storage = JournalTaskStorage(str(tmp_path))
+    storage.upsert_many("2024-05-06", [("a", "10:00:00", "A"), ("b", "09:00:00", "B")])
+    storage.upsert("2024-05-07", "a", "11:00:00", "A moved")
+    storage.delete("b")
+    storage.set_meta("migrated", True)
+
+    storage = reopen(storage)
+    assert storage.load_day("2024-05-06") == []
+    assert storage.load_day("2024-05-07") == [("a", "11:00:00", "A moved")]
+    assert storage.get_meta("migrated") is True
+    storage.close()
+
+
+def test_torn_last_line_is_dropped_before_appending(tmp_path):
+    storage = JournalTaskStorage(str(tmp_path))
+    storage.upsert("2024-05-06", "a", "10:00:00", "A")
+    storage.close()
+    with open(storage.journal_path, "a", encoding="utf-8") as file:
+        file.write('["put","b","2024-05-06","11:0')  # Crash in the middle of a write
+
+    storage = JournalTaskStorage(str(tmp_path))
+    storage.upsert("2024-05-06", "c", "12:00:00", "C")
+    storage = reopen(storage)
+    assert storage.load_day("2024-05-06") == [("a", "10:00:00", "A"), ("c", "12:00:00", "C")]
+    storage.close()
+
+
+def test_complete_record_without_newline_is_kept(tmp_path):
+    storage = JournalTaskStorage(str(tmp_path))
+    storage.close()
+    with open(storage.journal_path, "a", encoding="utf-8") as file:
+        file.write('["put","a","2024-05-06","10:00:00","A"]')
+
+    storage = JournalTaskStorage(str(tmp_path))
+    storage.upsert("2024-05-06", "b", "11:00:00", "B")
+    storage = reopen(storage)
+    assert [row[0] for row in storage.load_day("2024-05-06")] == ["a", "b"]
+    storage.close()
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    storage = JournalTaskStorage(str(tmp_path), compact_threshold=2000)
+    for index in range(100):
+        storage.upsert("2024-05-06", f"task-{index % 10}", f"10:00:{index % 60:02}", f"Task {index}")
+    storage.close()
+    assert os.path.exists(storage.snapshot_path)
+    assert not os.path.exists(storage.compacting_path)
+
+    storage = JournalTaskStorage(str(tmp_path))
+    rows = storage.load_day("2024-05-06")
+    assert len(rows) == 10
+    assert ("task-9", "10:00:39", "Task 99") in rows
+    storage.close()
+
+
+def test_interrupted_compaction_is_finished_on_start(tmp_path):
+    storage = JournalTaskStorage(str(tmp_path))
+    storage.upsert("2024-05-06", "a", "10:00:00", "A")
+    storage.close()
+    os.replace(storage.journal_path, storage.compacting_path)
+
+    storage = JournalTaskStorage(str(tmp_path))
+    assert not os.path.exists(storage.compacting_path)
+    assert storage.load_day("2024-05-06") == [("a", "10:00:00", "A")]
+    storage.close()
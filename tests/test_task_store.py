@@ -0,0 +1,118 @@
+import random
+import uuid
+
+import pytest
+
+from task_store import ColumnarTaskStore, TaskStore, is_canonical_uuid, pack_uuids
+
+STORE_CLASSES = [TaskStore, ColumnarTaskStore]
+
+
+def check_against(store, reference):
+    """The store holds exactly the reference's {external id: (seconds, name)} tasks"""
+    assert len(store) == len(reference)
+    found = {store.external_id(task.id): (task.seconds, task.name) for task in store.values()}
+    assert found == reference
+    task_ids, seconds = store.columns()
+    assert sorted(seconds) == sorted(value for value, _ in reference.values())
+    assert len(task_ids) == len(reference)
+
+
+def between_reference(reference, start, end):
+    if start <= end:
+        return sorted((s, n) for s, n in reference.values() if start <= s <= end)
+    return (sorted((s, n) for s, n in reference.values() if s >= start)
+            + sorted((s, n) for s, n in reference.values() if s <= end))
+
+
+@pytest.mark.parametrize("store_class", STORE_CLASSES)
+def test_load_keeps_external_ids(store_class):
+    store = store_class()
+    canonical = str(uuid.UUID(int=12345))
+    store.load([(canonical, 60, "a"), ("legacy-id", 30, "b")])
+    assert store.id_for(canonical) is not None
+    assert store.external_id(store.id_for(canonical)) == canonical
+    assert store[store.id_for("legacy-id")].name == "b"
+    assert store.id_for("missing") is None
+    assert [task.name for task in store.between(0, 100)] == ["b", "a"]
+
+
+@pytest.mark.parametrize("store_class", STORE_CLASSES)
+def test_between_wraps_past_midnight(store_class):
+    store = store_class()
+    store.load([(str(uuid.uuid4()), seconds, str(seconds)) for seconds in (100, 5000, 80000, 86000)])
+    assert [task.seconds for task in store.between(79000, 200)] == [80000, 86000, 100]
+    assert [task.seconds for task in store.between(200, 79000)] == [5000]
+
+
+@pytest.mark.parametrize("store_class", STORE_CLASSES)
+def test_random_operations_match_dict(store_class):
+    rng = random.Random(3)
+    store = store_class()
+    reference = {}
+    names = ["a", "b", "c", "d"]
+    for _ in range(1500):
+        operation = rng.random()
+        live = list(store)
+        if operation < 0.3 or not live:
+            task_id = store.new_id()
+            seconds, name = rng.randrange(86400), rng.choice(names)
+            store.add(task_id, seconds, name)
+            reference[store.external_id(task_id)] = (seconds, name)
+        elif operation < 0.4:
+            # Batches may repeat an id; its last row wins
+            task_ids = [store.new_id() for _ in range(3)] + rng.sample(live, 1)
+            rows = [(rng.choice(task_ids), rng.randrange(86400), rng.choice(names)) for _ in range(6)]
+            store.add_many(rows)
+            for task_id, seconds, name in rows:
+                reference[store.external_id(task_id)] = (seconds, name)
+        elif operation < 0.6:
+            task_id = rng.choice(live)
+            seconds = rng.randrange(86400)
+            store.move(task_id, seconds)
+            reference[store.external_id(task_id)] = (seconds, reference[store.external_id(task_id)][1])
+        elif operation < 0.7:
+            task_id = rng.choice(live)
+            name = rng.choice(names)
+            store.rename(task_id, name)
+            reference[store.external_id(task_id)] = (reference[store.external_id(task_id)][0], name)
+        elif operation < 0.9:
+            task_id = rng.choice(live)
+            assert store.remove(task_id) is not None
+            del reference[store.external_id(task_id)]
+        else:
+            start, end = rng.randrange(86400), rng.randrange(86400)
+            found = [(task.seconds, task.name) for task in store.between(start, end)]
+            expected = between_reference(reference, start, end)
+            # Tasks at the same second may come in any order
+            assert [seconds for seconds, _ in found] == [seconds for seconds, _ in expected]
+            assert sorted(found) == sorted(expected)
+        check_against(store, reference)
+
+
+def test_columnar_store_keeps_removed_external_id():
+    store = ColumnarTaskStore()
+    task_id = store.load([("legacy-id", 10, "a")])[0]
+    store.remove(task_id)
+    assert task_id not in store
+    assert store.external_id(task_id) == "legacy-id"
+    assert store.id_for("legacy-id") is None
+
+
+@pytest.mark.parametrize("external_id, expected", [
+    ("0f8fad5b-d9cb-469f-a165-70867728950e", True),
+    ("0F8FAD5B-D9CB-469F-A165-70867728950E", False),
+    ("0f8fad5bd9cb469fa16570867728950e", False),
+    ("0f8fad5b-d9cb-469f-a165-70867728950", False),
+    ("0f8fad5b-d9cb-469f-a16570867728950e-", False),
+    ("0f8fad5b-d9cb-469f-a165-7086772895 e", False),
+    ("legacy-id", False),
+])
+def test_canonical_uuids_are_packed_and_other_ids_kept(external_id, expected):
+    assert is_canonical_uuid(external_id) == expected
+    store = ColumnarTaskStore()
+    ids = [str(uuid.UUID(int=value)) for value in (0, 1, 2 ** 128 - 1)] + [external_id]
+    store.load([(task_id, 0, "a") for task_id in ids])
+    assert [store.external_id(code) for code in range(1, len(ids) + 1)] == ids
+    assert (pack_uuids(ids) is not None) == expected
+    assert len(store.foreign_ids) == (0 if expected else 1)
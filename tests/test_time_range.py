@@ -0,0 +1,69 @@
+import datetime
+
+from time_range import SECONDS_PER_DAY, TimeRange, seconds_to_time, time_to_seconds
+
+
+def hours(value):
+    return int(value * 3600)
+
+
+def test_seconds_round_trip():
+    assert time_to_seconds(datetime.time(14, 30, 5)) == 52205
+    assert seconds_to_time(52205) == datetime.time(14, 30, 5)
+    assert seconds_to_time(SECONDS_PER_DAY + 60) == datetime.time(0, 1)
+
+
+def test_same_day_range():
+    time_range = TimeRange.from_times(datetime.time(9), datetime.time(17))
+    assert not time_range.wraps
+    assert time_range.total_duration == hours(8)
+    assert time_range.contains(hours(9)) and time_range.contains(hours(17))
+    assert not time_range.contains(hours(8))
+    assert time_range.offset(hours(10)) == hours(1)
+    assert time_range.offset(hours(18)) is None
+    # Outside a same-day range, progress is clamped
+    assert time_range.progress(hours(13)) == 0.5
+    assert time_range.progress(hours(6)) == 0.0
+    assert time_range.progress(hours(20)) == 1.0
+
+
+def test_range_spanning_midnight():
+    time_range = TimeRange.from_times(datetime.time(22), datetime.time(6))
+    assert time_range.wraps
+    assert time_range.total_duration == hours(8)
+    assert time_range.contains(hours(23)) and time_range.contains(hours(1))
+    assert not time_range.contains(hours(12))
+    assert time_range.offset(hours(23)) == hours(1)
+    assert time_range.offset(hours(2)) == hours(4)
+    assert time_range.progress(hours(2)) == 0.5
+    assert time_range.time_at(0.75) == datetime.time(4)
+
+
+def test_equal_start_and_end_is_a_whole_day():
+    time_range = TimeRange.from_times(datetime.time(6), datetime.time(6))
+    assert time_range.wraps
+    assert time_range.total_duration == SECONDS_PER_DAY
+    assert all(time_range.contains(seconds) for seconds in range(0, SECONDS_PER_DAY, 3600))
+
+
+def test_seconds_at_clamps_progress():
+    time_range = TimeRange.from_times(datetime.time(22), datetime.time(6))
+    assert time_range.seconds_at(-1.0) == hours(22)
+    assert time_range.seconds_at(2.0) == hours(6)
+
+
+def test_offsets_many_matches_offset():
+    for start, end in ((9, 17), (22, 6), (6, 6)):
+        time_range = TimeRange.from_times(datetime.time(start), datetime.time(end))
+        seconds = list(range(0, SECONDS_PER_DAY, 900))
+        assert time_range.offsets_many(seconds) == [time_range.offset(value) for value in seconds]
+
+
+def test_progress_many_matches_progress():
+    for start, end in ((9, 17), (22, 6), (6, 6)):
+        time_range = TimeRange.from_times(datetime.time(start), datetime.time(end))
+        seconds = list(range(0, SECONDS_PER_DAY, 900))
+        assert time_range.progress_many(seconds) == [time_range.progress(value) for value in seconds]
+        offsets = [offset for offset in time_range.offsets_many(seconds) if offset is not None]
+        assert time_range.progress_many(offsets, offsets=True) == [offset / time_range.total_duration
+                                                                    for offset in offsets]
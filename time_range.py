@@ -0,0 +1,98 @@
+import datetime
+from collections import namedtuple
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def time_to_seconds(time_obj):
+    """Convert a time object to whole seconds since midnight"""
+    return time_obj.hour * 3600 + time_obj.minute * 60 + time_obj.second
+
+
+def seconds_to_time(seconds):
+    """Convert seconds since midnight to a time object"""
+    seconds = int(seconds) % SECONDS_PER_DAY
+    return datetime.time(seconds // 3600, (seconds % 3600) // 60, seconds % 60)
+
+
+class TimeRange(namedtuple("TimeRange", ["start_seconds", "end_seconds", "total_duration", "wraps"])):
+    """Immutable start/end range with the midnight-wrap case worked out once.
+
+    Build it with from_times() whenever start_time or end_time changes and
+    use it for all time <-> progress conversions.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_times(cls, start_time, end_time):
+        """Build a range from two time objects (end <= start means the range spans midnight)"""
+        start_seconds = time_to_seconds(start_time)
+        end_seconds = time_to_seconds(end_time)
+
+        if end_seconds <= start_seconds:
+            # Range spans midnight
+            return cls(start_seconds, end_seconds, (SECONDS_PER_DAY - start_seconds) + end_seconds, True)
+        # Normal range within same day
+        return cls(start_seconds, end_seconds, end_seconds - start_seconds, False)
+
+    def contains(self, seconds):
+        """Check if seconds since midnight fall within the range"""
+        if self.wraps:
+            return seconds >= self.start_seconds or seconds <= self.end_seconds
+        return self.start_seconds <= seconds <= self.end_seconds
+
+    def elapsed(self, seconds):
+        """Seconds from the range start, clamped to the range unless it spans midnight"""
+        if self.wraps:
+            if seconds >= self.start_seconds:
+                return seconds - self.start_seconds
+            return (SECONDS_PER_DAY - self.start_seconds) + seconds
+        return max(0, min(seconds - self.start_seconds, self.total_duration))
+
+    def offset(self, seconds):
+        """Seconds from the range start, or None if seconds fall outside the range"""
+        if not self.contains(seconds):
+            return None
+        return (seconds - self.start_seconds) % SECONDS_PER_DAY
+
+    def progress(self, seconds):
+        """Convert seconds since midnight to a progress value (0.0 to 1.0 within the range)"""
+        if self.total_duration > 0:
+            return self.elapsed(seconds) / self.total_duration
+        return 0.0
+
+    def seconds_at(self, progress):
+        """Convert a progress value to whole seconds since midnight"""
+        progress = max(0.0, min(1.0, progress))
+        return (self.start_seconds + int(progress * self.total_duration)) % SECONDS_PER_DAY
+
+    def time_at(self, progress):
+        """Convert a progress value to a time object"""
+        return seconds_to_time(self.seconds_at(progress))
+
+    def offsets_many(self, seconds_seq):
+        """Map a sequence of seconds to offsets (None for times outside the range)"""
+        start = self.start_seconds
+        end = self.end_seconds
+        if self.wraps:
+            return [(s - start) % SECONDS_PER_DAY if s >= start or s <= end else None for s in seconds_seq]
+        return [s - start if start <= s <= end else None for s in seconds_seq]
+
+    def progress_many(self, seconds_seq, offsets=False):
+        """Map a sequence of seconds to progress values in one pass.
+
+        With offsets=True the sequence holds offsets into the range (as kept
+        by the task index and returned by offsets_many) instead of seconds.
+        """
+        total = self.total_duration
+        if total <= 0:
+            return [0.0] * len(seconds_seq)
+        if offsets:
+            return [offset / total for offset in seconds_seq]
+
+        start = self.start_seconds
+        if self.wraps:
+            before_midnight = SECONDS_PER_DAY - start
+            return [(s - start if s >= start else before_midnight + s) / total for s in seconds_seq]
+        return [max(0, min(s - start, total)) / total for s in seconds_seq]